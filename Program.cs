@@ -3,6 +3,7 @@ using System.Collections.Generic;
 using System.Diagnostics;
 using System.IO;
 using System.Text.Json;
+using System.Threading;
 using System.Threading.Tasks;
 
 
@@ -118,6 +119,25 @@ public class SignatureConfig
         public List<int>? PageNumbers { get; set; }
         public bool SkipNonEmpty { get; set; } = false;  // Skip matches that have content after the keyword
         public string SignaturePosition { get; set; } = "top";  // Options: "top", "bottom", "left", "right"
+        public string Engine { get; set; } = "pdfplumber";  // Keyword locator: "pdfplumber" or "pymupdf"
+        public string SaveMode { get; set; } = "full";  // Output: "full", "incremental" or "compact"
+        public List<string>? SearchPages { get; set; }  // Page indexes or "start:stop" ranges, e.g. "-2:" = last two pages
+        public float[]? SearchRegion { get; set; }  // x0, y0, x1, y1 as fractions of the page
+        public int? MaxMatchesPerKeyword { get; set; }
+        public List<SignaturePlacement>? Placements { get; set; }  // Several signers in one open/save; replaces the single signature fields
+    }
+
+    public class SignaturePlacement
+    {
+        public string SignatureFilename { get; set; } = "";
+        public List<string>? Keywords { get; set; }
+        public string SignaturePosition { get; set; } = "top";
+        public float[]? SignatureSize { get; set; }
+        public bool SkipNonEmpty { get; set; } = false;
+        public float? XCoord { get; set; }
+        public float? YCoord { get; set; }
+        public List<int>? PageNumbers { get; set; }
+        public string? Name { get; set; }
     }
 
     public class SignatureResult
@@ -127,6 +147,52 @@ public class SignatureConfig
         public string OutputPdfPath { get; set; } = "";
         public bool Success { get; set; }
         public string? ErrorMessage { get; set; }
+        public string? ErrorCode { get; set; }  // "timeout", "memory_limit" or "worker_crashed" when a limit stopped the document
+        public string? LayoutCache { get; set; }
+        public bool Cached { get; set; }  // Already signed from the same inputs (--skip-unchanged)
+        public DocumentMetrics? Metrics { get; set; }  // Only set when the script runs with --metrics
+        public List<PlacementResult>? Placements { get; set; }  // One per SignaturePlacement
+        public List<PlannedSignature>? PlannedSignatures { get; set; }  // Only set by --dry-run
+        public List<SkippedMatch>? SkippedMatches { get; set; }  // Only set by --dry-run
+    }
+
+    public class PlannedSignature
+    {
+        public int PageNumber { get; set; }  // Zero-based
+        public float X { get; set; }
+        public float Y { get; set; }
+        public float Width { get; set; }
+        public float Height { get; set; }
+        public string SignatureFilename { get; set; } = "";
+        public string? Name { get; set; }
+    }
+
+    public class SkippedMatch
+    {
+        public int PageNumber { get; set; }  // Zero-based
+        public string Keyword { get; set; } = "";
+        public float X { get; set; }
+        public float Y { get; set; }
+        public string Content { get; set; } = "";
+    }
+
+    public class PlacementResult
+    {
+        public string? Name { get; set; }
+        public string SignatureFilename { get; set; } = "";
+        public List<float[]> Locations { get; set; } = new();  // [pageNumber, x, y] of each signature placed
+    }
+
+    public class DocumentMetrics
+    {
+        public Dictionary<string, double> StageSeconds { get; set; } = new();
+        public int PagesScanned { get; set; }
+        public int WordsExtracted { get; set; }
+        public int MatchesFound { get; set; }
+        public int MatchesSkipped { get; set; }
+        public int Placements { get; set; }
+        public long OutputBytes { get; set; }
+        public long? PeakRssBytes { get; set; }
     }
 
     public class PDFSignatureProcessor
@@ -241,6 +307,179 @@ public class SignatureConfig
                 throw new Exception($"Error processing PDF documents: {ex.Message}", ex);
             }
         }
+
+        // Yields each result as soon as python finishes its document (--ndjson output)
+        public async IAsyncEnumerable<SignatureResult> StreamDocumentsAsync(List<SignatureConfig> configs)
+        {
+            var jsonOptions = new JsonSerializerOptions { PropertyNamingPolicy = JsonNamingPolicy.CamelCase };
+            var tempFile = System.IO.Path.GetTempFileName();
+            await File.WriteAllTextAsync(tempFile, JsonSerializer.Serialize(configs, jsonOptions));
+
+            var startInfo = new ProcessStartInfo
+            {
+                FileName = _pythonPath,
+                Arguments = $"\"{_scriptPath}\" \"{tempFile}\" --ndjson",
+                RedirectStandardOutput = true,
+                RedirectStandardError = true,
+                UseShellExecute = false,
+                CreateNoWindow = true
+            };
+
+            using var process = new Process { StartInfo = startInfo };
+            var errorBuilder = new System.Text.StringBuilder();
+            process.ErrorDataReceived += (sender, e) =>
+            {
+                if (e.Data != null)
+                {
+                    errorBuilder.AppendLine(e.Data);
+                }
+            };
+
+            try
+            {
+                process.Start();
+                process.BeginErrorReadLine();
+
+                string? line;
+                while ((line = await process.StandardOutput.ReadLineAsync()) != null)
+                {
+                    if (!line.TrimStart().StartsWith("{"))
+                    {
+                        continue;
+                    }
+                    var result = JsonSerializer.Deserialize<SignatureResult>(line, jsonOptions);
+                    if (result != null)
+                    {
+                        yield return result;
+                    }
+                }
+
+                await process.WaitForExitAsync();
+                if (_enableLogging)
+                {
+                    Console.WriteLine($"Python Exit Code: {process.ExitCode}");
+                    Console.WriteLine($"Python Error: {errorBuilder.ToString().Trim()}");
+                }
+            }
+            finally
+            {
+                try
+                {
+                    if (File.Exists(tempFile))
+                        File.Delete(tempFile);
+                }
+                catch (Exception cleanupEx)
+                {
+                    Console.WriteLine($"Warning: Could not delete temporary file {tempFile}: {cleanupEx.Message}");
+                }
+            }
+        }
+    }
+
+    public class WorkerResponse
+    {
+        public string? Id { get; set; }
+        public List<SignatureResult> Results { get; set; } = new List<SignatureResult>();
+        public string? ErrorMessage { get; set; }
+    }
+
+    // Keeps one python process running in --serve mode so interpreter start-up and
+    // module imports are paid once instead of on every batch
+    public class PDFSignatureWorker : IAsyncDisposable
+    {
+        private static readonly JsonSerializerOptions JsonOptions = new JsonSerializerOptions
+        {
+            PropertyNamingPolicy = JsonNamingPolicy.CamelCase
+        };
+
+        private readonly Process _process;
+        private readonly SemaphoreSlim _lock = new SemaphoreSlim(1, 1);
+        private readonly bool _enableLogging;
+
+        public PDFSignatureWorker(string pythonPath = "python", string scriptPath = "pdf_signature_processor.py", bool enableLogging = true)
+        {
+            _enableLogging = enableLogging;
+            var startInfo = new ProcessStartInfo
+            {
+                FileName = pythonPath,
+                Arguments = $"\"{scriptPath}\" --serve",
+                RedirectStandardInput = true,
+                RedirectStandardOutput = true,
+                RedirectStandardError = true,
+                UseShellExecute = false,
+                CreateNoWindow = true
+            };
+
+            _process = new Process { StartInfo = startInfo };
+            _process.ErrorDataReceived += (sender, e) =>
+            {
+                if (e.Data != null && _enableLogging)
+                {
+                    Console.WriteLine($"Python: {e.Data}");
+                }
+            };
+            _process.Start();
+            _process.BeginErrorReadLine();
+        }
+
+        public async Task<List<SignatureResult>> ProcessDocumentsAsync(List<SignatureConfig> configs)
+        {
+            var requestId = Guid.NewGuid().ToString();
+            var request = JsonSerializer.Serialize(new { Id = requestId, Configs = configs }, JsonOptions);
+
+            await _lock.WaitAsync();
+            try
+            {
+                if (_process.HasExited)
+                {
+                    throw new Exception($"Python worker has exited with code {_process.ExitCode}");
+                }
+
+                await _process.StandardInput.WriteLineAsync(request);
+                await _process.StandardInput.FlushAsync();
+
+                // Read until the response carrying our request id; other stdout lines are ignored
+                while (true)
+                {
+                    var line = await _process.StandardOutput.ReadLineAsync();
+                    if (line == null)
+                    {
+                        throw new Exception("Python worker closed its output before responding");
+                    }
+                    if (!line.TrimStart().StartsWith("{"))
+                    {
+                        continue;
+                    }
+
+                    var response = JsonSerializer.Deserialize<WorkerResponse>(line, JsonOptions);
+                    if (response?.Id != requestId)
+                    {
+                        continue;
+                    }
+                    if (response.ErrorMessage != null)
+                    {
+                        throw new Exception($"Error processing PDF documents: {response.ErrorMessage}");
+                    }
+                    return response.Results;
+                }
+            }
+            finally
+            {
+                _lock.Release();
+            }
+        }
+
+        public async ValueTask DisposeAsync()
+        {
+            // Closing stdin makes the worker see EOF and exit cleanly
+            if (!_process.HasExited)
+            {
+                _process.StandardInput.Close();
+                await _process.WaitForExitAsync();
+            }
+            _process.Dispose();
+            _lock.Dispose();
+        }
     }
 
     // Example usage
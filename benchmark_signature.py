@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+
+# Benchmarks for pdf_signature_processor
+#
+#   python benchmark_signature.py startup [--runs 5] [--output results.json]
+#   python benchmark_signature.py corpus DIR [--seed 0] [--profiles ...]
+#   python benchmark_signature.py latency [--runs 3] [--engine pymupdf] [--output results.json]
+#   python benchmark_signature.py throughput [--copies 4] [--max-workers 0 4] [--output results.json]
+#   python benchmark_signature.py memory [--pages 1000] [--output results.json]
+#   python benchmark_signature.py compare base.json new.json [--threshold 0.10]
+#
+# Results are written as JSON so they can be compared between commits.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+# Budget for a fresh interpreter to import the module and sign one document with
+# explicit coordinates (import-to-first-result, median over the runs)
+STARTUP_BUDGET_SECONDS = 0.75
+
+# Modules whose presence after the explicit-coordinates run is reported
+TRACKED_MODULES = ("fitz", "pymupdf", "pdfplumber", "pdfminer", "PIL")
+
+STARTUP_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import pdf_signature_processor as p
+imported = time.perf_counter()
+config = p.SignatureConfig(working_folder=sys.argv[1], input_pdf_filename="document.pdf", item_id="startup",
+                           signature_filename="signature.png", x_coord=72, y_coord=72)
+result = p.PDFSignatureProcessor().process_documents([config])[0]
+finished = time.perf_counter()
+print(json.dumps({
+    "success": result.success,
+    "import_seconds": imported - start,
+    "first_result_seconds": finished - start,
+    "modules": [m for m in %r if m in sys.modules],
+}))
+""" % (TRACKED_MODULES,)
+
+
+# Synthetic corpus: each profile is generated from a seeded RNG, so the same seed
+# always produces the same documents
+CORPUS_PROFILES = {
+    "letter": dict(pages=1, words_per_page=80, blocks=1, filled_ratio=0.0, signature_dpi=72),
+    "contract": dict(pages=12, words_per_page=350, blocks=4, filled_ratio=0.5, signature_dpi=150),
+    "dense": dict(pages=40, words_per_page=900, blocks=6, filled_ratio=0.25, signature_dpi=300),
+    "signature_pages": dict(pages=120, words_per_page=250, blocks=60, filled_ratio=0.5, signature_dpi=150),
+    "archive": dict(pages=500, words_per_page=300, blocks=2, filled_ratio=0.0, signature_dpi=300),
+}
+
+# Stages timed by the latency benchmark, as processor methods
+STAGES = {
+    "validate_input": "_validate_input",
+    "find_keyword_locations": "_locate_keywords",
+    "insert_signature": "_insert_signature",
+    "save": "_save_document",
+}
+
+FILLER_WORDS = ("agreement", "party", "shall", "herein", "payment", "term", "notice", "section",
+                "the", "of", "and", "to", "in", "any", "such", "by", "this", "on", "or", "date")
+SIGNER_NAMES = ("John Doe", "Jane Roe", "Alex Smith", "Maria Garcia", "Wei Chen")
+
+
+MEMORY_SCRIPT = """
+import sys, json, time
+import pdf_signature_processor as p
+workdir, engine, low_memory = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+config = p.SignatureConfig(working_folder=workdir, input_pdf_filename="large.pdf", item_id="memory",
+                           signature_filename="signature.png", keywords=["By:"], skip_non_empty=True,
+                           engine=engine, output_path=workdir + "/signed_large.pdf")
+start = time.perf_counter()
+result = p.PDFSignatureProcessor(low_memory=low_memory).process_documents([config])[0]
+print(json.dumps({
+    "success": result.success,
+    "seconds": time.perf_counter() - start,
+    "peak_rss_bytes": p._peak_rss_bytes(),
+}))
+"""
+
+
+def import_fitz():
+    """Import PyMuPDF under its current module name, falling back to the legacy one."""
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF releases before 1.24.3
+    return fitz
+
+
+def write_document(path, pages=1):
+    """Write a simple text PDF."""
+    fitz = import_fitz()
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 100), f"Page {page_num + 1}", fontsize=11)
+        page.insert_text((72, 700), "By:", fontsize=11)
+        page.insert_text((72, 715), "Name:", fontsize=11)
+    doc.save(path)
+    doc.close()
+
+
+def write_signature(path, size=(300, 100), dpi=(150, 150)):
+    """Write a PNG signature image."""
+    from PIL import Image
+
+    Image.new("RGBA", size, (0, 0, 0, 0)).save(path, dpi=dpi)
+
+
+def write_synthetic_document(path, pages, words_per_page, blocks, filled_ratio, seed):
+    """
+    Write a reproducible text PDF with By:/Name: signature blocks spread over its pages.
+
+    Args:
+        path: Output PDF path
+        pages: Number of pages
+        words_per_page: Approximate number of filler words per page
+        blocks: Number of By:/Name: blocks in the document
+        filled_ratio: Fraction of blocks whose By: line already holds a name
+        seed: RNG seed
+
+    Returns:
+        dict: Number of empty and filled blocks
+    """
+    fitz = import_fitz()
+    rng = random.Random(seed)
+
+    # Blocks take the bottom of a page, at most two per page
+    block_pages = sorted(rng.choices(range(pages), k=blocks)) if blocks else []
+    filled = set(rng.sample(range(blocks), round(blocks * filled_ratio)))
+    doc = fitz.open()
+    block_index = 0
+    for page_num in range(pages):
+        page = doc.new_page()
+        lines, line = [], []
+        for _ in range(words_per_page):
+            line.append(rng.choice(FILLER_WORDS))
+            if len(line) == 12:
+                lines.append(" ".join(line))
+                line = []
+        if line:
+            lines.append(" ".join(line))
+        # 12 words per line at 7pt fit two columns of 50 lines above the signature blocks
+        for column in range(2):
+            column_lines = lines[column * 50:(column + 1) * 50]
+            if column_lines:
+                page.insert_text((40 + column * 280, 60), "\n".join(column_lines), fontsize=7, lineheight=12 / 7)
+
+        for slot, _ in enumerate(p for p in block_pages if p == page_num):
+            x, y = 72 + (slot % 2) * 260, 700 + (slot // 2 % 2) * 50
+            by_line = "By:"
+            if block_index in filled:
+                by_line = f"By: {rng.choice(SIGNER_NAMES)}"
+            page.insert_text((x, y), by_line, fontsize=11)
+            page.insert_text((x, y + 15), "Name:", fontsize=11)
+            block_index += 1
+    doc.save(path)
+    doc.close()
+    return {"empty_blocks": blocks - len(filled), "filled_blocks": len(filled)}
+
+
+def generate_corpus(directory, seed=0, profiles=None):
+    """
+    Write the synthetic corpus and a manifest of configs for it.
+
+    Args:
+        directory: Folder to write the PDFs, signatures and manifest.json into
+        seed: Base RNG seed
+        profiles: Names from CORPUS_PROFILES to generate (default: all)
+
+    Returns:
+        list: One entry per document with its profile, page count, blocks and config
+    """
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    for index, name in enumerate(profiles or CORPUS_PROFILES):
+        profile = CORPUS_PROFILES[name]
+        dpi = profile["signature_dpi"]
+        signature_filename = f"signature_{dpi}dpi.png"
+        if not os.path.exists(os.path.join(directory, signature_filename)):
+            # 2 x 0.67 inch at every DPI, so only the pixel density varies
+            write_signature(os.path.join(directory, signature_filename), size=(2 * dpi, 2 * dpi // 3), dpi=(dpi, dpi))
+
+        pdf_filename = f"{name}.pdf"
+        blocks = write_synthetic_document(os.path.join(directory, pdf_filename), profile["pages"],
+                                          profile["words_per_page"], profile["blocks"],
+                                          profile["filled_ratio"], seed + index)
+        entries.append({
+            "profile": name,
+            "pages": profile["pages"],
+            "words_per_page": profile["words_per_page"],
+            "signature_dpi": dpi,
+            **blocks,
+            "config": {
+                "workingFolder": directory,
+                "inputPdfFilename": pdf_filename,
+                "itemId": name,
+                "signatureFilename": signature_filename,
+                "keywords": ["By:"],
+                "signaturePosition": "right",
+                "skipNonEmpty": True,
+            },
+        })
+
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump([entry["config"] for entry in entries], f, indent=2)
+    return entries
+
+
+def time_stages(processor):
+    """
+    Wrap the processor's stage methods so each call adds its duration to a total.
+
+    Args:
+        processor: PDFSignatureProcessor instance (only this instance is patched)
+
+    Returns:
+        dict: Seconds spent per stage name, updated as the processor runs
+    """
+    totals = dict.fromkeys(STAGES, 0.0)
+
+    def timed(stage, method):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                totals[stage] += time.perf_counter() - started
+        return wrapper
+
+    for stage, method_name in STAGES.items():
+        setattr(processor, method_name, timed(stage, getattr(processor, method_name)))
+    return totals
+
+
+def bench_latency(runs, engine, seed, profiles=None):
+    """
+    Time single-document signing per corpus profile, split into stages.
+
+    Args:
+        runs: Number of times each document is signed
+        engine: Keyword locator engine
+        seed: Corpus seed
+        profiles: Profile names to run (default: all)
+
+    Returns:
+        dict: Per profile, the median total and per-stage seconds and the placements made
+    """
+    import pdf_signature_processor as p
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for entry in generate_corpus(workdir, seed, profiles):
+            config_data = dict(entry["config"], engine=engine)
+            samples = []
+            for run in range(runs):
+                processor = p.PDFSignatureProcessor()
+                totals = time_stages(processor)
+                config = p.config_from_json(dict(config_data, outputPath=os.path.join(workdir, f"out_{run}.pdf")))
+                started = time.perf_counter()
+                result = processor.process_documents([config])[0]
+                elapsed = time.perf_counter() - started
+                if not result.success:
+                    raise RuntimeError(f"{entry['profile']}: {result.error_message}")
+                samples.append(dict(totals, total=elapsed))
+
+            results[entry["profile"]] = {
+                "pages": entry["pages"],
+                "words_per_page": entry["words_per_page"],
+                "signature_dpi": entry["signature_dpi"],
+                "empty_blocks": entry["empty_blocks"],
+                "filled_blocks": entry["filled_blocks"],
+                "median_seconds": {name: statistics.median(s[name] for s in samples)
+                                   for name in ("total", *STAGES)},
+            }
+    return results
+
+
+def bench_throughput(copies, worker_counts, engine, seed, profiles=None):
+    """
+    Time process_documents over the corpus repeated copies times.
+
+    Args:
+        copies: Number of times each corpus document appears in the batch
+        worker_counts: max_workers values to run (0 = sequential)
+        engine: Keyword locator engine
+        seed: Corpus seed
+        profiles: Profile names to include (default: all)
+
+    Returns:
+        dict: Per worker count, wall time and documents/pages per second
+    """
+    import pdf_signature_processor as p
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        entries = generate_corpus(workdir, seed, profiles)
+        batch = [(entry, copy) for copy in range(copies) for entry in entries]
+        page_total = sum(entry["pages"] for entry, _ in batch)
+        for workers in worker_counts:
+            configs = [p.config_from_json(dict(entry["config"], engine=engine, itemId=f"{entry['profile']}-{copy}",
+                                               outputPath=os.path.join(workdir, f"out_{entry['profile']}_{copy}.pdf")))
+                       for entry, copy in batch]
+            started = time.perf_counter()
+            batch_results = p.PDFSignatureProcessor().process_documents(configs, max_workers=workers or None)
+            elapsed = time.perf_counter() - started
+            results[str(workers)] = {
+                "documents": len(configs),
+                "pages": page_total,
+                "failed": sum(not r.success for r in batch_results),
+                "seconds": elapsed,
+                "documents_per_second": len(configs) / elapsed,
+                "pages_per_second": page_total / elapsed,
+            }
+    return results
+
+
+def bench_memory(pages, engines, seed):
+    """
+    Measure the peak RSS of signing one large document, with and without low-memory mode.
+
+    Each measurement runs in a fresh interpreter so peaks do not carry over.
+
+    Args:
+        pages: Page count of the generated document
+        engines: Keyword locator engines to measure
+        seed: Corpus seed
+
+    Returns:
+        dict: Per engine and mode, the peak RSS and time
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        write_synthetic_document(os.path.join(workdir, "large.pdf"), pages, 300, 4, 0.5, seed)
+        write_signature(os.path.join(workdir, "signature.png"))
+        for engine in engines:
+            for mode, low_memory in (("default", "0"), ("low_memory", "1")):
+                completed = subprocess.run([sys.executable, "-c", MEMORY_SCRIPT, workdir, engine, low_memory],
+                                           cwd=script_dir, capture_output=True, text=True, check=True)
+                sample = json.loads(completed.stdout.strip().splitlines()[-1])
+                results[f"{engine}.{mode}"] = dict(sample, pages=pages)
+    return results
+
+
+def compare_results(base, new, threshold):
+    """
+    Find timings that got slower between two result files of the same benchmark.
+
+    Args:
+        base: Parsed baseline results
+        new: Parsed results to check
+        threshold: Allowed relative slowdown (0.10 = 10%)
+
+    Returns:
+        list: One dict per regressed timing
+    """
+    def timings(results):
+        found = {}
+        for name, profile in results.get("latency", {}).items():
+            for stage, seconds in profile["median_seconds"].items():
+                found[f"latency.{name}.{stage}"] = seconds
+        for workers, run in results.get("throughput", {}).items():
+            found[f"throughput.{workers}.seconds"] = run["seconds"]
+        for name, run in results.get("memory", {}).items():
+            found[f"memory.{name}.seconds"] = run["seconds"]
+        if "startup" in results:
+            found["startup.median_first_result_seconds"] = results["startup"]["median_first_result_seconds"]
+        return found
+
+    base_timings, new_timings = timings(base), timings(new)
+    regressions = []
+    for key in sorted(base_timings.keys() & new_timings.keys()):
+        before, after = base_timings[key], new_timings[key]
+        # Ignore sub-millisecond stages, they are dominated by noise
+        if after > before * (1 + threshold) and after - before > 0.001:
+            regressions.append({"timing": key, "base_seconds": before, "new_seconds": after,
+                                "change": after / before - 1 if before else None})
+    return regressions
+
+
+def git_commit():
+    """Return the commit the benchmark ran against, if the script is in a git checkout."""
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+
+def bench_startup(runs):
+    """
+    Time import-to-first-result for the explicit-coordinates path in fresh interpreters.
+
+    Args:
+        runs: Number of interpreter launches
+
+    Returns:
+        dict: Timings per run, medians and the modules the run had to import
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        write_document(os.path.join(workdir, "document.pdf"))
+        write_signature(os.path.join(workdir, "signature.png"))
+
+        samples = []
+        for _ in range(runs):
+            launched = time.perf_counter()
+            completed = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, workdir], cwd=script_dir,
+                                       capture_output=True, text=True, check=True)
+            sample = json.loads(completed.stdout.strip().splitlines()[-1])
+            sample["process_seconds"] = time.perf_counter() - launched
+            samples.append(sample)
+
+    median_first_result = statistics.median(s["first_result_seconds"] for s in samples)
+    return {
+        "runs": samples,
+        "median_import_seconds": statistics.median(s["import_seconds"] for s in samples),
+        "median_first_result_seconds": median_first_result,
+        "median_process_seconds": statistics.median(s["process_seconds"] for s in samples),
+        "modules": samples[-1]["modules"],
+        "budget_seconds": STARTUP_BUDGET_SECONDS,
+        "within_budget": median_first_result <= STARTUP_BUDGET_SECONDS,
+    }
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", help="Write results to this JSON file instead of stdout")
+    parser = argparse.ArgumentParser(description="Benchmark the PDF signature processor")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    startup = subparsers.add_parser("startup", parents=[common],
+                                    help="Import-to-first-result time for explicit coordinates")
+    startup.add_argument("--runs", type=int, default=5)
+
+    corpus_options = argparse.ArgumentParser(add_help=False)
+    corpus_options.add_argument("--seed", type=int, default=0)
+    corpus_options.add_argument("--profiles", nargs="+", choices=list(CORPUS_PROFILES),
+                                help="Corpus profiles to use (default: all)")
+    corpus = subparsers.add_parser("corpus", parents=[corpus_options],
+                                   help="Write the synthetic corpus and a manifest.json of configs")
+    corpus.add_argument("directory")
+    latency = subparsers.add_parser("latency", parents=[common, corpus_options],
+                                    help="Per-stage single-document latency for each corpus profile")
+    latency.add_argument("--runs", type=int, default=3)
+    latency.add_argument("--engine", default="pdfplumber", choices=["pdfplumber", "pymupdf"])
+    throughput = subparsers.add_parser("throughput", parents=[common, corpus_options],
+                                       help="process_documents batch throughput over the corpus")
+    throughput.add_argument("--copies", type=int, default=4, help="Times each corpus document appears in the batch")
+    throughput.add_argument("--max-workers", type=int, nargs="+", default=[0],
+                            help="Worker counts to run; 0 processes sequentially")
+    throughput.add_argument("--engine", default="pdfplumber", choices=["pdfplumber", "pymupdf"])
+    memory = subparsers.add_parser("memory", parents=[common],
+                                   help="Peak RSS of one large document with and without low-memory mode")
+    memory.add_argument("--pages", type=int, default=1000)
+    memory.add_argument("--engines", nargs="+", default=["pdfplumber", "pymupdf"], choices=["pdfplumber", "pymupdf"])
+    memory.add_argument("--seed", type=int, default=0)
+    compare = subparsers.add_parser("compare", parents=[common],
+                                    help="Fail when timings regressed between two result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.benchmark == "corpus":
+        print(json.dumps(generate_corpus(os.path.abspath(args.directory), args.seed, args.profiles), indent=2))
+        return 0
+
+    results = {"benchmark": args.benchmark, "python": sys.version.split()[0], "commit": git_commit()}
+    passed = True
+    if args.benchmark == "startup":
+        results["startup"] = bench_startup(args.runs)
+        passed = results["startup"]["within_budget"]
+    elif args.benchmark == "latency":
+        results.update(engine=args.engine, seed=args.seed)
+        results["latency"] = bench_latency(args.runs, args.engine, args.seed, args.profiles)
+    elif args.benchmark == "throughput":
+        results.update(engine=args.engine, seed=args.seed)
+        results["throughput"] = bench_throughput(args.copies, args.max_workers, args.engine, args.seed, args.profiles)
+    elif args.benchmark == "memory":
+        results["memory"] = bench_memory(args.pages, args.engines, args.seed)
+    elif args.benchmark == "compare":
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        results.update(base_commit=base.get("commit"), new_commit=new.get("commit"), threshold=args.threshold)
+        results["regressions"] = compare_results(base, new, args.threshold)
+        passed = not results["regressions"]
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
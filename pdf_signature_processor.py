@@ -1,19 +1,76 @@
+import io
 import os
+import re
+import itertools
+import sys
+import json
+import time
+import bisect
+import hashlib
+import sqlite3
+import shutil
 import logging
-import fitz  # PyMuPDF
-import pdfplumber
-from PIL import Image
-from typing import List, Dict, Optional, Union
-from dataclasses import dataclass
-from pathlib import Path
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+import threading
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator, List, Dict, Optional, TextIO, Union
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, ProcessPoolExecutor
+    import fitz  # PyMuPDF
+
+# Logging is configured by the entry point (see configure_logging), not at import time
 logger = logging.getLogger(__name__)
 
+# Keyword locator engines accepted in SignatureConfig.engine
+LOCATOR_ENGINES = ("pdfplumber", "pymupdf")
+
+# Output modes accepted in SignatureConfig.save_mode
+SAVE_MODES = ("full", "incremental", "compact")
+
+# SignatureResult.error_code values for documents stopped by a limit rather than by an error in their input
+ERROR_TIMEOUT = "timeout"
+ERROR_MEMORY_LIMIT = "memory_limit"
+ERROR_WORKER_CRASHED = "worker_crashed"
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Configure logging for command line use. Log records go to stderr so that
+    stdout only carries JSON results.
+    
+    Args:
+        level: Minimum level to log
+    """
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+# PyMuPDF, pdfplumber (with pdfminer) and PIL are imported on first use by the code
+# path that needs them, so short jobs do not pay for modules they never touch.
+def _import_fitz():
+    """Import PyMuPDF on first use."""
+    try:
+        import pymupdf as fitz_module
+    except ImportError:
+        import fitz as fitz_module  # PyMuPDF releases before 1.24.3
+    return fitz_module
+
+@dataclass
+class SignaturePlacement:
+    """One signer's image and placement rules, applied together with the others in SignatureConfig.placements."""
+    signature_filename: str
+    keywords: Optional[List[str]] = None
+    signature_position: str = "top"  # Options: "top", "bottom", "left", "right"
+    signature_size: Optional[tuple[float, float]] = None  # None uses the image's natural size
+    skip_non_empty: bool = False
+    x_coord: Optional[float] = None  # Explicit coordinates, used when no keyword is found
+    y_coord: Optional[float] = None
+    page_numbers: Optional[List[int]] = None
+    name: Optional[str] = None  # Label reported in PlacementResult, e.g. "borrower"
+
 @dataclass
 class SignatureConfig:
     working_folder: str
@@ -28,6 +85,59 @@ class SignatureConfig:
     page_numbers: Optional[List[int]] = None
     skip_non_empty: bool = False  # If True, skip matches that have content after the keyword
     signature_position: str = "top"  # Options: "top", "bottom", "left", "right"
+    engine: str = "pdfplumber"  # Keyword locator: "pdfplumber" or "pymupdf" (reuses the open fitz document)
+    save_mode: str = "full"  # Output: "full" (uncompressed rewrite), "incremental" (append changes), "compact"
+    search_pages: Optional[List[Union[int, str]]] = None  # Pages to search: indexes or "start:stop" ranges, negatives count from the end
+    search_region: Optional[tuple[float, float, float, float]] = None  # (x0, y0, x1, y1) as fractions of the page, e.g. (0, 0.67, 1, 1)
+    max_matches_per_keyword: Optional[int] = None  # Stop searching for a keyword after this many placements (1 = first match only)
+    placements: Optional[List[SignaturePlacement]] = None  # Several signers in one open/save; replaces the single signature fields above
+
+@dataclass
+class SignatureAsset:
+    path: Optional[str]  # None for an image given as bytes (sign_bytes)
+    data: bytes  # Original image file bytes, inserted as-is
+    pixel_size: tuple[int, int]
+    dpi: tuple[float, float]
+    point_size: tuple[float, float]  # Natural size in PDF points (pixels * 72 / DPI)
+
+@dataclass
+class DocumentMetrics:
+    """Instrumentation of one document, collected when the processor has collect_metrics=True."""
+    stage_seconds: Dict[str, float] = field(default_factory=dict)  # validate, open, prepare_signature, find_keywords, insert, save, total
+    pages_scanned: int = 0
+    words_extracted: int = 0  # words in the page word indexes built (or reused) for keyword positions
+    matches_found: int = 0  # keyword matches, before skip_non_empty
+    matches_skipped: int = 0  # matches skipped because the field was already filled
+    placements: int = 0
+    output_bytes: int = 0
+    peak_rss_bytes: Optional[int] = None  # process-wide high-water mark after the document; None where unsupported
+
+@dataclass
+class PlacementResult:
+    """Outcome of one SignaturePlacement."""
+    name: Optional[str]
+    signature_filename: str
+    locations: List[tuple[int, float, float]] = field(default_factory=list)  # (page_number, x_coord, y_coord) of each signature placed
+
+@dataclass
+class PlannedSignature:
+    """A signature a dry run would insert."""
+    page_number: int  # Zero-based
+    x: float
+    y: float
+    width: float
+    height: float
+    signature_filename: str
+    name: Optional[str] = None  # SignaturePlacement.name for multi-signer configs
+
+@dataclass
+class SkippedMatch:
+    """A keyword match skipped because its field already has content (skip_non_empty)."""
+    page_number: int  # Zero-based
+    keyword: str
+    x: float  # Position of the keyword word
+    y: float
+    content: str  # Text found after the keyword
 
 @dataclass
 class SignatureResult:
@@ -36,11 +146,801 @@ class SignatureResult:
     output_pdf_path: str
     success: bool
     error_message: Optional[str] = None
+    error_code: Optional[str] = None  # ERROR_TIMEOUT, ERROR_MEMORY_LIMIT or ERROR_WORKER_CRASHED; None for other failures
+    layout_cache: Optional[str] = None  # "hit", "miss", or "partial" (placements both hit and missed) with a layout cache, else None
+    metrics: Optional[DocumentMetrics] = None
+    placements: Optional[List[PlacementResult]] = None  # One per SignaturePlacement when the config has placements
+    cached: bool = False  # True when skip_unchanged found an up-to-date output and did not sign again
+    planned_signatures: Optional[List[PlannedSignature]] = None  # Dry run only
+    skipped_matches: Optional[List[SkippedMatch]] = None  # Dry run only; None when placements came from the layout cache
+
+@dataclass
+class DocumentGroup:
+    """Configs of a batch that read the same input PDF, processed together (see plan_batch)."""
+    pdf_path: str
+    positions: List[int] = field(default_factory=list)  # Indexes of the configs in the batch, ascending
+    configs: List[SignatureConfig] = field(default_factory=list)
+    signature_paths: List[str] = field(default_factory=list)  # Distinct signature images used by the configs
+
+@dataclass
+class BatchStats:
+    """Scheduling figures of a process_documents call, filled in when passed as stats."""
+    documents: int = 0
+    tasks: int = 0  # Units of work the batch was run as (worker tasks when parallel)
+    probe_seconds: float = 0.0  # Reading page counts and file sizes to order the tasks
+    makespan_seconds: float = 0.0  # From the first task started to the last result
+    largest_task_pages: int = 0  # Estimated pages of the largest task, dispatched first
+
+@dataclass
+class _DocumentReport:
+    """Details collected while signing one document, copied onto its SignatureResult."""
+    layout_cache: Optional[str] = None
+    metrics: Optional[DocumentMetrics] = None
+    placements: Optional[List[PlacementResult]] = None
+    skipped_matches: Optional[List[SkippedMatch]] = None  # Collected when not None
+    parsed_pages: Optional["_ParsedPages"] = None  # Text layer shared with the other configs of a group
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to the named stage when metrics are collected."""
+        if self.metrics is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage_seconds = self.metrics.stage_seconds
+            stage_seconds[name] = stage_seconds.get(name, 0.0) + time.perf_counter() - started
+
+    def record_layout_cache(self, status: str) -> None:
+        """Record a layout cache lookup; a document whose placements both hit and missed is "partial"."""
+        self.layout_cache = status if self.layout_cache in (None, status) else "partial"
+
+class MemoryLimitExceeded(MemoryError):
+    """Raised when the process grows past the processor's memory_limit_mb while searching a document."""
+
+def _current_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, falling back to its peak where the current size is not available."""
+    rss = _process_rss_bytes("self")
+    return rss if rss is not None else _peak_rss_bytes()
+
+def _process_rss_bytes(pid: Union[int, str]) -> Optional[int]:
+    """Return the resident set size of a process, or None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident set size of this process, or None where it is not available."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _same_file(path: str, other_path: str) -> bool:
+    """Check whether two paths name the same file."""
+    return os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(other_path))
+
+def _file_digest(path: str) -> str:
+    """Compute the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _file_stat(path: str) -> List[int]:
+    """Get the [size, mtime_ns] used to tell whether a file changed without reading it."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+# Version of the signing record format written next to each output by skip_unchanged
+SIGNING_RECORD_VERSION = 1
+
+def _probe_document(pdf_path: str) -> tuple[int, int]:
+    """
+    Cheaply size a PDF for scheduling: its page count and file size.
+    
+    PyMuPDF only reads the cross-reference table and trailer to open a document and
+    takes the count from the page tree root, so no page is parsed.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        Tuple of (page_count, file_size); (0, 0) for a file that cannot be opened
+    """
+    try:
+        fitz = _import_fitz()
+        with fitz.open(pdf_path) as document:
+            return document.page_count, os.path.getsize(pdf_path)
+    except Exception as e:
+        logger.debug(f"Could not probe {pdf_path}: {str(e)}")
+        return 0, 0
+
+def _partial_path(path: str, pid: Optional[int] = None, stage: str = "") -> str:
+    """
+    Get the temporary file a process writes before moving it to path with os.replace.
+    
+    The name carries the writing process id, so the supervisor of a killed worker can
+    remove what the worker left behind (see _remove_partial_outputs).
+    
+    Args:
+        path: Final path of the file
+        pid: Writing process; None for this process
+        stage: Distinguishes several temporary files of the same path
+        
+    Returns:
+        str: Path of the temporary file, in the same directory as path
+    """
+    return f"{path}.{pid if pid is not None else os.getpid()}{stage}.tmp"
+
+def _remove_partial_outputs(output_path: str, pid: int) -> None:
+    """Remove the temporary files a killed worker process may have left for an output."""
+    for partial_path in (_partial_path(output_path, pid), _partial_path(output_path, pid, ".full"),
+                         _partial_path(_signing_record_path(output_path), pid)):
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+
+def _signed_output_path(config: SignatureConfig) -> str:
+    """Get the path the signed PDF is written to: output_path, or signed_<name> next to the input."""
+    output_filename = f"signed_{config.input_pdf_filename}"
+    return config.output_path or os.path.join(config.working_folder, output_filename)
+
+def _signing_record_path(output_path: str) -> str:
+    """Get the path of the signing record kept next to a signed PDF."""
+    return f"{output_path}.signing.json"
+
+def _parse_page_spec(spec: Union[int, str]) -> Union[int, slice]:
+    """
+    Parse one search_pages entry: a page index, or a "start:stop" range in Python
+    slice notation. Negative values count from the end ("-2:" is the last two pages).
+    
+    Args:
+        spec: Entry from SignatureConfig.search_pages
+        
+    Returns:
+        The page index or slice
+    """
+    if isinstance(spec, int):
+        return spec
+    text = str(spec).strip()
+    if ':' not in text:
+        return int(text)
+    start, stop = text.split(':', 1)
+    return slice(int(start) if start.strip() else None, int(stop) if stop.strip() else None)
+
+def _resolve_search_pages(search_pages: Optional[List[Union[int, str]]], page_count: int) -> List[int]:
+    """
+    Resolve SignatureConfig.search_pages against the document's page count.
+    
+    Args:
+        search_pages: Page indexes and ranges, or None for every page
+        page_count: Number of pages in the document
+        
+    Returns:
+        Sorted list of distinct zero-based page numbers that exist in the document
+    """
+    if search_pages is None:
+        return list(range(page_count))
+    
+    selected = set()
+    for spec in search_pages:
+        page = _parse_page_spec(spec)
+        if isinstance(page, slice):
+            selected.update(range(page_count)[page])
+        elif -page_count <= page < page_count:
+            selected.add(page % page_count)
+    return sorted(selected)
+
+def _load_signature_asset(path: str) -> SignatureAsset:
+    """
+    Read a signature image and compute its natural size in PDF points.
+    
+    Args:
+        path: Path to the signature image
+        
+    Returns:
+        SignatureAsset: Image bytes and size information
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    return _signature_asset_from_bytes(data, path)
+
+def _signature_asset_from_bytes(data: bytes, path: Optional[str]) -> SignatureAsset:
+    """
+    Compute the natural size in PDF points of signature image bytes.
+    
+    Args:
+        data: Encoded PNG or JPEG image
+        path: File the image was read from, or None for an image given as bytes
+        
+    Returns:
+        SignatureAsset: Image bytes and size information
+    """
+    from PIL import Image
+    
+    with Image.open(io.BytesIO(data)) as sig_img:
+        img_width_px, img_height_px = sig_img.size
+        # Get DPI - default to 72 if not available (PDF standard)
+        dpi = getattr(sig_img, 'info', {}).get('dpi', (72, 72))
+        if isinstance(dpi, tuple):
+            dpi_x, dpi_y = dpi
+        else:
+            dpi_x = dpi_y = dpi
+    
+    # Convert pixels to points (1 point = 1/72 inch)
+    img_width_points = (img_width_px * 72) / dpi_x
+    img_height_points = (img_height_px * 72) / dpi_y
+    return SignatureAsset(
+        path=path,
+        data=data,
+        pixel_size=(img_width_px, img_height_px),
+        dpi=(dpi_x, dpi_y),
+        point_size=(img_width_points, img_height_points)
+    )
+
+class _SignatureAssetCache:
+    """
+    Process-wide LRU cache of signature images, so an image shared by many documents
+    is read and measured once. Entries are revalidated against the file's
+    modification time and size on every lookup.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple[int, int], SignatureAsset]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> SignatureAsset:
+        """
+        Get the asset for an image file, loading it if it is not cached or has changed.
+        
+        Args:
+            path: Path to the signature image
+            
+        Returns:
+            SignatureAsset: The cached or freshly loaded asset
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+        
+        asset = _load_signature_asset(path)
+        with self._lock:
+            self._entries[key] = (stamp, asset)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return asset
+
+    def clear(self) -> None:
+        """Drop all cached assets."""
+        with self._lock:
+            self._entries.clear()
+
+# Signature images shared by all processors in this process
+signature_asset_cache = _SignatureAssetCache()
+
+class _ParsedPages:
+    """
+    Text layer of one input PDF, shared by the configs of a DocumentGroup so the file is
+    parsed once. A page selection is stored once it has been searched to the end, and
+    everything is dropped when the file changes on disk (e.g. after in-place signing).
+    
+    Each page is a [page_number, page_text, word_index] entry; the word index of a
+    pdfplumber page is None until a config needs it, unless build_indexes is set because
+    several placements will search the same pages for different keywords.
+    """
+
+    def __init__(self, build_indexes: bool = False):
+        self.build_indexes = build_indexes
+        self._stamp: Optional[tuple[str, int, int]] = None
+        self._selections: Dict[tuple, List[list]] = {}
+
+    def _current_stamp(self, pdf_path: str) -> tuple[str, int, int]:
+        stat = os.stat(pdf_path)
+        return (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+
+    def _selection_key(self, config: SignatureConfig) -> tuple:
+        region = tuple(config.search_region) if config.search_region is not None else None
+        return (config.engine, tuple(config.search_pages or ()), region)
+
+    def get(self, pdf_path: str, config: SignatureConfig) -> Optional[List[list]]:
+        """
+        Get the pages a config searches, if they were parsed for an earlier config.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            config: SignatureConfig object selecting the engine and search hints
+            
+        Returns:
+            List of [page_number, page_text, word_index] entries, or None if not parsed yet
+        """
+        stamp = self._current_stamp(pdf_path)
+        if stamp != self._stamp:
+            self._selections.clear()
+            self._stamp = stamp
+        return self._selections.get(self._selection_key(config))
+
+    def put(self, pdf_path: str, config: SignatureConfig, pages: List[list]) -> None:
+        """Store the pages parsed for a config, unless the file changed meanwhile."""
+        if self._current_stamp(pdf_path) == self._stamp:
+            self._selections[self._selection_key(config)] = pages
+
+# Guards PyMuPDF's process-wide small glyph heights setting during word extraction
+_glyph_height_lock = threading.Lock()
+
+# Serializes documents that asign runs in caller-supplied threads, as PyMuPDF is not thread-safe
+_fitz_thread_lock = threading.Lock()
+
+class LayoutCache:
+    """
+    On-disk cache of keyword placements, so documents built from a template that
+    has been seen before skip text extraction and keyword matching entirely.
+    
+    Entries are stored in a SQLite file that several processes can share, and the
+    least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        """
+        Open (or create) the cache.
+        
+        Args:
+            path: Path to the SQLite cache file
+            max_entries: Maximum number of cached layouts
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be shared with forked worker processes
+        if self._connection is None or self._connection_pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS layouts ("
+                "key TEXT PRIMARY KEY, locations TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS layouts_last_used ON layouts (last_used)")
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[List[tuple[int, float, float]]]:
+        """
+        Look up the placements stored for a key and mark them as recently used.
+        
+        Args:
+            key: Cache key from layout_cache_key
+            
+        Returns:
+            List of (page_number, x_coord, y_coord), or None on a miss
+        """
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT locations FROM layouts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE layouts SET last_used = ? WHERE key = ?", (time.time(), key))
+            connection.commit()
+        return [tuple(location) for location in json.loads(row[0])]
+
+    def put(self, key: str, locations: List[tuple[int, float, float]]) -> None:
+        """
+        Store the placements for a key, evicting the least recently used entries.
+        
+        Args:
+            key: Cache key from layout_cache_key
+            locations: List of (page_number, x_coord, y_coord)
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO layouts (key, locations, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(locations), time.time())
+            )
+            connection.execute(
+                "DELETE FROM layouts WHERE key IN "
+                "(SELECT key FROM layouts ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            connection.commit()
+
+    def close(self) -> None:
+        """Close the connection owned by this process."""
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+def layout_cache_key(pdf_document: "fitz.Document", config: SignatureConfig,
+                     signature_size: tuple[float, float]) -> str:
+    """
+    Build the layout cache key of a document for a config.
+    
+    The page part is a hash of the geometry of the pages that would be searched and
+    of every object they reference: content streams, and resources such as Form
+    XObjects and fonts, followed recursively (text drawn through an XObject leaves
+    the page's own content stream unchanged), including resources a page inherits
+    from the page tree. This is cheap to read compared with
+    text extraction and changes whenever the text on those pages changes (e.g. a
+    filled-in field).
+    
+    Args:
+        pdf_document: Open fitz document
+        config: SignatureConfig object containing the keywords and placement options
+        signature_size: Signature (width, height) in points used for positioning
+        
+    Returns:
+        str: Hex digest identifying the layout
+    """
+    digest = hashlib.sha256()
+    placement_options = {
+        'keywords': config.keywords,
+        'signature_position': config.signature_position,
+        'skip_non_empty': config.skip_non_empty,
+        'signature_size': list(signature_size),
+        'engine': config.engine,
+        'search_pages': config.search_pages,
+        'search_region': config.search_region,
+        'max_matches_per_keyword': config.max_matches_per_keyword,
+        'page_count': pdf_document.page_count,
+    }
+    digest.update(json.dumps(placement_options, sort_keys=True, default=str).encode('utf-8'))
+    
+    hashed_xrefs: set = set()
+    for page_num in _resolve_search_pages(config.search_pages, pdf_document.page_count):
+        page = pdf_document[page_num]
+        digest.update(repr((page_num, tuple(page.rect), page.rotation)).encode('utf-8'))
+        _hash_object_tree(pdf_document, page.xref, digest, hashed_xrefs)
+        _hash_inherited_resources(pdf_document, page.xref, digest, hashed_xrefs)
+    return digest.hexdigest()
+
+# Indirect references in an object's source, except back references to the page tree (/Parent)
+# and to an annotation's page (/P), which would pull in the whole document
+_OBJECT_REFERENCE = re.compile(r"(?<!/Parent )(?<!/P )\b(\d+) 0 R\b")
+
+def _hash_object_tree(pdf_document: "fitz.Document", xref: int, digest, hashed_xrefs: set) -> None:
+    """
+    Add an object and everything it references to a digest, each object once.
+    
+    Args:
+        pdf_document: Open fitz document
+        xref: Object to start from, e.g. a page
+        digest: hashlib object to update
+        hashed_xrefs: Objects already added, shared across the pages of one key
+    """
+    pending = [xref]
+    while pending:
+        current = pending.pop()
+        if current in hashed_xrefs or not 0 < current < pdf_document.xref_length():
+            continue
+        hashed_xrefs.add(current)
+        source = pdf_document.xref_object(current, compressed=True)
+        digest.update(f"{current}:{source}".encode('utf-8'))
+        if pdf_document.xref_is_stream(current):
+            digest.update(pdf_document.xref_stream_raw(current) or b"")
+        pending.extend(int(reference) for reference in _OBJECT_REFERENCE.findall(source))
+
+def _hash_inherited_resources(pdf_document: "fitz.Document", page_xref: int, digest, hashed_xrefs: set) -> None:
+    """
+    Add the /Resources a page inherits from its page tree, when it has none of its own.
+    
+    The page tree is not followed by _hash_object_tree (/Parent is skipped), so the
+    nearest ancestor holding /Resources is looked up here.
+    
+    Args:
+        pdf_document: Open fitz document
+        page_xref: Page object
+        digest: hashlib object to update
+        hashed_xrefs: Objects already added, shared across the pages of one key
+    """
+    node, visited = page_xref, set()
+    while node and node not in visited:
+        visited.add(node)
+        kind, value = pdf_document.xref_get_key(node, "Resources")
+        if kind != "null":
+            if node != page_xref:
+                digest.update(f"inherited {node}:{value}".encode('utf-8'))
+                for reference in _OBJECT_REFERENCE.findall(value):
+                    _hash_object_tree(pdf_document, int(reference), digest, hashed_xrefs)
+            return
+        kind, value = pdf_document.xref_get_key(node, "Parent")
+        node = int(value.split()[0]) if kind == "xref" else 0
+
+def _group_words_into_lines(words: List[dict], tolerance: float = 3) -> List[List[dict]]:
+    """
+    Cluster words into text lines by their top coordinate, like pdfplumber's extract_text.
+    
+    Args:
+        words: Word dictionaries with x0 and top keys
+        tolerance: Maximum vertical gap between consecutive tops in one line
+        
+    Returns:
+        List of lines, top to bottom, each sorted left to right
+    """
+    lines = []
+    last_top = None
+    for word in sorted(words, key=lambda w: w['top']):
+        if last_top is None or word['top'] - last_top > tolerance:
+            lines.append([])
+        lines[-1].append(word)
+        last_top = word['top']
+    
+    for line in lines:
+        line.sort(key=lambda w: w['x0'])
+    return lines
+
+class _PageWordIndex:
+    """
+    Words of one page indexed once, so every keyword check on the page is a lookup
+    instead of a fresh extract_words() call and a scan of all words.
+    """
+
+    def __init__(self, words: List[dict]):
+        """
+        Build the index.
+        
+        Args:
+            words: Word dictionaries (text, x0, x1, top, bottom) in reading order
+        """
+        self.words = words
+        self.lowered = [w['text'].lower() for w in words]
+        
+        # Word positions sorted by top, for same-line range queries
+        self._by_top = sorted(range(len(words)), key=lambda i: words[i]['top'])
+        self._tops = [words[i]['top'] for i in self._by_top]
+        self._same_line_cache: Dict[tuple[float, float], List[int]] = {}
+        self._first_containing_cache: Dict[str, Optional[dict]] = {}
+
+    def same_line(self, top: float, tolerance: float) -> List[int]:
+        """
+        Get the positions of the words whose top is within tolerance of top.
+        
+        Args:
+            top: Top coordinate of the reference word
+            tolerance: Maximum vertical distance in points
+            
+        Returns:
+            List of word positions sorted by x0
+        """
+        key = (top, tolerance)
+        if key not in self._same_line_cache:
+            start = bisect.bisect_left(self._tops, top - tolerance)
+            end = bisect.bisect_right(self._tops, top + tolerance)
+            self._same_line_cache[key] = sorted(self._by_top[start:end], key=lambda i: self.words[i]['x0'])
+        return self._same_line_cache[key]
+
+    def first_containing(self, fragment: str) -> Optional[dict]:
+        """
+        Get the first word in reading order whose lowercased text contains fragment.
+        
+        Args:
+            fragment: Lowercase text to look for
+            
+        Returns:
+            The word dictionary, or None if no word contains the fragment
+        """
+        if fragment not in self._first_containing_cache:
+            self._first_containing_cache[fragment] = next(
+                (self.words[i] for i, text in enumerate(self.lowered) if fragment in text), None
+            )
+        return self._first_containing_cache[fragment]
+
+class _AhoCorasick:
+    """Aho-Corasick automaton reporting which of a fixed set of substrings occur in a text."""
+
+    def __init__(self, patterns: List[str]):
+        """
+        Build the automaton.
+        
+        Args:
+            patterns: Non-empty strings to search for; a pattern's id is its list position
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(pattern_id)
+        
+        # Breadth-first pass to link each node to its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0) if node else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> set:
+        """
+        Get the ids of all patterns that occur in text.
+        
+        Args:
+            text: Text to scan
+            
+        Returns:
+            Set of pattern ids
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+class _KeywordMatcher:
+    """
+    Single-line keywords compiled into one automaton, so a page's text and words are
+    scanned once for all keywords instead of once per keyword.
+    
+    Matching keeps the original semantics: a keyword must occur in the page text, and
+    an occurrence starts at a word containing the keyword's first token with each
+    following word containing the next token (case-insensitive substring tests).
+    """
+
+    def __init__(self, keywords: List[str]):
+        """
+        Compile the keywords.
+        
+        Args:
+            keywords: Keyword list from the config; multiline and blank keywords are ignored
+        """
+        self.keywords = [k for k in keywords if '\n' not in k and k.strip()]
+        
+        pattern_ids: Dict[str, int] = {}
+        self._phrase_ids = [pattern_ids.setdefault(k.lower(), len(pattern_ids)) for k in self.keywords]
+        self._token_ids = [
+            [pattern_ids.setdefault(token, len(pattern_ids)) for token in k.lower().split()]
+            for k in self.keywords
+        ]
+        self._automaton = _AhoCorasick(list(pattern_ids))
+
+    def find_matches(self, text: str, get_index: Callable[[], "_PageWordIndex"]) -> List[tuple[str, int]]:
+        """
+        Find every occurrence of every keyword on a page.
+        
+        Args:
+            text: Extracted text of the page
+            get_index: Callable returning the page's _PageWordIndex
+            
+        Returns:
+            List of (keyword, word_position) ordered by keyword, then by position
+        """
+        present = self._automaton.find(text.lower())
+        keywords_by_first_token: Dict[int, List[int]] = {}
+        for k, phrase_id in enumerate(self._phrase_ids):
+            if phrase_id in present:
+                keywords_by_first_token.setdefault(self._token_ids[k][0], []).append(k)
+        if not keywords_by_first_token:
+            return []
+        
+        index = get_index()
+        tokens_in_word = [self._automaton.find(text) for text in index.lowered]
+        
+        matches = []
+        for position, tokens in enumerate(tokens_in_word):
+            for first_token in tokens.intersection(keywords_by_first_token):
+                for k in keywords_by_first_token[first_token]:
+                    following = self._token_ids[k][1:]
+                    if all(position + j < len(tokens_in_word) and token in tokens_in_word[position + j]
+                           for j, token in enumerate(following, 1)):
+                        matches.append((k, position))
+        
+        matches.sort()
+        return [(self.keywords[k], position) for k, position in matches]
+
+@lru_cache(maxsize=64)
+def _compile_keyword_matcher(keywords: tuple[str, ...]) -> _KeywordMatcher:
+    """Compile a keyword list once and share it across the pages and configs of a batch."""
+    return _KeywordMatcher(list(keywords))
 
 class PDFSignatureProcessor:
-    def __init__(self):
-        """Initialize the PDF Signature Processor."""
+    def __init__(self, layout_cache_path: Optional[str] = None, layout_cache_max_entries: int = 10000,
+                 collect_metrics: bool = False, low_memory: bool = False, memory_limit_mb: Optional[float] = None,
+                 dry_run: bool = False, skip_unchanged: bool = False, document_timeout: Optional[float] = None,
+                 shard_min_pages: Optional[int] = None, shard_workers: Optional[int] = None,
+                 save_guard: Optional[Callable[[SignatureConfig], bool]] = None):
+        """
+        Initialize the PDF Signature Processor.
+        
+        Args:
+            layout_cache_path: SQLite file for the template layout cache; None disables it
+            layout_cache_max_entries: Maximum number of layouts kept in the cache
+            collect_metrics: Record per-stage timings and counters on each SignatureResult
+            low_memory: Also drop pdfminer's parsed-object cache after every searched page,
+                so memory stays bounded by one page for very large documents (the
+                "pymupdf" engine already works page by page)
+            memory_limit_mb: Fail a document when the process grows past this many MB
+                while searching it (checked after every page); None disables the check
+            dry_run: Only validate and locate: results list the planned signatures and
+                skipped matches, and no PDF is written
+            skip_unchanged: Record the digests of each document's inputs next to its output,
+                and skip documents whose PDF, signature images and config are unchanged
+                and whose output is still in place (the result has cached=True)
+            document_timeout: Seconds a document may take in process_documents and
+                iter_process_documents. When set, documents run in supervised worker
+                processes: one that overruns (or, with memory_limit_mb, grows past the
+                limit) is killed and reported with error_code ERROR_TIMEOUT (or
+                ERROR_MEMORY_LIMIT), and the batch continues in a new worker
+            shard_min_pages: Search documents with at least this many pages to search in
+                page ranges on several worker processes; None always searches in one pass
+            shard_workers: Number of processes searching the shards of one document;
+                None uses the CPU count
+            save_guard: Called with the config right before a signed document is written;
+                when it returns False the document fails without writing anything (drain_queue
+                uses it to check that the job's lease is still held). Must be picklable to
+                reach worker processes
+        """
         logger.info("Initializing PDF Signature Processor")
+        self.layout_cache = LayoutCache(layout_cache_path, layout_cache_max_entries) if layout_cache_path else None
+        self.collect_metrics = collect_metrics
+        self.low_memory = low_memory
+        self.memory_limit_mb = memory_limit_mb
+        self.dry_run = dry_run
+        self.skip_unchanged = skip_unchanged
+        self.document_timeout = document_timeout
+        self.shard_min_pages = shard_min_pages
+        self.shard_workers = shard_workers
+        self.save_guard = save_guard
+        # Arguments to build an equivalent processor in worker processes
+        self._worker_options = {
+            'layout_cache_path': layout_cache_path,
+            'layout_cache_max_entries': layout_cache_max_entries,
+            'collect_metrics': collect_metrics,
+            'low_memory': low_memory,
+            'memory_limit_mb': memory_limit_mb,
+            'dry_run': dry_run,
+            'skip_unchanged': skip_unchanged,
+            'document_timeout': document_timeout,
+            'shard_min_pages': shard_min_pages,
+            'shard_workers': shard_workers,
+            'save_guard': save_guard,
+        }
+        # Worker processes of asign when the caller supplies no executor, started on first use
+        self._async_executor: Optional["ProcessPoolExecutor"] = None
+        # Killable workers of asign calls with a timeout, kept between calls
+        self._idle_async_workers: List["_SupervisedWorker"] = []
+        # Batch worker pool kept between process_documents calls by keep_workers
+        self._kept_workers: Optional[int] = None
+        self._kept_pool: Optional["ProcessPoolExecutor"] = None
 
     def _validate_input(self, config: SignatureConfig) -> bool:
         """
@@ -55,29 +955,113 @@ class PDFSignatureProcessor:
         try:
             # Build full paths
             pdf_path = os.path.join(config.working_folder, config.input_pdf_filename)
-            signature_image_path = os.path.join(config.working_folder, config.signature_filename)
             
             if not os.path.exists(pdf_path):
                 raise ValueError(f"PDF file not found:: {pdf_path}")
             
-            if not os.path.exists(signature_image_path):
-                raise ValueError(f"Signature image not found: {signature_image_path}")
-            
             # Validate file extensions
             if not config.input_pdf_filename.lower().endswith('.pdf'):
                 raise ValueError(f"Invalid PDF file: {config.input_pdf_filename}")
             
-            if not any(config.signature_filename.lower().endswith(ext) 
-                      for ext in ['.png', '.jpg', '.jpeg']):
-                raise ValueError(f"Invalid signature image format: {config.signature_filename}")
+            if config.placements is not None and not config.placements:
+                raise ValueError("placements must not be empty")
             
+            # Every signer's image must be usable before the document is touched
+            for placement_config in self._placement_configs(config):
+                signature_image_path = os.path.join(config.working_folder, placement_config.signature_filename)
+                if not os.path.exists(signature_image_path):
+                    raise ValueError(f"Signature image not found: {signature_image_path}")
+                
+                if not any(placement_config.signature_filename.lower().endswith(ext) 
+                          for ext in ['.png', '.jpg', '.jpeg']):
+                    raise ValueError(f"Invalid signature image format: {placement_config.signature_filename}")
+                
+                self._validate_options(placement_config)
             return True
             
         except Exception as e:
             logger.error(f"Validation error: {str(e)}")
             return False
 
-    def _find_keyword_locations(self, pdf_path: str, keywords: List[str], config: SignatureConfig) -> List[tuple[int, float, float]]:
+    def _placement_configs(self, config: SignatureConfig) -> List[SignatureConfig]:
+        """
+        Expand a config into one single-signer config per placement.
+        
+        Each placement config keeps the document-level options (engine, save mode,
+        search hints) and takes the signature image and placement rules of its
+        SignaturePlacement. A config without placements is its own single placement.
+        
+        Args:
+            config: SignatureConfig object
+            
+        Returns:
+            List of SignatureConfig objects, in placement order
+        """
+        if not config.placements:
+            return [config]
+        return [
+            replace(config, signature_filename=placement.signature_filename, keywords=placement.keywords,
+                    signature_position=placement.signature_position, signature_size=placement.signature_size,
+                    skip_non_empty=placement.skip_non_empty, x_coord=placement.x_coord, y_coord=placement.y_coord,
+                    page_numbers=placement.page_numbers, placements=None)
+            for placement in config.placements
+        ]
+
+    def _share_parsed_pages(self, config: SignatureConfig, report: _DocumentReport) -> None:
+        """
+        Let the placements of a multi-signer document share one parse of its pages.
+        
+        Each placement searches the same pages for its own keywords, so the text layer
+        and word indexes are kept for the document (or its DocumentGroup) instead of
+        being extracted again per placement. This also applies in low_memory mode,
+        where the cache lives only as long as the document.
+        
+        Args:
+            config: SignatureConfig object
+            report: Per-document report holding the shared parsed pages
+        """
+        if not config.placements or len(config.placements) < 2:
+            return
+        if report.parsed_pages is None:
+            report.parsed_pages = _ParsedPages()
+        report.parsed_pages.build_indexes = True
+
+    def _validate_options(self, config: SignatureConfig) -> None:
+        """
+        Validate the options that do not refer to files.
+        
+        Args:
+            config: SignatureConfig object containing the options
+            
+        Raises:
+            ValueError: If an option is invalid
+        """
+        if config.engine not in LOCATOR_ENGINES:
+            raise ValueError(f"Invalid locator engine: {config.engine}")
+        
+        if config.save_mode not in SAVE_MODES:
+            raise ValueError(f"Invalid save mode: {config.save_mode}")
+        
+        # Validate search hints
+        for spec in config.search_pages or []:
+            try:
+                _parse_page_spec(spec)
+            except ValueError:
+                raise ValueError(f"Invalid search page: {spec}")
+        
+        if config.search_region is not None:
+            x0, y0, x1, y1 = config.search_region
+            if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+                raise ValueError(f"Invalid search region (fractions of the page expected): {config.search_region}")
+        
+        if config.max_matches_per_keyword is not None and config.max_matches_per_keyword < 1:
+            raise ValueError(f"Invalid max_matches_per_keyword: {config.max_matches_per_keyword}")
+
+    def _find_keyword_locations(self, pdf_path: str, keywords: List[str], config: SignatureConfig,
+                                pdf_document: Optional["fitz.Document"] = None,
+                                metrics: Optional[DocumentMetrics] = None,
+                                skipped: Optional[List[SkippedMatch]] = None,
+                                parsed_pages: Optional[_ParsedPages] = None) -> List[tuple[int, float, float]]:
         """
         Find the locations of keywords in the PDF and calculate signature placement.
         
@@ -85,234 +1069,667 @@ class PDFSignatureProcessor:
             pdf_path: Path to the PDF file
             keywords: List of keywords to search for
             config: SignatureConfig object containing placement preferences
+            pdf_document: Already-open fitz document; the "pymupdf" engine searches it
+                directly instead of parsing the file a second time
+            metrics: Receives page, word and match counts when given
+            skipped: Receives the matches skipped by skip_non_empty when given
+            parsed_pages: Text layer shared with the other configs of a group, if any
             
         Returns:
             List of tuples containing (page_number, x_coord, y_coord)
         """
-        locations = []
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if text:
-                        logger.info(f"Page {page_num + 1} text preview: {text[:200]}...")
-                        
-                        # Search for keywords in the full text of the page
-                        for keyword in keywords:
-                            # Handle multiline keywords (like "By:\nName:")
-                            if '\n' in keyword:
-                                # Split the keyword into parts
-                                keyword_parts = keyword.split('\n')
-                                if len(keyword_parts) == 2:
-                                    first_part = keyword_parts[0].strip()  # "By:"
-                                    second_part = keyword_parts[1].strip()  # "Name:"
-                                    
-                                    # Split the page text into lines
-                                    lines = text.split('\n')
-                                    logger.info(f"Page {page_num + 1} has {len(lines)} lines")
-                                    
-                                    # Look for consecutive lines that match the pattern
-                                    for i in range(len(lines) - 1):
-                                        current_line = lines[i].strip()
-                                        next_line = lines[i + 1].strip()
-                                        
-                                        logger.info(f"Checking line {i}: '{current_line}' and line {i+1}: '{next_line}'")
-                                        
-                                        # Check if we have a "By:" line followed by a "Name:" line
-                                        if ("by:" in current_line.lower() and "name:" in next_line.lower()):
-                                            logger.info(f"Found By:/Name: pattern at lines {i} and {i+1}")
-                                            
-                                            # Check if "By:" line is blank (only contains "By:" and optional whitespace)
-                                            by_content = current_line.lower().replace("by:", "").strip()
-                                            name_content = next_line.lower().replace("name:", "").strip()
-                                            
-                                            logger.info(f"By: content: '{by_content}', Name: content: '{name_content}'")
-                                            
-                                            # Apply skip_non_empty logic if enabled
-                                            should_skip = False
-                                            if config.skip_non_empty:
-                                                if by_content != "" or name_content != "":
-                                                    should_skip = True
-                                                    logger.info(f"Skipping due to skip_non_empty=True - By: or Name: has content")
-                                            
-                                            # Only proceed if we're not skipping due to content
-                                            if not should_skip:
-                                                logger.info("Processing this By:/Name: pattern - looking for word positions")
-                                                
-                                                # Find the position of "By:" in the PDF words
-                                                words = page.extract_words()
-                                                for word in words:
-                                                    if "by:" in word['text'].lower():
-                                                        logger.info(f"Found 'By:' word at ({word['x0']}, {word['top']}): '{word['text']}'")
-                                                        
-                                                        # Get signature size for positioning calculation
-                                                        if config.signature_size is not None:
-                                                            actual_signature_size = config.signature_size
-                                                        else:
-                                                            # For positioning, calculate proper PDF points from image
-                                                            signature_image_path = os.path.join(config.working_folder, config.signature_filename)
-                                                            with Image.open(signature_image_path) as sig_img:
-                                                                img_width_px, img_height_px = sig_img.size
-                                                                # Get DPI - default to 72 if not available
-                                                                dpi = getattr(sig_img, 'info', {}).get('dpi', (72, 72))
-                                                                if isinstance(dpi, tuple):
-                                                                    dpi_x, dpi_y = dpi
-                                                                else:
-                                                                    dpi_x = dpi_y = dpi
-                                                                # Convert to PDF points
-                                                                img_width_points = (img_width_px * 72) / dpi_x
-                                                                img_height_points = (img_height_px * 72) / dpi_y
-                                                                actual_signature_size = (img_width_points, img_height_points)
-                                                        
-                                                        # Calculate signature position based on config
-                                                        signature_x, signature_y = self._calculate_signature_position(
-                                                            word, actual_signature_size, config.signature_position
-                                                        )
-                                                        
-                                                        locations.append((
-                                                            page_num,
-                                                            signature_x,
-                                                            signature_y
-                                                        ))
-                                                        logger.info(f"Added signature location at ({signature_x}, {signature_y}) - position: {config.signature_position}")
-                                                        break
-                                            else:
-                                                logger.info(f"Skipping - By='{by_content}', Name='{name_content}' (skip_non_empty={config.skip_non_empty})")
-                            else:
-                                # Single line keyword - find all occurrences
-                                if keyword.lower() in text.lower():
-                                    words = page.extract_words()
-                                    keyword_words = keyword.lower().split()
-                                    
-                                    # Split the page text into lines for checking content
-                                    lines = text.split('\n')
-                                    
-                                    # Look for ALL occurrences of the keyword phrase
-                                    for i, word in enumerate(words):
-                                        if keyword_words[0] in word['text'].lower():
-                                            # Check if this is the start of our keyword phrase
-                                            match_found = True
-                                            if len(keyword_words) > 1:
-                                                # For multi-word keywords, check subsequent words
-                                                for j, kw in enumerate(keyword_words[1:], 1):
-                                                    if (i + j < len(words) and 
-                                                        kw in words[i + j]['text'].lower()):
-                                                        continue
-                                                    else:
-                                                        match_found = False
-                                                        break
-                                            
-                                            if match_found:
-                                                # Apply skip_non_empty logic for single keywords
-                                                should_skip = False
-                                                if config.skip_non_empty:
-                                                    # Find the next word horizontally after this keyword to check for content
-                                                    word_y = word['top']
-                                                    word_x_end = word['x1']  # Right edge of the current word
-                                                    
-                                                    # Get all words on the same line (within 5 pixels vertically)
-                                                    all_words = page.extract_words()
-                                                    same_line_words = []
-                                                    for w in all_words:
-                                                        if abs(w['top'] - word_y) <= 5:  # Same line tolerance
-                                                            same_line_words.append(w)
-                                                    
-                                                    # Sort by horizontal position
-                                                    same_line_words.sort(key=lambda w: w['x0'])
-                                                    
-                                                    # Find words that come immediately after this keyword word
-                                                    content_after_keyword = []
-                                                    for w in same_line_words:
-                                                        if w['x0'] > word_x_end:  # Word is to the right of current keyword
-                                                            # Check if this word is close enough to be considered part of the same field
-                                                            # (within reasonable distance, but stop at the next "By:" if present)
-                                                            if w['text'].lower().strip() == 'by:':
-                                                                # Stop if we encounter another "By:" field
-                                                                break
-                                                            elif w['x0'] - word_x_end <= 100:  # Within 100 pixels (reasonable gap)
-                                                                content_after_keyword.append(w['text'])
-                                                            else:
-                                                                # Large gap, probably end of this field
-                                                                break
-                                                    
-                                                    # Check if there's meaningful content after the keyword
-                                                    content_text = ' '.join(content_after_keyword).strip()
-                                                    if content_text and content_text.lower() not in ['', 'by:', 'name:']:
-                                                        should_skip = True
-                                                        logger.info(f"Skipping '{keyword}' at ({word['x0']}, {word['top']}) due to skip_non_empty=True")
-                                                        logger.info(f"Content after keyword: '{content_text}'")
-                                                    else:
-                                                        logger.info(f"No content after '{keyword}' at ({word['x0']}, {word['top']}) - will place signature")
-                                                        logger.info(f"Content found: '{content_text}'")
-                                                
-                                                if not should_skip:
-                                                    # Get signature size for positioning calculation
-                                                    if config.signature_size is not None:
-                                                        actual_signature_size = config.signature_size
-                                                    else:
-                                                        # For positioning, calculate proper PDF points from image
-                                                        signature_image_path = os.path.join(config.working_folder, config.signature_filename)
-                                                        with Image.open(signature_image_path) as sig_img:
-                                                            img_width_px, img_height_px = sig_img.size
-                                                            # Get DPI - default to 72 if not available
-                                                            dpi = getattr(sig_img, 'info', {}).get('dpi', (72, 72))
-                                                            if isinstance(dpi, tuple):
-                                                                dpi_x, dpi_y = dpi
-                                                            else:
-                                                                dpi_x = dpi_y = dpi
-                                                            # Convert to PDF points
-                                                            img_width_points = (img_width_px * 72) / dpi_x
-                                                            img_height_points = (img_height_px * 72) / dpi_y
-                                                            actual_signature_size = (img_width_points, img_height_points)
-                                                    
-                                                    # Calculate signature position based on config
-                                                    signature_x, signature_y = self._calculate_signature_position(
-                                                        word, actual_signature_size, config.signature_position
-                                                    )
-                                                    
-                                                    locations.append((
-                                                        page_num,
-                                                        signature_x,
-                                                        signature_y
-                                                    ))
-                                                    logger.info(f"Found keyword '{keyword}' on page {page_num + 1} at position ({word['x0']}, {word['top']})")
-                                                    logger.info(f"Placed signature at ({signature_x}, {signature_y}) - position: {config.signature_position}")
-            
-            logger.info(f"Total keyword locations found: {len(locations)}")
-            return locations
+            return self._search_keyword_locations(pdf_path, keywords, config, pdf_document, metrics, skipped,
+                                                  parsed_pages)
+        except MemoryLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error finding keyword locations: {str(e)}")
             return []
 
-    def _calculate_signature_position(self, word: dict, signature_size: tuple[float, float], position: str) -> tuple[float, float]:
+    def _locate_keywords(self, pdf_path: str, config: SignatureConfig, pdf_document: "fitz.Document",
+                         report: _DocumentReport) -> List[tuple[int, float, float]]:
         """
-        Calculate the signature position relative to the keyword word.
+        Find the keyword placements, going through the layout cache when one is configured.
         
         Args:
-            word: Word dictionary containing position information (x0, x1, top, bottom)
-            signature_size: Tuple of (width, height) for the signature
-            position: Position relative to keyword ("top", "bottom", "left", "right")
+            pdf_path: Path to the PDF file
+            config: SignatureConfig object containing the keywords and placement options
+            pdf_document: Open fitz document
+            report: Receives the cache hit/miss status
             
         Returns:
-            Tuple of (x_coord, y_coord) for signature placement
+            List of tuples containing (page_number, x_coord, y_coord)
         """
-        word_x0 = float(word['x0'])
-        word_x1 = float(word['x1']) 
-        word_top = float(word['top'])
-        word_bottom = float(word['bottom'])
+        if self.layout_cache is None:
+            return self._find_keyword_locations(pdf_path, config.keywords, config, pdf_document, report.metrics,
+                                                report.skipped_matches, report.parsed_pages)
         
-        sig_width, sig_height = signature_size
-        padding = 10  # Padding between keyword and signature
+        try:
+            key = layout_cache_key(pdf_document, config, self._get_positioning_size(config))
+            cached_locations = self.layout_cache.get(key)
+        except Exception as e:
+            logger.warning(f"Layout cache unavailable, searching the document: {str(e)}")
+            return self._find_keyword_locations(pdf_path, config.keywords, config, pdf_document, report.metrics,
+                                                report.skipped_matches, report.parsed_pages)
         
-        if position.lower() == "top":
-            # Place signature above the keyword
-            signature_x = word_x0
-            signature_y = word_top - sig_height - padding
-        elif position.lower() == "bottom":
-            # Place signature below the keyword
-            signature_x = word_x0
-            signature_y = word_bottom + padding
-        elif position.lower() == "left":
+        if cached_locations is not None:
+            report.record_layout_cache("hit")
+            # The cache only stores placements, so skipped matches are unknown
+            report.skipped_matches = None
+            logger.info(f"Layout cache hit: {len(cached_locations)} locations")
+            return cached_locations
+        
+        report.record_layout_cache("miss")
+        try:
+            locations = self._search_keyword_locations(pdf_path, config.keywords, config, pdf_document, report.metrics,
+                                                       report.skipped_matches, report.parsed_pages)
+        except MemoryLimitExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error finding keyword locations: {str(e)}")
+            return []
+        
+        try:
+            self.layout_cache.put(key, locations)
+        except Exception as e:
+            logger.warning(f"Could not store layout in cache: {str(e)}")
+        return locations
+
+    def _search_keyword_locations(self, pdf_path: str, keywords: List[str], config: SignatureConfig,
+                                  pdf_document: Optional["fitz.Document"] = None,
+                                  metrics: Optional[DocumentMetrics] = None,
+                                  skipped: Optional[List[SkippedMatch]] = None,
+                                  parsed_pages: Optional[_ParsedPages] = None) -> List[tuple[int, float, float]]:
+        """
+        Search the document for keyword placements; errors propagate to the caller.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            keywords: List of keywords to search for
+            config: SignatureConfig object containing placement preferences
+            pdf_document: Already-open fitz document for the "pymupdf" engine
+            metrics: Receives page, word and match counts when given
+            skipped: Receives the matches skipped by skip_non_empty when given
+            parsed_pages: Text layer shared with the other configs of a group, if any
+            
+        Returns:
+            List of tuples containing (page_number, x_coord, y_coord)
+        """
+        locations = []
+        max_matches = config.max_matches_per_keyword
+        match_counts = {keyword: 0 for keyword in keywords}
+        
+        shard_pages = self._shard_pages(pdf_path, config, pdf_document, parsed_pages)
+        if shard_pages is not None:
+            page_results = self._iter_sharded_page_matches(pdf_path, keywords, config, shard_pages, metrics,
+                                                           skipped is not None, parsed_pages)
+        else:
+            page_results = self._iter_page_matches(pdf_path, keywords, config, match_counts, pdf_document, metrics,
+                                                   skipped is not None, parsed_pages)
+        try:
+            # Pages arrive in order, so the matches kept are the same however the pages were searched
+            for page_num, page_matches, page_skipped in page_results:
+                if skipped is not None:
+                    # Shards also search keywords that earlier pages had already satisfied
+                    skipped.extend(match for match in page_skipped
+                                   if max_matches is None or match_counts[match.keyword] < max_matches)
+                for keyword, location in page_matches:
+                    if max_matches is None or match_counts[keyword] < max_matches:
+                        match_counts[keyword] += 1
+                        locations.append(location)
+                
+                if max_matches is not None and all(count >= max_matches for count in match_counts.values()):
+                    logger.info(f"All keywords reached {max_matches} matches, stopping search after page {page_num + 1}")
+                    break
+        finally:
+            page_results.close()
+        
+        logger.info(f"Total keyword locations found: {len(locations)}")
+        return locations
+
+    def _iter_page_matches(self, pdf_path: str, keywords: List[str], config: SignatureConfig,
+                           match_counts: Dict[str, int], pdf_document: Optional["fitz.Document"] = None,
+                           metrics: Optional[DocumentMetrics] = None, collect_skipped: bool = False,
+                           parsed_pages: Optional[_ParsedPages] = None
+                           ) -> Iterator[tuple[int, List[tuple[str, tuple[int, float, float]]], Optional[List[SkippedMatch]]]]:
+        """
+        Search the pages in order, yielding the keyword matches of each page with text.
+        
+        Args:
+            pdf_path: Path to the PDF file, or a binary stream of it
+            keywords: List of keywords to search for
+            config: SignatureConfig object containing placement preferences
+            match_counts: Matches kept so far per keyword, updated by the caller; keywords
+                that reached max_matches_per_keyword are not searched on later pages
+            pdf_document: Already-open fitz document for the "pymupdf" engine
+            metrics: Receives page, word and match counts when given
+            collect_skipped: Also collect the matches skipped by skip_non_empty
+            parsed_pages: Text layer shared with the other configs of a group, if any
+            
+        Returns:
+            Iterator of (page_number, matches, skipped) where matches are
+            (keyword, (page_number, x_coord, y_coord)) and skipped is None unless collected
+        """
+        signature_size = self._get_positioning_size(config)
+        max_matches = config.max_matches_per_keyword
+        pages = self._iter_page_text(pdf_path, config, pdf_document, parsed_pages)
+        try:
+            for page_num, text, get_index in pages:
+                if metrics is not None:
+                    metrics.pages_scanned += 1
+                if not text:
+                    continue
+                logger.debug(f"Page {page_num + 1} text preview: {text[:200]}...")
+                
+                # Only search for keywords that still need matches
+                open_keywords = [k for k in keywords if max_matches is None or match_counts[k] < max_matches]
+                page_skipped = [] if collect_skipped else None
+                # Remember whether the page's words were needed, to count the words actually extracted
+                used_index = []
+
+                def get_used_index(get_index=get_index, used_index=used_index):
+                    if not used_index:
+                        used_index.append(get_index())
+                    return used_index[0]
+
+                page_matches = self._match_keywords_on_page(page_num, text, get_used_index, open_keywords, config,
+                                                            signature_size, metrics, page_skipped)
+                if metrics is not None and used_index:
+                    metrics.words_extracted += len(used_index[0].words)
+                yield page_num, page_matches, page_skipped
+        finally:
+            pages.close()
+
+    def _shard_pages(self, pdf_path: Union[str, BinaryIO], config: SignatureConfig,
+                     pdf_document: Optional["fitz.Document"], parsed_pages: Optional[_ParsedPages]) -> Optional[List[int]]:
+        """
+        Decide whether to search a document in page shards.
+        
+        Shard workers open the document by path, so a document only held in memory
+        is always searched in this process.
+        
+        Args:
+            pdf_path: Path to the PDF file, or a binary stream of it (never sharded)
+            config: SignatureConfig object with the search hints
+            pdf_document: Already-open fitz document, used for the page count; one opened
+                from a stream is never sharded
+            parsed_pages: Text layer shared with the other configs of a group; pages
+                already parsed are searched in one pass
+            
+        Returns:
+            The pages to search when they are at least shard_min_pages, else None for the
+            single-pass search
+        """
+        if self.shard_min_pages is None or not isinstance(pdf_path, str):
+            return None
+        if pdf_document is not None and not pdf_document.name:
+            return None
+        if parsed_pages is not None and parsed_pages.get(pdf_path, config) is not None:
+            return None
+        import multiprocessing
+        if multiprocessing.current_process().daemon:
+            # Supervised workers (document_timeout) cannot start processes of their own
+            return None
+        page_count = pdf_document.page_count if pdf_document is not None else _probe_document(pdf_path)[0]
+        pages = _resolve_search_pages(config.search_pages, page_count)
+        return pages if len(pages) >= self.shard_min_pages else None
+
+    def _iter_sharded_page_matches(self, pdf_path: str, keywords: List[str], config: SignatureConfig,
+                                   pages: List[int], metrics: Optional[DocumentMetrics] = None,
+                                   collect_skipped: bool = False, parsed_pages: Optional[_ParsedPages] = None
+                                   ) -> Iterator[tuple[int, List[tuple[str, tuple[int, float, float]]], Optional[List[SkippedMatch]]]]:
+        """
+        Search contiguous page ranges of a document in worker processes, yielding the
+        results page by page in document order, as _iter_page_matches does.
+        
+        Shards still queued are cancelled when the caller stops early. With parsed_pages,
+        the shards also send back their text layer, which is stored once every page has
+        been searched so the other placements of the document are not sharded again.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            keywords: List of keywords to search for
+            config: SignatureConfig object containing placement preferences
+            pages: Page numbers to search, in order
+            metrics: Receives the page, word and match counts of all shards when given
+            collect_skipped: Also collect the matches skipped by skip_non_empty
+            parsed_pages: Text layer shared with the other configs of a group, if any
+            
+        Returns:
+            Iterator of (page_number, matches, skipped)
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        
+        workers = min(self.shard_workers or os.cpu_count() or 1, len(pages))
+        # A few shards per worker, so that dense and sparse page ranges even out
+        shard_size = -(-len(pages) // (workers * 4))
+        shards = [pages[start:start + shard_size] for start in range(0, len(pages), shard_size)]
+        logger.info(f"Searching {len(pages)} pages in {len(shards)} shards on {workers} processes")
+        
+        collected = [] if parsed_pages is not None else None
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(_worker_log_level(), self._worker_options))
+        try:
+            futures = [executor.submit(_search_page_shard, pdf_path, keywords, replace(config, search_pages=shard),
+                                       collect_skipped, collected is not None)
+                       for shard in shards]
+            for future in futures:
+                shard_results, shard_metrics, shard_pages = future.result()
+                if metrics is not None:
+                    metrics.pages_scanned += shard_metrics.pages_scanned
+                    metrics.words_extracted += shard_metrics.words_extracted
+                    metrics.matches_found += shard_metrics.matches_found
+                    metrics.matches_skipped += shard_metrics.matches_skipped
+                if collected is not None:
+                    collected.extend(shard_pages)
+                yield from shard_results
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if collected is not None:
+            parsed_pages.put(pdf_path, config, collected)
+
+    def _search_shard(self, pdf_path: str, keywords: List[str], config: SignatureConfig,
+                      collect_skipped: bool, collect_pages: bool = False) -> tuple[list, DocumentMetrics, Optional[List[list]]]:
+        """
+        Search the pages of one shard (config.search_pages) inside a shard worker.
+        
+        The shard stops early once every keyword has max_matches_per_keyword matches
+        within it, as the pages after that cannot contribute to the merged result,
+        unless its text layer is collected for the other placements of the document.
+        
+        Returns:
+            Tuple of (page results as yielded by _iter_page_matches, shard metrics,
+            [page_number, page_text, word_index] entries of the shard or None)
+        """
+        metrics = DocumentMetrics()
+        max_matches = config.max_matches_per_keyword
+        match_counts = {keyword: 0 for keyword in keywords}
+        shard_pages = _ParsedPages(build_indexes=True) if collect_pages else None
+        shard_results = []
+        for page_num, page_matches, page_skipped in self._iter_page_matches(pdf_path, keywords, config, match_counts,
+                                                                            metrics=metrics,
+                                                                            collect_skipped=collect_skipped,
+                                                                            parsed_pages=shard_pages):
+            shard_results.append((page_num, page_matches, page_skipped))
+            for keyword, _ in page_matches:
+                match_counts[keyword] += 1
+            if (shard_pages is None and max_matches is not None
+                    and all(count >= max_matches for count in match_counts.values())):
+                break
+        return shard_results, metrics, shard_pages.get(pdf_path, config) if shard_pages is not None else None
+
+    def _iter_page_text(self, pdf_path: str, config: SignatureConfig,
+                        pdf_document: Optional["fitz.Document"] = None,
+                        parsed_pages: Optional[_ParsedPages] = None) -> Iterator[tuple[int, str, Callable[[], "_PageWordIndex"]]]:
+        """
+        Yield the text layer of the pages to search using the configured locator engine.
+        
+        Only the pages selected by config.search_pages are extracted, and only the
+        part of each page inside config.search_region.
+        
+        Args:
+            pdf_path: Path to the PDF file, or a binary stream of it
+            config: SignatureConfig object selecting the engine and search hints
+            pdf_document: Already-open fitz document to reuse for the "pymupdf" engine
+            parsed_pages: Text layer shared with the other configs of a group: pages
+                parsed for an earlier config are reused, and the pages parsed here are
+                kept (with their word index) for the next ones
+            
+        Returns:
+            Iterator of (page_number, page_text, get_index) where get_index returns the
+            page's _PageWordIndex, built on first use
+        """
+        collected = None
+        if parsed_pages is not None:
+            cached_pages = parsed_pages.get(pdf_path, config)
+            if cached_pages is not None:
+                logger.info(f"Reusing the text layer of {len(cached_pages)} pages parsed for an earlier config")
+                yield from self._iter_parsed_pages(pdf_path, config, cached_pages)
+                return
+            collected = []
+        
+        region = config.search_region
+        if config.engine == "pymupdf":
+            fitz = _import_fitz()
+            document = pdf_document if pdf_document is not None else fitz.open(pdf_path)
+            try:
+                for page_num in _resolve_search_pages(config.search_pages, document.page_count):
+                    page = document[page_num]
+                    clip = None
+                    if region is not None:
+                        rect = page.rect
+                        clip = fitz.Rect(rect.x0 + region[0] * rect.width, rect.y0 + region[1] * rect.height,
+                                         rect.x0 + region[2] * rect.width, rect.y0 + region[3] * rect.height)
+                    text, index = self._extract_pymupdf_page(page, clip)
+                    if collected is not None:
+                        collected.append([page_num, text, index])
+                    yield page_num, text, lambda index=index: index
+                    del page, index
+                    self._finish_page(page_num)
+            finally:
+                if pdf_document is None:
+                    document.close()
+        else:
+            import pdfplumber
+            
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num in _resolve_search_pages(config.search_pages, len(pdf.pages)):
+                    original_page = pdf.pages[page_num]
+                    page = self._crop_plumber_page(original_page, region)
+                    index_holder = []
+
+                    def get_index(page=page, index_holder=index_holder):
+                        if not index_holder:
+                            index_holder.append(_PageWordIndex(page.extract_words()))
+                        return index_holder[0]
+
+                    text = page.extract_text()
+                    yield page_num, text, get_index
+                    if collected is not None:
+                        if text and parsed_pages.build_indexes:
+                            get_index()
+                        collected.append([page_num, text, index_holder[0] if index_holder else None])
+                    
+                    # pdfplumber keeps every page's parsed layout cached, which grows with the
+                    # page count; pages are never revisited, so release each one once searched
+                    index_holder.clear()
+                    page.close()
+                    original_page.close()
+                    if self.low_memory:
+                        # pdfminer also caches every object it has parsed for the document
+                        for cache_name in ("_cached_objs", "_parsed_objs"):
+                            getattr(pdf.doc, cache_name, {}).clear()
+                    self._finish_page(page_num)
+        if collected is not None:
+            parsed_pages.put(pdf_path, config, collected)
+
+    def _iter_parsed_pages(self, pdf_path: str, config: SignatureConfig,
+                           entries: List[list]) -> Iterator[tuple[int, str, Callable[[], "_PageWordIndex"]]]:
+        """
+        Yield pages parsed for an earlier config of the group, as _iter_page_text does.
+        
+        A page whose word index was not needed before is extracted again on first use
+        (pdfplumber pages only), and the index is kept for the next configs.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            config: SignatureConfig object selecting the search region
+            entries: [page_number, page_text, word_index] entries from _ParsedPages
+            
+        Returns:
+            Iterator of (page_number, page_text, get_index)
+        """
+        opened = []
+        try:
+            for entry in entries:
+                def get_index(entry=entry):
+                    if entry[2] is None:
+                        if not opened:
+                            import pdfplumber
+                            opened.append(pdfplumber.open(pdf_path))
+                        original_page = opened[0].pages[entry[0]]
+                        page = self._crop_plumber_page(original_page, config.search_region)
+                        entry[2] = _PageWordIndex(page.extract_words())
+                        page.close()
+                        original_page.close()
+                    return entry[2]
+                
+                yield entry[0], entry[1], get_index
+        finally:
+            if opened:
+                opened[0].close()
+
+    def _crop_plumber_page(self, page, region: Optional[tuple[float, float, float, float]]):
+        """Crop a pdfplumber page to a search region given as fractions of the page, if any."""
+        if region is None:
+            return page
+        x0, top, x1, bottom = page.bbox
+        width, height = x1 - x0, bottom - top
+        return page.within_bbox((x0 + region[0] * width, top + region[1] * height,
+                                 x0 + region[2] * width, top + region[3] * height))
+
+    def _finish_page(self, page_num: int) -> None:
+        """
+        Apply the memory policy after a page has been searched and released.
+        
+        Args:
+            page_num: Zero-based number of the page just searched
+        """
+        if self.memory_limit_mb is not None:
+            rss = _current_rss_bytes()
+            if rss is not None and rss > self.memory_limit_mb * 1024 * 1024:
+                raise MemoryLimitExceeded(
+                    f"Memory limit of {self.memory_limit_mb} MB exceeded after page {page_num + 1} "
+                    f"({rss / (1024 * 1024):.0f} MB in use)"
+                )
+
+    def _extract_pymupdf_page(self, page: "fitz.Page", clip: Optional["fitz.Rect"] = None) -> tuple[str, "_PageWordIndex"]:
+        """
+        Extract the text and word index of a fitz page in pdfplumber's layout.
+        
+        Word boxes use the font size as glyph height (as pdfplumber does) and words
+        are ordered line by line, left to right, so that keyword placement matches
+        the pdfplumber engine.
+        
+        Args:
+            page: fitz Page object
+            clip: Only extract words inside this rectangle
+            
+        Returns:
+            Tuple of (page_text, word_index)
+        """
+        fitz = _import_fitz()
+        # The glyph height setting is global to PyMuPDF, so threads must not interleave here
+        with _glyph_height_lock:
+            previous_setting = fitz.TOOLS.set_small_glyph_heights()
+            fitz.TOOLS.set_small_glyph_heights(True)
+            try:
+                raw_words = page.get_text("words", clip=clip)
+            finally:
+                fitz.TOOLS.set_small_glyph_heights(bool(previous_setting))
+        
+        words = [
+            {'text': w[4], 'x0': w[0], 'x1': w[2], 'top': w[1], 'bottom': w[3]}
+            for w in raw_words
+        ]
+        lines = _group_words_into_lines(words)
+        
+        text = '\n'.join(' '.join(w['text'] for w in line) for line in lines)
+        index = _PageWordIndex([w for line in lines for w in line])
+        return text, index
+
+    def _match_keywords_on_page(self, page_num: int, text: str, get_index: Callable[[], "_PageWordIndex"],
+                                keywords: List[str], config: SignatureConfig, signature_size: tuple[float, float],
+                                metrics: Optional[DocumentMetrics] = None,
+                                skipped: Optional[List[SkippedMatch]] = None) -> List[tuple[str, tuple[int, float, float]]]:
+        """
+        Find signature locations for all keywords on a single page.
+        
+        Args:
+            page_num: Zero-based page number
+            text: Extracted text of the page
+            get_index: Callable returning the page's _PageWordIndex
+            keywords: List of keywords to search for
+            config: SignatureConfig object containing placement preferences
+            signature_size: Signature (width, height) in points used for positioning
+            metrics: Receives match counts when given
+            skipped: Receives the matches skipped by skip_non_empty when given
+            
+        Returns:
+            List of (keyword, (page_number, x_coord, y_coord)) in page order for each keyword
+        """
+        locations = []
+        for keyword in keywords:
+            # Handle multiline keywords (like "By:\nName:")
+            if '\n' in keyword:
+                # Split the keyword into parts
+                keyword_parts = keyword.split('\n')
+                if len(keyword_parts) == 2:
+                    # Split the page text into lines
+                    lines = text.split('\n')
+                    logger.debug(f"Page {page_num + 1} has {len(lines)} lines")
+
+                    # Look for consecutive lines that match the pattern
+                    for i in range(len(lines) - 1):
+                        current_line = lines[i].strip()
+                        next_line = lines[i + 1].strip()
+
+                        logger.debug(f"Checking line {i}: '{current_line}' and line {i+1}: '{next_line}'")
+
+                        # Check if we have a "By:" line followed by a "Name:" line
+                        if ("by:" in current_line.lower() and "name:" in next_line.lower()):
+                            logger.debug(f"Found By:/Name: pattern at lines {i} and {i+1}")
+                            if metrics is not None:
+                                metrics.matches_found += 1
+
+                            # Check if "By:" line is blank (only contains "By:" and optional whitespace)
+                            by_content = current_line.lower().replace("by:", "").strip()
+                            name_content = next_line.lower().replace("name:", "").strip()
+
+                            logger.debug(f"By: content: '{by_content}', Name: content: '{name_content}'")
+
+                            # Apply skip_non_empty logic if enabled
+                            if config.skip_non_empty and (by_content != "" or name_content != ""):
+                                logger.debug(f"Skipping - By='{by_content}', Name='{name_content}' (skip_non_empty={config.skip_non_empty})")
+                                if metrics is not None:
+                                    metrics.matches_skipped += 1
+                                if skipped is not None:
+                                    by_word = get_index().first_containing("by:")
+                                    skipped.append(SkippedMatch(
+                                        page_number=page_num, keyword=keyword,
+                                        x=by_word['x0'] if by_word else 0.0, y=by_word['top'] if by_word else 0.0,
+                                        content=f"{current_line} / {next_line}"
+                                    ))
+                                continue
+
+                            # Find the position of "By:" in the PDF words
+                            word = get_index().first_containing("by:")
+                            if word is not None:
+                                logger.debug(f"Found 'By:' word at ({word['x0']}, {word['top']}): '{word['text']}'")
+                                locations.append((keyword, self._keyword_location(page_num, word, signature_size, config.signature_position)))
+        
+        # Single line keywords - all occurrences of all keywords in one pass over the page
+        matcher = _compile_keyword_matcher(tuple(keywords))
+        for keyword, position in matcher.find_matches(text, get_index):
+            index = get_index()
+            word = index.words[position]
+            if metrics is not None:
+                metrics.matches_found += 1
+            
+            # Apply skip_non_empty logic for single keywords
+            if config.skip_non_empty:
+                content_text = self._content_after_keyword(index, word)
+                if content_text and content_text.lower() not in ['', 'by:', 'name:']:
+                    logger.debug(f"Skipping '{keyword}' at ({word['x0']}, {word['top']}) due to skip_non_empty=True")
+                    logger.debug(f"Content after keyword: '{content_text}'")
+                    if metrics is not None:
+                        metrics.matches_skipped += 1
+                    if skipped is not None:
+                        skipped.append(SkippedMatch(page_number=page_num, keyword=keyword, x=word['x0'], y=word['top'],
+                                                    content=content_text))
+                    continue
+                logger.debug(f"No content after '{keyword}' at ({word['x0']}, {word['top']}) - will place signature")
+            
+            locations.append((keyword, self._keyword_location(page_num, word, signature_size, config.signature_position)))
+            logger.debug(f"Found keyword '{keyword}' on page {page_num + 1} at position ({word['x0']}, {word['top']})")
+        
+        return locations
+
+    def _content_after_keyword(self, index: "_PageWordIndex", word: dict) -> str:
+        """
+        Collect the text that follows a keyword word on the same line.
+        
+        Args:
+            index: Word index of the page containing the keyword
+            word: Word dictionary of the matched keyword
+            
+        Returns:
+            str: Text of the words that belong to the keyword's field
+        """
+        word_x_end = word['x1']  # Right edge of the current word
+        
+        # Words on the same line (within 5 points vertically), sorted by horizontal position
+        content_after_keyword = []
+        for i in index.same_line(word['top'], tolerance=5):
+            w = index.words[i]
+            if w['x0'] > word_x_end:  # Word is to the right of current keyword
+                # Check if this word is close enough to be considered part of the same field
+                # (within reasonable distance, but stop at the next "By:" if present)
+                if index.lowered[i].strip() == 'by:':
+                    # Stop if we encounter another "By:" field
+                    break
+                elif w['x0'] - word_x_end <= 100:  # Within 100 pixels (reasonable gap)
+                    content_after_keyword.append(w['text'])
+                else:
+                    # Large gap, probably end of this field
+                    break
+        
+        return ' '.join(content_after_keyword).strip()
+
+    def _keyword_location(self, page_num: int, word: dict, signature_size: tuple[float, float],
+                          position: str) -> tuple[int, float, float]:
+        """
+        Build the signature location for a matched keyword word.
+        
+        Args:
+            page_num: Zero-based page number
+            word: Word dictionary of the matched keyword
+            signature_size: Signature (width, height) in points
+            position: Position relative to keyword ("top", "bottom", "left", "right")
+            
+        Returns:
+            Tuple of (page_number, x_coord, y_coord)
+        """
+        signature_x, signature_y = self._calculate_signature_position(word, signature_size, position)
+        logger.debug(f"Placed signature at ({signature_x}, {signature_y}) - position: {position}")
+        return page_num, signature_x, signature_y
+
+    def _get_positioning_size(self, config: SignatureConfig) -> tuple[float, float]:
+        """
+        Get the signature size used to position it relative to a keyword.
+        
+        Args:
+            config: SignatureConfig object
+            
+        Returns:
+            Tuple of (width, height) in points
+        """
+        if config.signature_size is not None:
+            return config.signature_size
+        
+        signature_image_path = os.path.join(config.working_folder, config.signature_filename)
+        return signature_asset_cache.get(signature_image_path).point_size
+
+    def _calculate_signature_position(self, word: dict, signature_size: tuple[float, float], position: str) -> tuple[float, float]:
+        """
+        Calculate the signature position relative to the keyword word.
+        
+        Args:
+            word: Word dictionary containing position information (x0, x1, top, bottom)
+            signature_size: Tuple of (width, height) for the signature
+            position: Position relative to keyword ("top", "bottom", "left", "right")
+            
+        Returns:
+            Tuple of (x_coord, y_coord) for signature placement
+        """
+        word_x0 = float(word['x0'])
+        word_x1 = float(word['x1']) 
+        word_top = float(word['top'])
+        word_bottom = float(word['bottom'])
+        
+        sig_width, sig_height = signature_size
+        padding = 10  # Padding between keyword and signature
+        
+        if position.lower() == "top":
+            # Place signature above the keyword
+            signature_x = word_x0
+            signature_y = word_top - sig_height - padding
+        elif position.lower() == "bottom":
+            # Place signature below the keyword
+            signature_x = word_x0
+            signature_y = word_bottom + padding
+        elif position.lower() == "left":
             # Place signature to the left of the keyword
             signature_x = word_x0 - sig_width - padding
             signature_y = word_top
@@ -332,7 +1749,7 @@ class PDFSignatureProcessor:
         
         return signature_x, signature_y
 
-    def _prepare_signature_for_pdf(self, config: SignatureConfig) -> tuple[str, bytes]:
+    def _prepare_signature_for_pdf(self, config: SignatureConfig) -> SignatureAsset:
         """
         Prepare signature image for PDF insertion - uses original image as-is for maximum quality.
         
@@ -340,260 +1757,2126 @@ class PDFSignatureProcessor:
             config: SignatureConfig object
             
         Returns:
-            tuple: (image_path, image_bytes) for direct PDF insertion
+            SignatureAsset: Original image bytes and natural size, shared through the asset cache
         """
         try:
             signature_image_path = os.path.join(config.working_folder, config.signature_filename)
             
-            # Always use the original image without any processing
-            logger.info("Using original signature image without any processing for maximum quality")
-            
             # When signature_size is None, we use the image completely as-is
             if config.signature_size is None:
                 logger.info("signature_size=None, will use image as-is with its natural size")
             else:
                 logger.info(f"Using specified signature_size: {config.signature_size}")
             
-            # Read the original image bytes
-            with open(signature_image_path, 'rb') as f:
-                image_bytes = f.read()
+            asset = signature_asset_cache.get(signature_image_path)
             
-            logger.info("Signature prepared using original file - no quality loss")
-            return signature_image_path, image_bytes
+            logger.info(f"Signature image: {asset.pixel_size[0]}x{asset.pixel_size[1]}px at {asset.dpi[0]}x{asset.dpi[1]} DPI = {asset.point_size[0]:.1f}x{asset.point_size[1]:.1f} points")
+            return asset
                 
         except Exception as e:
             logger.error(f"Error preparing signature: {str(e)}")
             raise
 
-    def _add_signature_to_pdf(self, config: SignatureConfig) -> str:
+    def _insert_signature(self, page: "fitz.Page", rect: "fitz.Rect", asset: SignatureAsset, xref: int = 0) -> int:
+        """
+        Insert the signature image into a page.
+        
+        The image is embedded once per document: the first insertion stores the original
+        bytes, and later insertions reference the returned xref instead of adding
+        another copy of the image.
+        
+        Args:
+            page: fitz Page object to insert into
+            rect: Target rectangle in points
+            asset: Signature image to insert
+            xref: Xref of the image already embedded in this document, or 0
+            
+        Returns:
+            int: Xref of the embedded image
+        """
+        try:
+            if xref:
+                page.insert_image(rect, xref=xref, keep_proportion=False)
+                return xref
+            # Use image bytes directly for best quality
+            return page.insert_image(rect, stream=asset.data, keep_proportion=False)
+        except Exception as img_error:
+            if asset.path is not None:
+                # Fallback to file-based insertion
+                logger.warning(f"Bytes insertion failed, using file fallback: {img_error}")
+                return page.insert_image(rect, filename=asset.path, keep_proportion=False)
+            # No file to fall back on: insert the image re-encoded as PNG
+            logger.warning(f"Bytes insertion failed, inserting the image as PNG: {img_error}")
+            from PIL import Image
+            
+            with Image.open(io.BytesIO(asset.data)) as sig_img:
+                png = io.BytesIO()
+                sig_img.save(png, format="PNG")
+            return page.insert_image(rect, stream=png.getvalue(), keep_proportion=False)
+
+    def _add_signature_to_pdf(self, config: SignatureConfig, report: Optional[_DocumentReport] = None) -> str:
         """
         Add signature to PDF using original image for maximum quality.
         
         Args:
             config: SignatureConfig object containing the configuration
+            report: Receives per-document details such as the layout cache status
             
         Returns:
             str: Path to the output PDF file
         """
+        pdf_document = None
+        output_copy = None
+        report = report if report is not None else _DocumentReport()
         try:
+            with report.stage("open"):
+                fitz = _import_fitz()
+            
             # Build full paths
             pdf_path = os.path.join(config.working_folder, config.input_pdf_filename)
+            output_path = self._output_path(config)
             
-            # Open the PDF
-            pdf_document = fitz.open(pdf_path)
-            
-            # Prepare signature image (uses original image as-is)
-            signature_path, signature_bytes = self._prepare_signature_for_pdf(config)
-            
-            logger.info(f"Prepared signature - size mode: {'Natural DPI-based sizing' if config.signature_size is None else f'Specified size: {config.signature_size}'}")
-            
-            # Find signature placement locations
-            locations = []
-            if config.keywords:
-                logger.info(f"Searching for keywords: {config.keywords}")
-                locations = self._find_keyword_locations(pdf_path, config.keywords, config)
-                logger.info(f"Found {len(locations)} keyword locations")
+            # Open the PDF; an incremental update is appended to a copy of the original, which
+            # only replaces the output once complete (also when signing in place)
+            with report.stage("open"):
+                if config.save_mode == "incremental":
+                    output_copy = _partial_path(output_path)
+                    shutil.copyfile(pdf_path, output_copy)
+                    pdf_document = fitz.open(output_copy)
+                else:
+                    pdf_document = fitz.open(pdf_path)
             
-            if not locations and config.x_coord is not None and config.y_coord is not None:
-                logger.info("Using explicit coordinates")
-                pages = config.page_numbers if config.page_numbers else [0]
-                for page_num in pages:
-                    locations.append((page_num, config.x_coord, config.y_coord))
+            # Every placement is applied to the same open document, which is saved once
+            placed = 0
+            outcomes = []
+            self._share_parsed_pages(config, report)
+            for placement_config, placement in zip(self._placement_configs(config), config.placements or [None]):
+                # Prepare signature image (uses original image as-is)
+                with report.stage("prepare_signature"):
+                    signature_asset = self._prepare_signature_for_pdf(placement_config)
+                
+                logger.info(f"Prepared signature - size mode: {'Natural DPI-based sizing' if placement_config.signature_size is None else f'Specified size: {placement_config.signature_size}'}")
+                
+                locations = self._place_signatures(pdf_document, pdf_path, placement_config, signature_asset, report)
+                placed += len(locations)
+                if placement is not None:
+                    outcomes.append(PlacementResult(name=placement.name, signature_filename=placement.signature_filename,
+                                                    locations=locations))
+            if config.placements:
+                report.placements = outcomes
             
-            # Remove duplicates
-            unique_locations = list(set(locations))
-            logger.info(f"Adding signatures to {len(unique_locations)} locations")
+            if self.save_guard is not None and not self.save_guard(config):
+                raise RuntimeError("Signed document not written: the save guard refused it")
+            with report.stage("save"):
+                self._save_document(pdf_document, output_path, config.save_mode)
+            output_copy = None
             
-            # Insert signatures using direct image bytes for maximum quality
-            for page_num, x, y in unique_locations:
-                page = pdf_document[page_num]
-                
-                if config.signature_size is None:
-                    # When signature_size=None, use image as-is with natural size
-                    logger.info(f"Adding signature to page {page_num + 1} at ({x}, {y}) using image's natural size")
-                    
-                    # Get the image dimensions in pixels to convert to PDF points properly
-                    signature_image_path = os.path.join(config.working_folder, config.signature_filename)
-                    with Image.open(signature_image_path) as sig_img:
-                        img_width_px, img_height_px = sig_img.size
-                        
-                        # Get DPI - default to 72 if not available (PDF standard)
-                        dpi = getattr(sig_img, 'info', {}).get('dpi', (72, 72))
-                        if isinstance(dpi, tuple):
-                            dpi_x, dpi_y = dpi
-                        else:
-                            dpi_x = dpi_y = dpi
-                        
-                        # Convert pixels to points (1 point = 1/72 inch)
-                        img_width_points = (img_width_px * 72) / dpi_x
-                        img_height_points = (img_height_px * 72) / dpi_y
-                        
-                        logger.info(f"Image: {img_width_px}x{img_height_px}px at {dpi_x}x{dpi_y} DPI = {img_width_points:.1f}x{img_height_points:.1f} points")
-                    
-                    # Create rectangle using proper PDF points
-                    rect = fitz.Rect(x, y, x + img_width_points, y + img_height_points)
-                    
-                    # Insert image with exact sizing
-                    try:
-                        page.insert_image(rect, stream=signature_bytes, keep_proportion=False)
-                        logger.info(f"Inserted signature using image bytes at natural size ({img_width_points:.1f}x{img_height_points:.1f} points)")
-                    except Exception as img_error:
-                        logger.warning(f"Bytes insertion failed, using file fallback: {img_error}")
-                        page.insert_image(rect, filename=signature_path, keep_proportion=False)
-                else:
-                    # When signature_size is specified, use the specified dimensions
-                    sig_width, sig_height = config.signature_size
-                    logger.info(f"Adding signature to page {page_num + 1} at ({x}, {y}) with specified size {config.signature_size}")
-                    
-                    # Create precise rectangle using specified signature size
-                    rect = fitz.Rect(x, y, x + sig_width, y + sig_height)
-                    
-                    # Insert image using bytes for maximum quality
-                    try:
-                        # Use image bytes directly for best quality
-                        page.insert_image(rect, stream=signature_bytes, keep_proportion=False)
-                        logger.info(f"Inserted signature using image bytes with specified dimensions")
-                    except Exception as img_error:
-                        # Fallback to file-based insertion
-                        logger.warning(f"Bytes insertion failed, using file fallback: {img_error}")
-                        page.insert_image(rect, filename=signature_path, keep_proportion=False)
-            
-            # Save PDF with optimal quality settings
-            output_filename = f"signed_{config.input_pdf_filename}"
-            output_path = config.output_path or os.path.join(config.working_folder, output_filename)
-            
-            # Save with no image compression to preserve original quality
-            pdf_document.save(output_path, deflate_images=False, deflate=False)
-            pdf_document.close()
+            if report.metrics is not None:
+                report.metrics.placements = placed
+                report.metrics.output_bytes = os.path.getsize(output_path)
             
-            logger.info(f"PDF saved with original image quality to: {output_path}")
+            logger.info(f"PDF saved ({config.save_mode} mode) to: {output_path}")
             return output_path
             
         except Exception as e:
             logger.error(f"Error adding signature: {str(e)}")
             raise
+        finally:
+            if pdf_document is not None and not pdf_document.is_closed:
+                pdf_document.close()
+            if output_copy is not None and os.path.exists(output_copy):
+                # Do not leave an unsigned copy behind when signing failed
+                os.remove(output_copy)
 
-    def process_documents(self, configs: List[SignatureConfig]) -> List[SignatureResult]:
+    def _place_signatures(self, pdf_document: "fitz.Document", pdf_source: Optional[Union[str, BinaryIO]],
+                          config: SignatureConfig, signature_asset: SignatureAsset,
+                          report: _DocumentReport) -> List[tuple[int, float, float]]:
         """
-        Process multiple PDF documents with signatures.
+        Find the signature locations of an open document and insert the signature at each.
         
         Args:
-            configs: List of SignatureConfig objects
+            pdf_document: Open fitz document to sign
+            pdf_source: Path or binary stream of the same PDF, read by the pdfplumber engine;
+                None when only pdf_document is searched
+            config: SignatureConfig object containing the keywords and placement options
+            signature_asset: Signature image to insert
+            report: Receives per-document details
             
         Returns:
-            List[SignatureResult]: Results of the processing
+            List of (page_number, x_coord, y_coord) where a signature was placed
         """
-        results = []
+        fitz = _import_fitz()
         
-        for config in configs:
-            try:
-                if not self._validate_input(config):
-                    raise ValueError("Invalid input configuration")
-                
-                output_path = self._add_signature_to_pdf(config)
-                
-                results.append(SignatureResult(
-                    input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
-                    item_id=config.item_id,
-                    output_pdf_path=output_path,
-                    success=True
-                ))
-                
-                logger.info(f"Successfully processed document: {config.input_pdf_filename}")
-                
-            except Exception as e:
-                logger.error(f"Error processing document {config.input_pdf_filename}: {str(e)}")
-                results.append(SignatureResult(
-                    input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
-                    item_id=config.item_id,
-                    output_pdf_path="",
-                    success=False,
-                    error_message=str(e)
-                ))
+        unique_locations = self._plan_locations(pdf_document, pdf_source, config, report)
+        logger.info(f"Adding signatures to {len(unique_locations)} locations")
         
-        return results
+        # Insert signatures using direct image bytes for maximum quality
+        sig_width, sig_height = self._signature_dimensions(config, signature_asset)
+        
+        image_xref = 0
+        with report.stage("insert"):
+            for page_num, x, y in unique_locations:
+                page = pdf_document[page_num]
+                logger.debug(f"Adding signature to page {page_num + 1} at ({x}, {y}) with size ({sig_width:.1f}x{sig_height:.1f} points)")
+                
+                rect = fitz.Rect(x, y, x + sig_width, y + sig_height)
+                image_xref = self._insert_signature(page, rect, signature_asset, image_xref)
+        return unique_locations
 
-    def _get_actual_signature_size(self, config: SignatureConfig) -> tuple[float, float]:
+    def _signature_dimensions(self, config: SignatureConfig, signature_asset: SignatureAsset) -> tuple[float, float]:
+        """Get the (width, height) in points the signature is inserted with."""
+        if config.signature_size is None:
+            # When signature_size=None, use image as-is with natural size
+            return signature_asset.point_size
+        return config.signature_size
+
+    def _plan_locations(self, pdf_document: "fitz.Document", pdf_source: Optional[Union[str, BinaryIO]],
+                        config: SignatureConfig, report: _DocumentReport) -> List[tuple[int, float, float]]:
         """
-        Get the actual size the signature will be when placed in the PDF.
-        Only used when signature_size is explicitly specified.
+        Decide where the signature goes: keyword locations, else the explicit coordinates.
         
         Args:
-            config: SignatureConfig object
+            pdf_document: Open fitz document
+            pdf_source: Path or binary stream of the same PDF, read by the pdfplumber engine;
+                None when only pdf_document is searched
+            config: SignatureConfig object containing the keywords and placement options
+            report: Receives per-document details
             
         Returns:
-            Tuple of (width, height) in points for the signature
+            List of unique (page_number, x_coord, y_coord)
         """
-        if config.signature_size is not None:
-            logger.info(f"Using specified signature_size: {config.signature_size}")
-            return config.signature_size
-        else:
-            # This method should not be called when signature_size is None
-            raise ValueError("_get_actual_signature_size called when signature_size is None")
-
+        # Find signature placement locations
+        locations = []
+        if config.keywords:
+            logger.info(f"Searching for keywords: {config.keywords}")
+            with report.stage("find_keywords"):
+                locations = self._locate_keywords(pdf_source, config, pdf_document, report)
+            logger.info(f"Found {len(locations)} keyword locations")
+        
+        if not locations and config.x_coord is not None and config.y_coord is not None:
+            logger.info("Using explicit coordinates")
+            pages = config.page_numbers if config.page_numbers else [0]
+            for page_num in pages:
+                locations.append((page_num, config.x_coord, config.y_coord))
+        
+        # Remove duplicates
+        return list(set(locations))
+
+    def _locate_document(self, config: SignatureConfig, report: _DocumentReport) -> List[PlannedSignature]:
+        """
+        Dry run: find where each signature of a document would go, without changing it.
+        
+        Args:
+            config: SignatureConfig object containing the configuration
+            report: Receives the skipped matches and other per-document details
+            
+        Returns:
+            List of PlannedSignature, in placement order
+        """
+        with report.stage("open"):
+            fitz = _import_fitz()
+            pdf_path = os.path.join(config.working_folder, config.input_pdf_filename)
+            pdf_document = fitz.open(pdf_path)
+        try:
+            planned = []
+            report.skipped_matches = []
+            self._share_parsed_pages(config, report)
+            for placement_config, placement in zip(self._placement_configs(config), config.placements or [None]):
+                with report.stage("prepare_signature"):
+                    signature_asset = self._prepare_signature_for_pdf(placement_config)
+                width, height = self._signature_dimensions(placement_config, signature_asset)
+                
+                locations = self._plan_locations(pdf_document, pdf_path, placement_config, report)
+                planned.extend(
+                    PlannedSignature(page_number=page_num, x=x, y=y, width=width, height=height,
+                                     signature_filename=placement_config.signature_filename,
+                                     name=placement.name if placement is not None else None)
+                    for page_num, x, y in sorted(locations)
+                )
+            logger.info(f"Dry run: {len(planned)} signatures planned for {config.input_pdf_filename}")
+            return planned
+        finally:
+            pdf_document.close()
+
+    def sign_bytes(self, pdf: Union[bytes, bytearray, memoryview], signature: Union[bytes, bytearray, memoryview],
+                   **options) -> bytes:
+        """
+        Sign a PDF held in memory and return the signed document, without touching disk.
+        
+        The PDF is parsed once from the buffer: the default "pymupdf" engine locates
+        keywords in the same document the signature is inserted into. Unlike
+        process_documents, errors are raised rather than returned as results.
+        
+        Args:
+            pdf: PDF document bytes
+            signature: PNG or JPEG signature image bytes
+            **options: SignatureConfig placement fields, e.g. keywords, signature_position,
+                skip_non_empty, x_coord/y_coord, page_numbers, signature_size, engine,
+                save_mode ("incremental" is written as a full save), search hints and item_id
+            
+        Returns:
+            bytes: Signed PDF document
+            
+        Raises:
+            ValueError: If an option is invalid
+        """
+        fitz = _import_fitz()
+        
+        options.setdefault('engine', "pymupdf")
+        config = SignatureConfig(working_folder="", input_pdf_filename="<memory>", item_id=options.pop('item_id', ""),
+                                 signature_filename="<memory>", **options)
+        self._validate_options(config)
+        if config.placements:
+            raise ValueError("sign_bytes takes a single signature image; use process_documents for placements")
+        
+        signature_asset = _signature_asset_from_bytes(bytes(signature), None)
+        if config.signature_size is None:
+            # Natural size: position and insert with the image's DPI-based size in points
+            config = replace(config, signature_size=signature_asset.point_size)
+        
+        pdf_document = fitz.open(stream=pdf, filetype="pdf")
+        try:
+            # Only the pdfplumber engine reads the PDF a second time, from the same buffer.
+            # Without a file name the search is never sharded across worker processes.
+            pdf_source = io.BytesIO(pdf) if config.engine == "pdfplumber" else None
+            self._place_signatures(pdf_document, pdf_source, config, signature_asset, _DocumentReport())
+            
+            if config.save_mode == "incremental":
+                logger.warning("Incremental updates need a file, writing a full copy instead")
+            signed = pdf_document.tobytes(**self._save_options(config.save_mode))
+            logger.info(f"Signed in-memory PDF ({len(signed)} bytes)")
+            return signed
+        finally:
+            pdf_document.close()
+
+    def sign_stream(self, input_stream: BinaryIO, output_stream: BinaryIO, signature: Union[bytes, BinaryIO],
+                    **options) -> int:
+        """
+        Sign a PDF read from a binary stream and write the signed document to another.
+        
+        Args:
+            input_stream: Readable binary stream positioned at the start of the PDF
+            output_stream: Writable binary stream receiving the signed PDF
+            signature: Signature image bytes or readable binary stream
+            **options: Placement options, as for sign_bytes
+            
+        Returns:
+            int: Number of bytes written
+        """
+        if not isinstance(signature, (bytes, bytearray, memoryview)):
+            signature = signature.read()
+        signed = self.sign_bytes(input_stream.read(), signature, **options)
+        output_stream.write(signed)
+        return len(signed)
+
+    def _output_path(self, config: SignatureConfig) -> str:
+        """Get the path the signed PDF is written to: output_path, or signed_<name> next to the input."""
+        return _signed_output_path(config)
+
+    def _signing_inputs(self, config: SignatureConfig) -> Dict[str, str]:
+        """Get the input files of a document by role: the PDF and each signature image."""
+        inputs = {'pdf': os.path.join(config.working_folder, config.input_pdf_filename)}
+        for index, placement_config in enumerate(self._placement_configs(config)):
+            inputs[f'signature{index}'] = os.path.join(config.working_folder, placement_config.signature_filename)
+        return inputs
+
+    def _config_digest(self, config: SignatureConfig) -> str:
+        """Hash the config fields that affect the signed output."""
+        options = asdict(config)
+        options.pop('item_id')
+        return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _is_unchanged(self, config: SignatureConfig, output_path: str) -> bool:
+        """
+        Check whether a document was already signed from the same inputs.
+        
+        File contents are only re-hashed when a file's size or modification time
+        differs from the record, so an unchanged document costs a few stat calls.
+        
+        Args:
+            config: SignatureConfig object
+            output_path: Path of the signed PDF
+            
+        Returns:
+            bool: True if the output exists and matches the recorded inputs
+        """
+        try:
+            with open(_signing_record_path(output_path), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            if record.get('version') != SIGNING_RECORD_VERSION or record['config'] != self._config_digest(config):
+                return False
+            if _file_stat(output_path) != record['output']['stat']:
+                return False
+            
+            inputs = self._signing_inputs(config)
+            if _same_file(inputs['pdf'], output_path):
+                # Signed in place: the input now is the output checked above
+                del inputs['pdf']
+            if set(inputs) - set(record['inputs']):
+                return False
+            for role, path in inputs.items():
+                recorded = record['inputs'][role]
+                if _file_stat(path) != recorded['stat'] and _file_digest(path) != recorded['digest']:
+                    return False
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _write_signing_record(self, config: SignatureConfig, output_path: str, input_stats: Dict[str, List[int]]) -> None:
+        """
+        Record the digests of the inputs a document was signed from next to its output.
+        
+        Args:
+            config: SignatureConfig object
+            output_path: Path of the signed PDF
+            input_stats: Stat of each input taken before signing, so a file changed
+                during signing is re-hashed on the next run
+        """
+        inputs = {}
+        for role, path in self._signing_inputs(config).items():
+            if role == 'pdf' and _same_file(path, output_path):
+                # The original is gone after signing in place; its digest is not needed
+                continue
+            inputs[role] = {'stat': input_stats[role], 'digest': _file_digest(path)}
+        record = {
+            'version': SIGNING_RECORD_VERSION,
+            'config': self._config_digest(config),
+            'inputs': inputs,
+            'output': {'stat': _file_stat(output_path)},
+        }
+        record_path = _signing_record_path(output_path)
+        temp_path = _partial_path(record_path)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(temp_path, record_path)
+
+    def _save_options(self, save_mode: str) -> dict:
+        """
+        Get the fitz save arguments for a save mode.
+        
+        Args:
+            save_mode: "full" or "compact"
+            
+        Returns:
+            dict: Keyword arguments for Document.save / Document.tobytes
+        """
+        if save_mode == "compact":
+            # Lossless: removes unused/duplicate objects and deflates streams
+            return dict(garbage=3, deflate=True, deflate_images=True, deflate_fonts=True)
+        # Save with no image compression to preserve original quality
+        return dict(deflate_images=False, deflate=False)
+
+    def _save_document(self, pdf_document: "fitz.Document", output_path: str, save_mode: str) -> None:
+        """
+        Save the signed document and close it.
+        
+        The document is written to a temporary file next to output_path and moved into
+        place once complete, so output_path never holds a partial PDF, even if the
+        process is killed while saving.
+        
+        Args:
+            pdf_document: Document with the signatures inserted; for "incremental", opened
+                from its temporary copy (see _add_signature_to_pdf)
+            output_path: Path to write the signed PDF to
+            save_mode: "full" rewrites the document without compression (original quality),
+                "incremental" appends only the changes to the copy the document was opened
+                from, "compact" rewrites it with garbage collection and stream compression
+        """
+        if save_mode == "incremental":
+            if pdf_document.can_save_incrementally():
+                copy_path = pdf_document.name
+                pdf_document.saveIncr()
+                pdf_document.close()
+                os.replace(copy_path, output_path)
+                return
+            logger.warning("Document cannot be updated incrementally, writing a full copy instead")
+        
+        # PyMuPDF cannot overwrite the file a document is open from, hence a separate name
+        # when it was opened from the incremental copy
+        target_path = _partial_path(output_path)
+        if _same_file(pdf_document.name, target_path):
+            target_path = _partial_path(output_path, stage=".full")
+        try:
+            pdf_document.save(target_path, **self._save_options(save_mode))
+            pdf_document.close()
+            os.replace(target_path, output_path)
+        finally:
+            if os.path.exists(target_path):
+                os.remove(target_path)
+
+    def process_documents(self, configs: List[SignatureConfig], max_workers: Optional[int] = None,
+                          stats: Optional[BatchStats] = None) -> List[SignatureResult]:
+        """
+        Process multiple PDF documents with signatures.
+        
+        The batch is planned first (see plan_batch): configs that read the same input
+        PDF are processed together, so its text layer is extracted once for all of them.
+        In parallel, groups that use files written by other groups wait for them (see
+        _plan_waves); the inputs are then probed for their size and the largest tasks
+        are dispatched first, so a few long documents do not run alone at the end.
+        
+        Args:
+            configs: List of SignatureConfig objects
+            max_workers: Number of worker processes to fan the documents out to;
+                None or 1 processes them sequentially in this process
+            stats: Receives the probe time and makespan of the batch when given
+            
+        Returns:
+            List[SignatureResult]: Results of the processing, in the order of configs
+        """
+        configs = list(configs)
+        groups = self.plan_batch(configs)
+        results: List[Optional[SignatureResult]] = [None] * len(configs)
+        stats = stats if stats is not None else BatchStats()
+        stats.documents = len(configs)
+        stats.tasks, stats.probe_seconds, stats.largest_task_pages = 0, 0.0, 0
+        
+        parallel = max_workers is not None and max_workers > 1
+        if self.document_timeout is not None or parallel:
+            # Waves run one after another, so a group starts once the files it uses are final
+            started = None
+            for wave in (self._plan_waves(groups) if parallel else [groups]):
+                if parallel:
+                    units = self._schedule_groups(wave, max_workers, stats)
+                else:
+                    units = [(group.positions, group.configs) for group in wave]
+                    stats.tasks += len(units)
+                if started is None:
+                    started = time.perf_counter()
+                unit_configs = (part_configs for _, part_configs in units)
+                if self.document_timeout is not None:
+                    unit_results = self._iter_process_groups_supervised(unit_configs, max_workers or 1)
+                else:
+                    unit_results = self._iter_process_groups_parallel(unit_configs, max_workers)
+                for (positions, _), group_results in zip(units, unit_results):
+                    for position, result in zip(positions, group_results):
+                        results[position] = result
+            if started is None:
+                started = time.perf_counter()
+        else:
+            stats.tasks = len(groups)
+            started = time.perf_counter()
+            for group in groups:
+                for position, result in zip(group.positions, self._iter_process_group(group.configs)):
+                    results[position] = result
+        
+        stats.makespan_seconds = time.perf_counter() - started
+        logger.info(f"Batch of {stats.documents} documents finished in {stats.makespan_seconds:.2f}s "
+                    f"({stats.tasks} tasks, {stats.probe_seconds:.3f}s probing)")
+        return results
+
+    def _plan_waves(self, groups: List[DocumentGroup]) -> List[List[DocumentGroup]]:
+        """
+        Arrange the groups of a batch into waves whose groups can run concurrently.
+        
+        A group goes in the wave after the last earlier group it conflicts with: one
+        that writes a file the group reads or writes, or reads a file the group writes.
+        Running the waves in order therefore gives the same files as running the groups
+        in plan order. Dry runs write nothing, so all their groups form one wave.
+        
+        Args:
+            groups: Groups from plan_batch, in plan order
+            
+        Returns:
+            List of waves, each a list of groups in plan order
+        """
+        waves: List[List[DocumentGroup]] = []
+        # Last wave that reads / writes each file
+        last_read: Dict[str, int] = {}
+        last_write: Dict[str, int] = {}
+        for group in groups:
+            reads, writes = self._group_files(group)
+            wave = 1 + max([last_write.get(key, -1) for key in reads | writes] +
+                           [last_read.get(key, -1) for key in writes] + [-1])
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(group)
+            for key in reads:
+                last_read[key] = max(last_read.get(key, -1), wave)
+            for key in writes:
+                last_write[key] = max(last_write.get(key, -1), wave)
+        if len(waves) > 1:
+            logger.info(f"Batch runs in {len(waves)} waves, as some documents read or write files of others")
+        return waves
+
+    def _group_files(self, group: DocumentGroup) -> tuple[set, set]:
+        """
+        Get the files a group reads and writes, as normalized absolute paths.
+        
+        Args:
+            group: Group from plan_batch
+            
+        Returns:
+            Tuple of (read paths, written paths)
+        """
+        reads = {os.path.normcase(os.path.abspath(group.pdf_path))}
+        if self.dry_run:
+            return reads, set()
+        return reads, {os.path.normcase(os.path.abspath(self._output_path(config))) for config in group.configs}
+
+    def _schedule_groups(self, groups: List[DocumentGroup], max_workers: int,
+                         stats: BatchStats) -> List[tuple[List[int], List[SignatureConfig]]]:
+        """
+        Split the groups of a wave into worker tasks, largest first.
+        
+        A task's size is estimated as the input's page count times its number of configs
+        (file size breaks ties). Dispatching the largest tasks first keeps the batch's
+        wall time close to its longest task instead of depending on manifest order.
+        A group is only split when its configs write distinct files other than their
+        input, since its configs otherwise have to run in order.
+        
+        Args:
+            groups: Groups of one wave from _plan_waves
+            max_workers: Number of worker processes
+            stats: Accumulates the task count and probe time
+            
+        Returns:
+            List of (positions, configs) tasks in dispatch order
+        """
+        probe_started = time.perf_counter()
+        sizes = [_probe_document(group.pdf_path) for group in groups]
+        stats.probe_seconds += time.perf_counter() - probe_started
+        
+        # Large groups are split so that every worker has a share of a small batch
+        parts_per_group = -(-max_workers // len(groups)) if groups else 1
+        units = []
+        for group, (page_count, file_size) in zip(groups, sizes):
+            reads, writes = self._group_files(group)
+            splittable = self.dry_run or (len(writes) == len(group.configs) and not reads & writes)
+            part_size = -(-len(group.configs) // parts_per_group) if splittable else len(group.configs)
+            for start in range(0, len(group.configs), part_size):
+                part_configs = group.configs[start:start + part_size]
+                cost = (page_count * len(part_configs), file_size * len(part_configs))
+                units.append((cost, group.positions[start:start + part_size], part_configs))
+        
+        # Stable, so equally sized tasks keep manifest order
+        units.sort(key=lambda unit: unit[0], reverse=True)
+        stats.tasks += len(units)
+        stats.largest_task_pages = max(stats.largest_task_pages, units[0][0][0] if units else 0)
+        return [(positions, part_configs) for _, positions, part_configs in units]
+
+    def plan_batch(self, configs: List[SignatureConfig]) -> List[DocumentGroup]:
+        """
+        Group the configs of a batch by the input PDF they read.
+        
+        Groups are listed in the order their first config appears, with their configs
+        in batch order, and are meant to run in that order. A config only joins an
+        earlier group when that cannot change what any config reads or which config
+        writes a file last: a config that reads a file written by an earlier config of
+        the batch (e.g. a second in-place signer) starts a new group, and so does one
+        whose output is read or written by a group after the one it would join.
+        
+        Args:
+            configs: List of SignatureConfig objects
+            
+        Returns:
+            List[DocumentGroup]: The groups; together they hold every config once
+        """
+        groups: List[DocumentGroup] = []
+        # Group that configs reading a given file (at its current write count) can still join
+        open_groups: Dict[tuple[str, int], int] = {}
+        # Number of times each file has been written by the configs seen so far
+        writes: Dict[str, int] = {}
+        # Index of the last group that reads or writes each file
+        last_use: Dict[str, int] = {}
+        for position, config in enumerate(configs):
+            pdf_path = os.path.join(config.working_folder, config.input_pdf_filename)
+            pdf_key = os.path.normcase(os.path.abspath(pdf_path))
+            output_key = None if self.dry_run else os.path.normcase(os.path.abspath(self._output_path(config)))
+            key = (pdf_key, writes.get(pdf_key, 0))
+            index = open_groups.get(key)
+            if index is not None and output_key is not None and last_use.get(output_key, -1) > index:
+                # Running this config with its group would reorder it before a later use of its output
+                index = None
+            if index is None:
+                index = open_groups[key] = len(groups)
+                groups.append(DocumentGroup(pdf_path=pdf_path))
+            group = groups[index]
+            group.positions.append(position)
+            group.configs.append(config)
+            for placement_config in self._placement_configs(config):
+                signature_path = os.path.join(config.working_folder, placement_config.signature_filename)
+                if signature_path not in group.signature_paths:
+                    group.signature_paths.append(signature_path)
+            
+            last_use[pdf_key] = max(last_use.get(pdf_key, -1), index)
+            if output_key is not None:
+                writes[output_key] = writes.get(output_key, 0) + 1
+                last_use[output_key] = max(last_use.get(output_key, -1), index)
+        
+        signature_count = len({path for group in groups for path in group.signature_paths})
+        logger.info(f"Batch plan: {len(configs)} configs, {len(groups)} input documents, {signature_count} signature images")
+        return groups
+
+    def iter_process_documents(self, configs: Iterable[SignatureConfig], max_workers: Optional[int] = None,
+                               ordered: bool = True) -> Iterator[SignatureResult]:
+        """
+        Process PDF documents, yielding each result as soon as its document is done.
+        
+        Configs are consumed lazily, so only the documents in flight are held in memory.
+        Consecutive configs that read the same input PDF share its extracted text layer;
+        in parallel runs up to MAX_RUN_LENGTH of them go to the same worker.
+        
+        Args:
+            configs: Iterable of SignatureConfig objects
+            max_workers: Number of worker processes; None or 1 processes the documents
+                sequentially in this process
+            ordered: Yield results in the order of configs; if False, parallel results are
+                yielded in completion order
+            
+        Returns:
+            Iterator[SignatureResult]: Results of the processing
+        """
+        if self.document_timeout is not None:
+            # Workers share parsed pages between the consecutive configs they are sent
+            single = ([config] for config in configs)
+            for results in self._iter_process_groups_supervised(single, max_workers or 1, ordered):
+                yield from results
+        elif max_workers is not None and max_workers > 1:
+            runs = _iter_consecutive_runs(configs)
+            for run_results in self._iter_process_groups_parallel(runs, max_workers, ordered):
+                yield from run_results
+        else:
+            yield from self._iter_process_group(configs)
+
+    def _iter_process_group(self, configs: Iterable[SignatureConfig]) -> Iterator[SignatureResult]:
+        """
+        Process configs in this process, sharing the parsed text layer of an input PDF
+        between consecutive configs that read it.
+        
+        Args:
+            configs: Iterable of SignatureConfig objects, consumed lazily
+            
+        Returns:
+            Iterator[SignatureResult]: Results of the processing, in the order of configs
+        """
+        parsed_pages = None
+        previous_key = None
+        for config in configs:
+            key = (config.working_folder, config.input_pdf_filename)
+            # Keeping every page of the document would defeat low_memory's one-page bound
+            if key != previous_key and not self.low_memory:
+                parsed_pages = _ParsedPages()
+            previous_key = key
+            yield self._process_document(config, parsed_pages)
+
+    async def asign(self, config: SignatureConfig, executor: Optional["Executor"] = None,
+                    timeout: Optional[float] = None) -> SignatureResult:
+        """
+        Process a single document without blocking the event loop.
+        
+        The work runs in worker processes, built with this processor's options: a pool
+        owned by the processor when executor is None (started on first use, shut down by
+        close()), or the given ProcessPoolExecutor. PyMuPDF is not thread-safe, so a
+        thread executor runs one document at a time across all threads.
+        
+        With a timeout and no executor, the document runs in a supervised worker that
+        is killed when the timeout expires (see _SupervisedWorker), so nothing of it
+        keeps running or is written afterwards. Work already started in a caller's
+        executor cannot be interrupted: it runs to completion in the background and
+        may still write its output, which the failed result says.
+        
+        Args:
+            config: SignatureConfig object
+            executor: concurrent.futures executor to run the document in
+            timeout: Seconds to wait for the document; None waits indefinitely
+            
+        Returns:
+            SignatureResult: Result of the processing
+        """
+        import asyncio
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        
+        loop = asyncio.get_running_loop()
+        if executor is None and timeout is not None:
+            worker = (self._idle_async_workers.pop() if self._idle_async_workers
+                      else _SupervisedWorker(self._worker_options, timeout, self.memory_limit_mb))
+            worker.timeout = timeout
+            try:
+                # The calling thread only waits on the worker's pipe
+                return await loop.run_in_executor(None, worker.run, config)
+            finally:
+                self._idle_async_workers.append(worker)
+        
+        if executor is None:
+            if self._async_executor is None:
+                self._async_executor = ProcessPoolExecutor(initializer=_init_worker,
+                                                           initargs=(_worker_log_level(), self._worker_options))
+            pool = self._async_executor
+            future = loop.run_in_executor(pool, _process_document_in_worker, config)
+        elif isinstance(executor, ProcessPoolExecutor):
+            pool = executor
+            future = loop.run_in_executor(executor, _process_document_with_options, config, self._worker_options)
+        else:
+            pool = None
+            future = loop.run_in_executor(executor, self._process_document_exclusively, config)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out waiting for document {config.input_pdf_filename} after {timeout}s; "
+                         f"it is still being processed by the executor")
+            return self._failed_result(config, f"Timed out after {timeout}s; the executor is still processing "
+                                               f"the document and may write its output", ERROR_TIMEOUT)
+        except BrokenProcessPool:
+            logger.error(f"Worker process crashed while processing document {config.input_pdf_filename}")
+            # A broken pool rejects every later document; the processor's own pool is restarted
+            if pool is self._async_executor:
+                self._async_executor = None
+                pool.shutdown(wait=False)
+            return self._failed_result(config, "Worker process crashed while processing document",
+                                       ERROR_WORKER_CRASHED)
+
+    def _process_document_exclusively(self, config: SignatureConfig) -> SignatureResult:
+        """Process a document in a caller-supplied thread, one at a time as PyMuPDF is not thread-safe."""
+        with _fitz_thread_lock:
+            return self._process_document(config)
+
+    def close(self) -> None:
+        """Shut down the worker processes started by asign or aprocess_documents, if any."""
+        if self._async_executor is not None:
+            self._async_executor.shutdown()
+            self._async_executor = None
+        while self._idle_async_workers:
+            self._idle_async_workers.pop().close()
+
+    async def aprocess_documents(self, configs: Iterable[SignatureConfig], max_concurrency: int = 4,
+                                 executor: Optional["Executor"] = None,
+                                 timeout: Optional[float] = None) -> List[SignatureResult]:
+        """
+        Process documents concurrently without blocking the event loop.
+        
+        At most max_concurrency documents are submitted to the executor at a time.
+        Cancelling the call cancels the documents that have not started yet.
+        
+        Args:
+            configs: Iterable of SignatureConfig objects
+            max_concurrency: Maximum number of documents in flight
+            executor: concurrent.futures executor, as for asign; None uses the processor's own
+                process pool
+            timeout: Per-document timeout in seconds, as for asign; without an executor,
+                a document is stopped when it times out
+            
+        Returns:
+            List[SignatureResult]: Results of the processing, in the order of configs
+        """
+        import asyncio
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def sign_when_ready(config: SignatureConfig) -> SignatureResult:
+            async with semaphore:
+                return await self.asign(config, executor=executor, timeout=timeout)
+        
+        return list(await asyncio.gather(*(sign_when_ready(config) for config in configs)))
+
+    def _process_document(self, config: SignatureConfig, parsed_pages: Optional[_ParsedPages] = None) -> SignatureResult:
+        """
+        Process a single PDF document, turning any failure into a failed result.
+        
+        Args:
+            config: SignatureConfig object
+            parsed_pages: Text layer shared with the other configs of a group, if any
+            
+        Returns:
+            SignatureResult: Result of the processing
+        """
+        report = _DocumentReport(metrics=DocumentMetrics() if self.collect_metrics else None,
+                                 parsed_pages=parsed_pages)
+        started = time.perf_counter()
+        try:
+            with report.stage("validate"):
+                if not self._validate_input(config):
+                    raise ValueError("Invalid input configuration")
+            
+            if self.skip_unchanged and not self.dry_run:
+                output_path = self._output_path(config)
+                if self._is_unchanged(config, output_path):
+                    logger.info(f"Unchanged since last signed, skipping: {config.input_pdf_filename}")
+                    return SignatureResult(
+                        input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
+                        item_id=config.item_id,
+                        output_pdf_path=output_path,
+                        success=True,
+                        metrics=self._finish_metrics(report, started),
+                        cached=True
+                    )
+                input_stats = {role: _file_stat(path) for role, path in self._signing_inputs(config).items()}
+            
+            if self.dry_run:
+                planned = self._locate_document(config, report)
+                if report.metrics is not None:
+                    report.metrics.placements = len(planned)
+                return SignatureResult(
+                    input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
+                    item_id=config.item_id,
+                    output_pdf_path="",
+                    success=True,
+                    layout_cache=report.layout_cache,
+                    metrics=self._finish_metrics(report, started),
+                    planned_signatures=planned,
+                    skipped_matches=report.skipped_matches
+                )
+            
+            output_path = self._add_signature_to_pdf(config, report)
+            if self.skip_unchanged:
+                try:
+                    self._write_signing_record(config, output_path, input_stats)
+                except OSError as e:
+                    logger.warning(f"Could not write signing record for {output_path}: {str(e)}")
+            
+            logger.info(f"Successfully processed document: {config.input_pdf_filename}")
+            return SignatureResult(
+                input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
+                item_id=config.item_id,
+                output_pdf_path=output_path,
+                success=True,
+                layout_cache=report.layout_cache,
+                metrics=self._finish_metrics(report, started),
+                placements=report.placements
+            )
+            
+        except Exception as e:
+            logger.error(f"Error processing document {config.input_pdf_filename}: {str(e)}")
+            result = self._failed_result(config, str(e))
+            if isinstance(e, MemoryLimitExceeded):
+                result.error_code = ERROR_MEMORY_LIMIT
+            result.metrics = self._finish_metrics(report, started)
+            return result
+
+    def _finish_metrics(self, report: _DocumentReport, started: float) -> Optional[DocumentMetrics]:
+        """Record the total time and peak memory of a document, if metrics are collected."""
+        metrics = report.metrics
+        if metrics is not None:
+            metrics.stage_seconds["total"] = time.perf_counter() - started
+            metrics.peak_rss_bytes = _peak_rss_bytes()
+        return metrics
+
+    def _failed_result(self, config: SignatureConfig, error_message: str,
+                       error_code: Optional[str] = None) -> SignatureResult:
+        """Build the result reported for a document that could not be signed."""
+        return SignatureResult(
+            input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
+            item_id=config.item_id,
+            output_pdf_path="",
+            success=False,
+            error_message=error_message,
+            error_code=error_code
+        )
+
+    def profile_document(self, config: SignatureConfig, stats_path: str) -> SignatureResult:
+        """
+        Process a single document under cProfile and dump the profile.
+        
+        The dump can be inspected with pstats or snakeviz, e.g.
+        python -m pstats signature.prof
+        
+        Args:
+            config: SignatureConfig object
+            stats_path: File to write the cProfile statistics to
+            
+        Returns:
+            SignatureResult: Result of the processing
+        """
+        import cProfile
+        
+        profiler = cProfile.Profile()
+        result = profiler.runcall(self._process_document, config)
+        profiler.dump_stats(stats_path)
+        logger.info(f"Profile of {config.input_pdf_filename} written to: {stats_path}")
+        return result
+
+    def _iter_process_groups_parallel(self, groups: Iterable[List[SignatureConfig]], max_workers: int,
+                                      ordered: bool = True) -> Iterator[List[SignatureResult]]:
+        """
+        Process groups of configs in a pool of worker processes, one group per task.
+        
+        At most two groups per worker are in flight. If a worker process dies, the
+        pool breaks and every in-flight group fails with it; the documents of those
+        groups are re-run one at a time in their own process so that only the document
+        that actually crashes is reported as failed, then the batch continues in a new pool.
+        
+        Args:
+            groups: Iterable of lists of SignatureConfig objects, each for one input PDF
+            max_workers: Number of worker processes
+            ordered: Yield results in the order of groups rather than completion order
+            
+        Returns:
+            Iterator[List[SignatureResult]]: Results of each group, in the order of its configs
+        """
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        from concurrent.futures.process import BrokenProcessPool
+        
+        group_iter = iter(groups)
+        finished: Dict[int, List[SignatureResult]] = {}
+        next_to_yield = 0
+        submitted = 0
+        exhausted = False
+        
+        def ready_results() -> Iterator[List[SignatureResult]]:
+            nonlocal next_to_yield
+            if not ordered:
+                yield from finished.values()
+                finished.clear()
+                return
+            while next_to_yield in finished:
+                yield finished.pop(next_to_yield)
+                next_to_yield += 1
+        
+        while not exhausted:
+            crashed = []
+            kept = self._kept_workers == max_workers
+            if kept and self._kept_pool is None:
+                self._kept_pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                                      initargs=(_worker_log_level(), self._worker_options))
+            executor = self._kept_pool if kept else ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_worker, initargs=(_worker_log_level(), self._worker_options))
+            in_flight = {}
+            try:
+                while True:
+                    while not exhausted and not crashed and len(in_flight) < max_workers * 2:
+                        group = next(group_iter, None)
+                        if group is None:
+                            exhausted = True
+                            break
+                        in_flight[executor.submit(_process_group_in_worker, group)] = (submitted, group)
+                        submitted += 1
+                    if not in_flight:
+                        break
+                    
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        position, group = in_flight.pop(future)
+                        try:
+                            finished[position] = future.result()
+                        except BrokenProcessPool:
+                            crashed.append((position, group))
+                        except Exception as e:
+                            logger.error(f"Error processing document {group[0].input_pdf_filename}: {str(e)}")
+                            finished[position] = [self._failed_result(config, str(e)) for config in group]
+                    yield from ready_results()
+            finally:
+                if not kept:
+                    executor.shutdown(cancel_futures=True)
+                else:
+                    # The kept pool outlives this batch: drop the work of a caller that stopped early
+                    for future in in_flight:
+                        future.cancel()
+                    if crashed:
+                        self._kept_pool = None
+                        executor.shutdown(wait=False)
+            
+            if crashed:
+                logger.warning(f"Worker process crashed, re-running the documents of {len(crashed)} in-flight groups individually")
+                for position, group in sorted(crashed, key=lambda item: item[0]):
+                    finished[position] = [self._process_document_isolated(config) for config in group]
+                yield from ready_results()
+
+    @contextmanager
+    def keep_workers(self, max_workers: Optional[int]) -> Iterator[None]:
+        """
+        Keep one pool of worker processes for every parallel batch run with max_workers
+        inside the block, instead of starting a pool per batch.
+        
+        Workers import PyMuPDF and pdfplumber and build their processor once, which
+        matters where processes are spawned rather than forked (Windows). A pool broken
+        by a crashed worker is replaced for the next batch.
+        
+        Args:
+            max_workers: Size of the kept pool; None or 1 keeps nothing, as batches
+                then run in this process
+        """
+        if max_workers is None or max_workers <= 1:
+            yield
+            return
+        self._kept_workers = max_workers
+        try:
+            yield
+        finally:
+            self._kept_workers = None
+            if self._kept_pool is not None:
+                self._kept_pool.shutdown()
+                self._kept_pool = None
+
+    def _iter_process_groups_supervised(self, groups: Iterable[List[SignatureConfig]], max_workers: int,
+                                        ordered: bool = True) -> Iterator[List[SignatureResult]]:
+        """
+        Process groups of configs in supervised worker processes that enforce the
+        per-document time and memory limits (see _SupervisedWorker).
+        
+        Each of the max_workers threads drives one worker process and sends it the
+        configs of a group one at a time. At most two groups per worker are in flight.
+        
+        Args:
+            groups: Iterable of lists of SignatureConfig objects
+            max_workers: Number of worker processes
+            ordered: Yield results in the order of groups rather than completion order
+            
+        Returns:
+            Iterator[List[SignatureResult]]: Results of each group, in the order of its configs
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        workers: List[_SupervisedWorker] = []
+        idle: deque = deque()
+        lock = threading.Lock()
+        
+        def run_group(group: List[SignatureConfig]) -> List[SignatureResult]:
+            with lock:
+                worker = idle.pop() if idle else None
+                if worker is None:
+                    worker = _SupervisedWorker(self._worker_options, self.document_timeout, self.memory_limit_mb)
+                    workers.append(worker)
+            try:
+                return [worker.run(config) for config in group]
+            finally:
+                with lock:
+                    idle.append(worker)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                yield from _iter_bounded_map(executor, run_group, groups, max_workers * 2, ordered)
+        finally:
+            for worker in workers:
+                worker.close()
+
+    def _process_document_isolated(self, config: SignatureConfig) -> SignatureResult:
+        """
+        Process a single document in its own worker process.
+        
+        Args:
+            config: SignatureConfig object
+            
+        Returns:
+            SignatureResult: Result of the processing, failed if the worker process crashed
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                 initargs=(_worker_log_level(), self._worker_options)) as executor:
+            try:
+                return executor.submit(_process_document_in_worker, config).result()
+            except BrokenProcessPool:
+                logger.error(f"Worker process crashed while processing document {config.input_pdf_filename}")
+                return self._failed_result(config, "Worker process crashed while processing document",
+                                           ERROR_WORKER_CRASHED)
+
+    def _get_actual_signature_size(self, config: SignatureConfig) -> tuple[float, float]:
+        """
+        Get the actual size the signature will be when placed in the PDF.
+        Only used when signature_size is explicitly specified.
+        
+        Args:
+            config: SignatureConfig object
+            
+        Returns:
+            Tuple of (width, height) in points for the signature
+        """
+        if config.signature_size is not None:
+            logger.info(f"Using specified signature_size: {config.signature_size}")
+            return config.signature_size
+        else:
+            # This method should not be called when signature_size is None
+            raise ValueError("_get_actual_signature_size called when signature_size is None")
+
+# Processor owned by each worker process of a parallel batch
+_worker_processor: Optional[PDFSignatureProcessor] = None
+
+def _init_worker(log_level: Optional[int] = None, processor_options: Optional[dict] = None) -> None:
+    """
+    Create the processor used by this worker process.
+    
+    Args:
+        log_level: Level to configure logging with in workers that do not inherit the
+            parent's handlers (spawned rather than forked); None leaves logging alone
+        processor_options: Keyword arguments for the PDFSignatureProcessor
+    """
+    global _worker_processor
+    if log_level is not None and not logging.getLogger().handlers:
+        configure_logging(log_level)
+    _worker_processor = PDFSignatureProcessor(**(processor_options or {}))
+
+def _worker_log_level() -> Optional[int]:
+    """Get the log level worker processes should use, if logging is configured here."""
+    root = logging.getLogger()
+    return root.level if root.handlers else None
+
+def _process_document_in_worker(config: SignatureConfig) -> SignatureResult:
+    """Process one document inside a worker process."""
+    return _worker_processor._process_document(config)
+
+def _search_page_shard(pdf_path: str, keywords: List[str], config: SignatureConfig, collect_skipped: bool,
+                       collect_pages: bool) -> tuple[list, DocumentMetrics, Optional[List[list]]]:
+    """Search one page shard of a document inside a shard worker process."""
+    return _worker_processor._search_shard(pdf_path, keywords, config, collect_skipped, collect_pages)
+
+def _process_group_in_worker(configs: List[SignatureConfig]) -> List[SignatureResult]:
+    """Process the configs of one input PDF inside a worker process."""
+    return list(_worker_processor._iter_process_group(configs))
+
+def _supervised_worker_main(connection, log_level: Optional[int], processor_options: dict) -> None:
+    """
+    Serve documents in a supervised worker process: receive configs until None, send back each result.
+    
+    Args:
+        connection: Pipe end shared with the _SupervisedWorker
+        log_level: Level to configure logging with, as for _init_worker
+        processor_options: Keyword arguments for the PDFSignatureProcessor
+    """
+    _init_worker(log_level, processor_options)
+    for result in _worker_processor._iter_process_group(iter(connection.recv, None)):
+        connection.send(result)
+
+class _SupervisedWorker:
+    """
+    A worker process that signs one document at a time while the parent watches it.
+    
+    The parent waits for each result with a deadline and, when a memory limit is set,
+    samples the worker's resident size every POLL_SECONDS. A worker that overruns
+    either limit or dies is killed and replaced by a new one on the next document.
+    """
+    
+    POLL_SECONDS = 0.1
+
+    def __init__(self, processor_options: dict, timeout: Optional[float], memory_limit_mb: Optional[float]):
+        self.processor_options = processor_options
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._process = None
+        self._connection = None
+
+    def _start(self) -> None:
+        import multiprocessing
+        
+        self._connection, child_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_supervised_worker_main, daemon=True,
+                                                args=(child_connection, _worker_log_level(), self.processor_options))
+        self._process.start()
+        child_connection.close()
+
+    def _kill(self) -> None:
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def run(self, config: SignatureConfig) -> SignatureResult:
+        """
+        Process one document in the worker process, within the limits.
+        
+        Args:
+            config: SignatureConfig object
+            
+        Returns:
+            SignatureResult: The worker's result, or a failed result with an error_code
+            when the document was stopped
+        """
+        if self._process is None:
+            self._start()
+        try:
+            self._connection.send(config)
+        except OSError:
+            # The worker exited since its last document
+            return self._stop(config, "Worker process crashed while processing document", ERROR_WORKER_CRASHED)
+        
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        while True:
+            wait = self.POLL_SECONDS if self.memory_limit_mb is not None else None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+                wait = remaining if wait is None else min(wait, remaining)
+            if self._connection.poll(wait):
+                try:
+                    return self._connection.recv()
+                except EOFError:
+                    return self._stop(config, "Worker process crashed while processing document", ERROR_WORKER_CRASHED)
+            if not self._process.is_alive():
+                return self._stop(config, "Worker process crashed while processing document", ERROR_WORKER_CRASHED)
+            if deadline is not None and time.monotonic() >= deadline:
+                return self._stop(config, f"Timed out after {self.timeout}s", ERROR_TIMEOUT)
+            if self.memory_limit_mb is not None:
+                rss = _process_rss_bytes(self._process.pid)
+                if rss is not None and rss > self.memory_limit_mb * 1024 * 1024:
+                    return self._stop(config, f"Memory limit of {self.memory_limit_mb} MB exceeded "
+                                              f"({rss / (1024 * 1024):.0f} MB in use)", ERROR_MEMORY_LIMIT)
+
+    def _stop(self, config: SignatureConfig, error_message: str, error_code: str) -> SignatureResult:
+        """Kill the worker and report the document it was processing as failed."""
+        logger.error(f"Stopping worker on document {config.input_pdf_filename}: {error_message}")
+        pid = self._process.pid
+        self._kill()
+        # A worker killed while saving leaves its temporary files, never a partial output
+        _remove_partial_outputs(_signed_output_path(config), pid)
+        return SignatureResult(
+            input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
+            item_id=config.item_id,
+            output_pdf_path="",
+            success=False,
+            error_message=error_message,
+            error_code=error_code
+        )
+
+    def close(self) -> None:
+        """Let the worker process exit, killing it if it does not."""
+        if self._process is None:
+            return
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._kill()
+        else:
+            self._connection.close()
+            self._process = None
+            self._connection = None
+
+def _iter_bounded_map(executor: "Executor", function: Callable, items: Iterable, limit: int,
+                      ordered: bool = True) -> Iterator:
+    """
+    Map a function over items in an executor, with at most limit calls in flight.
+    
+    Items are consumed lazily. Results are yielded in the order of items, or in
+    completion order if ordered is False.
+    
+    Args:
+        executor: concurrent.futures executor to run the calls in
+        function: Function to call with each item
+        items: Iterable of arguments
+        limit: Maximum number of calls submitted and not yet yielded
+        ordered: Keep the order of items
+        
+    Returns:
+        Iterator of the function's results
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    
+    pending = deque()
+    
+    def next_results() -> Iterator:
+        if ordered:
+            yield pending.popleft().result()
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield future.result()
+    
+    for item in items:
+        pending.append(executor.submit(function, item))
+        while len(pending) >= limit:
+            yield from next_results()
+    while pending:
+        yield from next_results()
+
+# Longest run of consecutive same-document configs that iter_process_documents processes together
+MAX_RUN_LENGTH = 16
+
+def _iter_consecutive_runs(configs: Iterable[SignatureConfig]) -> Iterator[List[SignatureConfig]]:
+    """
+    Split a stream of configs into runs of consecutive configs that read the same input PDF.
+    
+    Args:
+        configs: Iterable of SignatureConfig objects
+        
+    Returns:
+        Iterator of lists of at most MAX_RUN_LENGTH configs, in the order of configs
+    """
+    run: List[SignatureConfig] = []
+    run_key = None
+    for config in configs:
+        key = (config.working_folder, config.input_pdf_filename)
+        if run and (key != run_key or len(run) >= MAX_RUN_LENGTH):
+            yield run
+            run = []
+        run.append(config)
+        run_key = key
+    if run:
+        yield run
+
+_worker_processor_options: Optional[dict] = None
+
+def _process_document_with_options(config: SignatureConfig, processor_options: dict) -> SignatureResult:
+    """Process one document in a worker of a caller-supplied pool, reusing its processor between calls."""
+    global _worker_processor, _worker_processor_options
+    if _worker_processor is None or _worker_processor_options != processor_options:
+        _worker_processor = PDFSignatureProcessor(**processor_options)
+        _worker_processor_options = processor_options
+    return _worker_processor._process_document(config)
+
+def config_from_json(config_data: dict) -> SignatureConfig:
+    """
+    Convert a camelCase JSON config (as sent by the C# host) to a SignatureConfig.
+    
+    Args:
+        config_data: Dictionary parsed from JSON
+        
+    Returns:
+        SignatureConfig: The corresponding config object
+    """
+    return SignatureConfig(
+        working_folder=config_data.get('workingFolder', ''),
+        input_pdf_filename=config_data.get('inputPdfFilename', ''),
+        item_id=config_data.get('itemId', ''),
+        signature_filename=config_data.get('signatureFilename', ''),
+        keywords=config_data.get('keywords', []),
+        signature_size=tuple(config_data['signatureSize']) if config_data.get('signatureSize') else None,
+        output_path=config_data.get('outputPath'),
+        x_coord=config_data.get('xCoord'),
+        y_coord=config_data.get('yCoord'),
+        page_numbers=config_data.get('pageNumbers'),
+        skip_non_empty=config_data.get('skipNonEmpty', False),
+        signature_position=config_data.get('signaturePosition', 'top'),
+        engine=config_data.get('engine') or 'pdfplumber',
+        save_mode=config_data.get('saveMode') or 'full',
+        search_pages=config_data.get('searchPages'),
+        search_region=tuple(config_data['searchRegion']) if config_data.get('searchRegion') else None,
+        max_matches_per_keyword=config_data.get('maxMatchesPerKeyword'),
+        placements=[placement_from_json(p) for p in config_data['placements']] if config_data.get('placements') else None
+    )
+
+def config_to_json(config: SignatureConfig) -> dict:
+    """
+    Convert a SignatureConfig to the camelCase JSON shape read by config_from_json.
+    
+    Args:
+        config: SignatureConfig object
+        
+    Returns:
+        dict: JSON-serializable dictionary
+    """
+    return {
+        'workingFolder': config.working_folder,
+        'inputPdfFilename': config.input_pdf_filename,
+        'itemId': config.item_id,
+        'signatureFilename': config.signature_filename,
+        'keywords': config.keywords,
+        'signatureSize': list(config.signature_size) if config.signature_size else None,
+        'outputPath': config.output_path,
+        'xCoord': config.x_coord,
+        'yCoord': config.y_coord,
+        'pageNumbers': config.page_numbers,
+        'skipNonEmpty': config.skip_non_empty,
+        'signaturePosition': config.signature_position,
+        'engine': config.engine,
+        'saveMode': config.save_mode,
+        'searchPages': config.search_pages,
+        'searchRegion': list(config.search_region) if config.search_region else None,
+        'maxMatchesPerKeyword': config.max_matches_per_keyword,
+        'placements': [
+            {
+                'signatureFilename': placement.signature_filename,
+                'keywords': placement.keywords,
+                'signaturePosition': placement.signature_position,
+                'signatureSize': list(placement.signature_size) if placement.signature_size else None,
+                'skipNonEmpty': placement.skip_non_empty,
+                'xCoord': placement.x_coord,
+                'yCoord': placement.y_coord,
+                'pageNumbers': placement.page_numbers,
+                'name': placement.name
+            }
+            for placement in config.placements
+        ] if config.placements else None
+    }
+
+def iter_manifest(stream: TextIO, chunk_size: int = 65536) -> Iterator[SignatureConfig]:
+    """
+    Read configs from a manifest lazily, one at a time.
+    
+    The manifest is either a JSON array of configs, parsed incrementally, or JSON
+    Lines with one config object per line. Memory use depends on the config being
+    read, not on the size of the manifest.
+    
+    Args:
+        stream: Text stream of the manifest
+        chunk_size: Number of characters read from the stream at a time
+        
+    Returns:
+        Iterator[SignatureConfig]: Configs in manifest order
+        
+    Raises:
+        ValueError: If the manifest is not valid JSON or JSON Lines
+    """
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if not first:
+        return
+    
+    if first == '[':
+        items = _iter_json_array(stream, chunk_size)
+    else:
+        items = _iter_json_lines(first + stream.readline(), stream)
+    for config_data in items:
+        yield config_from_json(config_data)
+
+def _iter_json_lines(first_line: str, stream: TextIO) -> Iterator[dict]:
+    """Parse one JSON object per non-blank line, starting with an already-read first line."""
+    for line_number, line in enumerate(itertools.chain([first_line], stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on manifest line {line_number}: {e.msg}")
+
+def _iter_json_array(stream: TextIO, chunk_size: int) -> Iterator[dict]:
+    """Parse the elements of a JSON array whose opening bracket has already been read."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    
+    def fill() -> None:
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        # Drop what has been parsed already so the buffer only holds the current element
+        buffer, pos = buffer[pos:] + chunk, 0
+    
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos] if pos < len(buffer) else ""
+            fill()
+    
+    if next_char() == ']':
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f"Invalid JSON in manifest array: {e.msg}")
+                fill()
+                continue
+            # A value that ends exactly at the end of the buffer may continue in the next chunk
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            break
+        pos = end
+        yield item
+        
+        separator = next_char()
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"Invalid JSON in manifest array: expected ',' or ']' but found {separator!r}")
+
+def placement_from_json(placement_data: dict) -> SignaturePlacement:
+    """
+    Convert a camelCase JSON placement to a SignaturePlacement.
+    
+    Args:
+        placement_data: Dictionary parsed from JSON
+        
+    Returns:
+        SignaturePlacement: The corresponding placement object
+    """
+    return SignaturePlacement(
+        signature_filename=placement_data.get('signatureFilename', ''),
+        keywords=placement_data.get('keywords'),
+        signature_position=placement_data.get('signaturePosition', 'top'),
+        signature_size=tuple(placement_data['signatureSize']) if placement_data.get('signatureSize') else None,
+        skip_non_empty=placement_data.get('skipNonEmpty', False),
+        x_coord=placement_data.get('xCoord'),
+        y_coord=placement_data.get('yCoord'),
+        page_numbers=placement_data.get('pageNumbers'),
+        name=placement_data.get('name')
+    )
+
+def result_to_json(result: SignatureResult) -> dict:
+    """
+    Convert a SignatureResult to the camelCase JSON shape read by the C# host.
+    
+    Args:
+        result: SignatureResult object
+        
+    Returns:
+        dict: JSON-serializable dictionary
+    """
+    return {
+        'inputPdfPath': result.input_pdf_path,
+        'itemId': result.item_id,
+        'outputPdfPath': result.output_pdf_path,
+        'success': result.success,
+        'errorMessage': result.error_message,
+        'errorCode': result.error_code,
+        'layoutCache': result.layout_cache,
+        'cached': result.cached,
+        'metrics': metrics_to_json(result.metrics) if result.metrics is not None else None,
+        'placements': [
+            {
+                'name': placement.name,
+                'signatureFilename': placement.signature_filename,
+                'locations': [list(location) for location in placement.locations]
+            }
+            for placement in result.placements
+        ] if result.placements is not None else None,
+        'plannedSignatures': [
+            {
+                'pageNumber': planned.page_number,
+                'x': planned.x,
+                'y': planned.y,
+                'width': planned.width,
+                'height': planned.height,
+                'signatureFilename': planned.signature_filename,
+                'name': planned.name
+            }
+            for planned in result.planned_signatures
+        ] if result.planned_signatures is not None else None,
+        'skippedMatches': [
+            {
+                'pageNumber': match.page_number,
+                'keyword': match.keyword,
+                'x': match.x,
+                'y': match.y,
+                'content': match.content
+            }
+            for match in result.skipped_matches
+        ] if result.skipped_matches is not None else None
+    }
+
+def metrics_to_json(metrics: DocumentMetrics) -> dict:
+    """
+    Convert DocumentMetrics to the camelCase JSON shape read by the C# host.
+    
+    Args:
+        metrics: DocumentMetrics object
+        
+    Returns:
+        dict: JSON-serializable dictionary
+    """
+    return {
+        'stageSeconds': metrics.stage_seconds,
+        'pagesScanned': metrics.pages_scanned,
+        'wordsExtracted': metrics.words_extracted,
+        'matchesFound': metrics.matches_found,
+        'matchesSkipped': metrics.matches_skipped,
+        'placements': metrics.placements,
+        'outputBytes': metrics.output_bytes,
+        'peakRssBytes': metrics.peak_rss_bytes
+    }
+
+def serve(processor: PDFSignatureProcessor, input_stream: TextIO, output_stream: TextIO,
+          max_workers: Optional[int] = None) -> None:
+    """
+    Serve JSON-lines requests until the input stream reaches EOF.
+    
+    Each input line is either a JSON array of configs or an object
+    {"id": ..., "configs": [...]}. Each request produces exactly one output line
+    {"id": ..., "results": [...], "errorMessage": ...} echoing the request id, so
+    the caller can correlate responses. The processor, its caches, the imported
+    modules and (with max_workers) its worker processes stay loaded between requests.
+    
+    Args:
+        processor: Processor used for every request
+        input_stream: Stream to read requests from (stdin)
+        output_stream: Stream to write responses to (stdout)
+        max_workers: Number of worker processes, as in process_documents; one pool is
+            kept for all requests
+    """
+    logger.info("Serving JSON-lines requests")
+    # The same worker processes serve every request
+    with processor.keep_workers(max_workers):
+        for line in input_stream:
+            if not line.strip():
+                continue
+            
+            request_id = None
+            try:
+                request = json.loads(line)
+                if isinstance(request, dict):
+                    request_id = request.get('id')
+                    configs_data = request.get('configs', [])
+                else:
+                    configs_data = request
+                
+                configs = [config_from_json(config_data) for config_data in configs_data]
+                results = processor.process_documents(configs, max_workers=max_workers)
+                response = {
+                    'id': request_id,
+                    'results': [result_to_json(result) for result in results],
+                    'errorMessage': None
+                }
+            except Exception as e:
+                logger.error(f"Error handling request {request_id}: {str(e)}")
+                response = {'id': request_id, 'results': [], 'errorMessage': str(e)}
+            
+            output_stream.write(json.dumps(response) + "\n")
+            output_stream.flush()
+    
+    logger.info("Input closed, shutting down")
+
+class JobQueue:
+    """
+    Durable queue of signing jobs in a SQLite file, drained by any number of worker
+    processes (see drain_queue).
+    
+    Workers claim jobs with a lease; a job whose lease expires because its worker died
+    or stalled is handed out again, up to max_attempts times. Each result is journaled
+    as soon as its job completes, so a crashed run resumes with the unfinished jobs
+    only. Jobs are keyed by their config, so enqueueing the same manifest again adds
+    nothing. Hosts sharing the file need a filesystem with working SQLite locking and
+    roughly synchronized clocks.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600.0, max_attempts: int = 3):
+        """
+        Open (or create) the queue.
+        
+        Args:
+            path: Path to the SQLite queue file
+            lease_seconds: How long a claimed job stays with its worker without progress
+            max_attempts: Claims after which a job whose lease keeps expiring is given
+                up and journaled as failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be shared with forked worker processes
+        if self._connection is None or self._connection_pid != os.getpid():
+            # Autocommit mode, so that claims can take the write lock up front with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, config TEXT NOT NULL, "
+                "state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "worker TEXT, lease_expires REAL, result TEXT, finished_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def enqueue(self, configs: Iterable[SignatureConfig], chunk_size: int = 500) -> int:
+        """
+        Add jobs, skipping configs that are already queued.
+        
+        Args:
+            configs: Iterable of SignatureConfig objects, consumed lazily
+            chunk_size: Number of jobs inserted per transaction
+            
+        Returns:
+            int: Number of jobs added
+        """
+        added = 0
+        config_iter = iter(configs)
+        while True:
+            rows = []
+            for config in itertools.islice(config_iter, chunk_size):
+                config_json = json.dumps(config_to_json(config), sort_keys=True)
+                rows.append((_job_key(config_json), config_json))
+            if not rows:
+                break
+            with self._lock:
+                connection = self._connect()
+                connection.execute("BEGIN IMMEDIATE")
+                before = connection.total_changes
+                connection.executemany("INSERT OR IGNORE INTO jobs (key, config) VALUES (?, ?)", rows)
+                added += connection.total_changes - before
+                connection.execute("COMMIT")
+        logger.info(f"Enqueued {added} jobs")
+        return added
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[tuple[int, SignatureConfig]]:
+        """
+        Atomically lease the next pending jobs, including jobs whose lease expired.
+        
+        Args:
+            worker_id: Identifier of the claiming worker
+            limit: Maximum number of jobs to claim
+            
+        Returns:
+            List of (job_id, config) in enqueue order; empty when nothing is claimable
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._abandon_expired(connection, now)
+                rows = connection.execute(
+                    "SELECT id, config FROM jobs WHERE state = 'pending' "
+                    "OR (state = 'claimed' AND lease_expires < ?) ORDER BY id LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+                connection.executemany(
+                    "UPDATE jobs SET state = 'claimed', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    [(worker_id, now + self.lease_seconds, job_id) for job_id, _ in rows]
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return [(job_id, config_from_json(json.loads(config_json))) for job_id, config_json in rows]
+
+    def _abandon_expired(self, connection: sqlite3.Connection, now: float) -> None:
+        """Journal jobs whose lease expired max_attempts times as failed instead of handing them out again."""
+        rows = connection.execute(
+            "SELECT id, config, attempts FROM jobs WHERE state = 'claimed' AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts)
+        ).fetchall()
+        for job_id, config_json, attempts in rows:
+            config = config_from_json(json.loads(config_json))
+            logger.error(f"Giving up job {job_id} ({config.input_pdf_filename}) after {attempts} expired leases")
+            result = SignatureResult(
+                input_pdf_path=os.path.join(config.working_folder, config.input_pdf_filename),
+                item_id=config.item_id,
+                output_pdf_path="",
+                success=False,
+                error_message=f"Abandoned after {attempts} attempts whose worker did not finish",
+                error_code=ERROR_WORKER_CRASHED
+            )
+            connection.execute(
+                "UPDATE jobs SET state = 'done', result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result_to_json(result)), now, job_id)
+            )
+
+    def extend(self, job_ids: List[int], worker_id: str) -> None:
+        """Renew the lease of jobs still held by a worker."""
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND state = 'claimed' AND worker = ?",
+                [(time.time() + self.lease_seconds, job_id, worker_id) for job_id in job_ids]
+            )
+
+    def holds(self, config: SignatureConfig, worker_id: str) -> bool:
+        """
+        Check that a worker still holds an unexpired lease on the job of a config.
+        
+        Args:
+            config: Config of a claimed job
+            worker_id: Worker that claimed it
+            
+        Returns:
+            bool: True if the job is claimed by the worker and its lease has not expired
+        """
+        key = _job_key(json.dumps(config_to_json(config), sort_keys=True))
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM jobs WHERE key = ? AND state = 'claimed' AND worker = ? AND lease_expires >= ?",
+                (key, worker_id, time.time())
+            ).fetchone()
+        return row is not None
+
+    def complete(self, job_id: int, worker_id: str, result: SignatureResult) -> bool:
+        """
+        Journal the result of a job.
+        
+        Args:
+            job_id: Job returned by claim
+            worker_id: Worker that claimed it
+            result: Result of the job
+            
+        Returns:
+            bool: False if the lease was lost to another worker, which then owns the job
+        """
+        with self._lock:
+            connection = self._connect()
+            cursor = connection.execute(
+                "UPDATE jobs SET state = 'done', result = ?, finished_at = ? "
+                "WHERE id = ? AND state = 'claimed' AND worker = ?",
+                (json.dumps(result_to_json(result)), time.time(), job_id, worker_id)
+            )
+        if cursor.rowcount != 1:
+            logger.warning(f"Lease of job {job_id} was lost, result discarded")
+            return False
+        return True
+
+    def next_lease_expiry(self) -> Optional[float]:
+        """Get the time the earliest outstanding lease expires, or None if no job is claimed."""
+        with self._lock:
+            row = self._connect().execute("SELECT MIN(lease_expires) FROM jobs WHERE state = 'claimed'").fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of jobs in each state: pending, claimed and done."""
+        with self._lock:
+            rows = self._connect().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {'pending': 0, 'claimed': 0, 'done': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def results(self) -> Iterator[dict]:
+        """
+        Read the journal.
+        
+        Returns:
+            Iterator of result_to_json dictionaries of the finished jobs, in enqueue order
+        """
+        with self._lock:
+            rows = self._connect().execute("SELECT result FROM jobs WHERE state = 'done' ORDER BY id").fetchall()
+        for (result_json,) in rows:
+            yield json.loads(result_json)
+
+    def close(self) -> None:
+        """Close the connection owned by this process."""
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+def _job_key(config_json: str) -> str:
+    """Get the queue key of a job from its canonical config JSON."""
+    return hashlib.sha256(config_json.encode('utf-8')).hexdigest()
+
+@dataclass
+class _LeaseGuard:
+    """Save guard of drain_queue: a document is only written while its job is leased to the worker."""
+    queue_path: str
+    worker_id: str
+
+    def __call__(self, config: SignatureConfig) -> bool:
+        queue = JobQueue(self.queue_path)
+        try:
+            if queue.holds(config, self.worker_id):
+                return True
+        finally:
+            queue.close()
+        logger.warning(f"Lease of {config.input_pdf_filename} was lost, not writing the signed document")
+        return False
+
+class _LeaseHeartbeat:
+    """
+    Renews the leases of a worker's unfinished jobs from a background thread, so a
+    document that takes longer than the lease is not handed to another worker.
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: str, job_ids: List[int]):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.job_ids = list(job_ids)  # Replaced, never mutated, as jobs finish
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "_LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def finished(self, job_id: int) -> None:
+        """Stop renewing the lease of a completed job."""
+        self.job_ids = [other for other in self.job_ids if other != job_id]
+
+    def _run(self) -> None:
+        # Several renewals per lease, so one slow SQLite write does not lose it
+        while not self._stopped.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.extend(self.job_ids, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not renew job leases: {str(e)}")
+
+def drain_queue(processor: PDFSignatureProcessor, queue: JobQueue, worker_id: Optional[str] = None,
+                batch_size: int = 4, poll_seconds: float = 1.0) -> int:
+    """
+    Process queued jobs until none is left, journaling each result as it completes.
+    
+    Jobs are claimed batch_size at a time in enqueue order, so consecutive configs for
+    the same PDF share its parsed text layer. Their leases are renewed in the background
+    while they run, and a document is only written while its lease is still held. When only other workers' jobs are left,
+    the worker waits for their leases to expire (or the jobs to finish) before
+    returning, so a worker that died does not leave its jobs behind.
+    
+    Args:
+        processor: Processor used for every job
+        queue: Queue to drain
+        worker_id: Lease owner name; defaults to "<host>:<pid>"
+        batch_size: Number of jobs claimed at a time
+        poll_seconds: Longest wait between claims while other workers hold leases
+        
+    Returns:
+        int: Number of jobs this worker completed
+    """
+    if worker_id is None:
+        import socket
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    
+    # Documents are only written while their job is still leased to this worker
+    guard = processor.save_guard
+    processor.save_guard = processor._worker_options['save_guard'] = _LeaseGuard(queue.path, worker_id)
+    completed = 0
+    try:
+        while True:
+            jobs = queue.claim(worker_id, batch_size)
+            if not jobs:
+                next_expiry = queue.next_lease_expiry()
+                if next_expiry is None:
+                    break
+                time.sleep(min(max(next_expiry - time.time(), 0.01), poll_seconds))
+                continue
+            
+            job_ids = [job_id for job_id, _ in jobs]
+            with _LeaseHeartbeat(queue, worker_id, job_ids) as heartbeat:
+                results = processor.iter_process_documents([config for _, config in jobs])
+                for job_id, result in zip(job_ids, results):
+                    heartbeat.finished(job_id)
+                    if queue.complete(job_id, worker_id, result):
+                        completed += 1
+    finally:
+        processor.save_guard = processor._worker_options['save_guard'] = guard
+    
+    logger.info(f"Worker {worker_id} finished: {completed} jobs completed")
+    return completed
+
+def _drain_queue_in_process(queue_path: str, queue_options: dict, processor_options: dict,
+                            log_level: Optional[int]) -> None:
+    """Drain a queue in a worker process started by the command line queue mode."""
+    if log_level is not None and not logging.getLogger().handlers:
+        configure_logging(log_level)
+    queue = JobQueue(queue_path, **queue_options)
+    try:
+        drain_queue(PDFSignatureProcessor(**processor_options), queue)
+    finally:
+        queue.close()
+
 if __name__ == "__main__":
-    import sys
-    import json
+    import argparse
+    
+    configure_logging()
     
     # Check if command line arguments are provided (for C# integration)
     if len(sys.argv) > 1:
+        parser = argparse.ArgumentParser(description="Add signature images to PDF documents")
+        parser.add_argument("config_file", nargs="?",
+                            help="Manifest of signature configs: a JSON array or JSON Lines, '-' for stdin")
+        parser.add_argument("--max-workers", type=int, default=None,
+                            help="Number of worker processes (default: process documents sequentially)")
+        parser.add_argument("--ndjson", action="store_true",
+                            help="Write one JSON result per line as each document finishes instead of one array at the end")
+        parser.add_argument("--layout-cache", default=None,
+                            help="SQLite file caching keyword placements of repeat templates")
+        parser.add_argument("--low-memory", action="store_true",
+                            help="Keep memory bounded by one page while searching very large documents")
+        parser.add_argument("--memory-limit-mb", type=float, default=None,
+                            help="Fail a document when the process grows past this many MB while searching it")
+        parser.add_argument("--document-timeout", type=float, default=None, metavar="SECONDS",
+                            help="Run documents in supervised workers and fail any that takes longer than this "
+                                 "(or grows past --memory-limit-mb) with errorCode \"timeout\" (\"memory_limit\")")
+        parser.add_argument("--shard-min-pages", type=int, default=None, metavar="PAGES",
+                            help="Search documents with at least this many pages in parallel page ranges")
+        parser.add_argument("--shard-workers", type=int, default=None,
+                            help="Processes searching the page ranges of one document (default: CPU count)")
+        parser.add_argument("--skip-unchanged", action="store_true",
+                            help="Skip documents already signed from the same PDF, signature and config")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only validate and locate: report planned signatures and skipped matches, write no PDFs")
+        parser.add_argument("--metrics", action="store_true",
+                            help="Include per-stage timings and counters in each result")
+        parser.add_argument("--profile", metavar="STATS_FILE", default=None,
+                            help="Profile the (single) document in config_file with cProfile and write the stats here")
+        parser.add_argument("--queue", metavar="QUEUE_FILE", default=None,
+                            help="Work through a SQLite job queue: enqueue config_file (if given), drain the queue "
+                                 "with --max-workers processes, then write the journaled results")
+        parser.add_argument("--lease-seconds", type=float, default=600.0,
+                            help="Queue mode: how long a worker holds a job before it is handed out again")
+        parser.add_argument("--serve", action="store_true",
+                            help="Read one JSON request per line from stdin and write one JSON response per line to stdout")
+        args = parser.parse_args()
+        
+        processor_options = dict(layout_cache_path=args.layout_cache, collect_metrics=args.metrics,
+                                 low_memory=args.low_memory, memory_limit_mb=args.memory_limit_mb,
+                                 dry_run=args.dry_run, skip_unchanged=args.skip_unchanged,
+                                 document_timeout=args.document_timeout, shard_min_pages=args.shard_min_pages,
+                                 shard_workers=args.shard_workers)
+        if args.serve:
+            serve(PDFSignatureProcessor(**processor_options), sys.stdin, sys.stdout, max_workers=args.max_workers)
+            sys.exit(0)
+        if args.queue:
+            queue_options = dict(lease_seconds=args.lease_seconds)
+            queue = JobQueue(args.queue, **queue_options)
+            if args.config_file is not None:
+                manifest = sys.stdin if args.config_file == "-" else open(args.config_file, 'r', encoding='utf-8')
+                with manifest:
+                    queue.enqueue(iter_manifest(manifest))
+            if args.max_workers is not None and args.max_workers > 1:
+                import multiprocessing
+                
+                workers = [multiprocessing.Process(target=_drain_queue_in_process,
+                                                   args=(args.queue, queue_options, processor_options, _worker_log_level()))
+                           for _ in range(args.max_workers)]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+            else:
+                drain_queue(PDFSignatureProcessor(**processor_options), queue)
+            logger.info(f"Queue state: {queue.counts()}")
+            
+            if args.ndjson:
+                for result in queue.results():
+                    print(json.dumps(result))
+            else:
+                print(json.dumps(list(queue.results())))
+            sys.exit(0)
+        if args.config_file is None:
+            parser.error("config_file is required unless --serve or --queue is given")
+        
+        results_written = None
         try:
-            # Get JSON file path from command line argument
-            json_file_path = sys.argv[1]
-            
-            # Read JSON data from file
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                json_data = f.read()
-            
-            configs_data = json.loads(json_data)
-            
-            # Convert JSON data to SignatureConfig objects
-            configs = []
-            for config_data in configs_data:
-                config = SignatureConfig(
-                    working_folder=config_data.get('workingFolder', ''),
-                    input_pdf_filename=config_data.get('inputPdfFilename', ''),
-                    item_id=config_data.get('itemId', ''),
-                    signature_filename=config_data.get('signatureFilename', ''),
-                    keywords=config_data.get('keywords', []),
-                    signature_size=tuple(config_data['signatureSize']) if config_data.get('signatureSize') else None,
-                    output_path=config_data.get('outputPath'),
-                    x_coord=config_data.get('xCoord'),
-                    y_coord=config_data.get('yCoord'),
-                    page_numbers=config_data.get('pageNumbers'),
-                    skip_non_empty=config_data.get('skipNonEmpty', False),
-                    signature_position=config_data.get('signaturePosition', 'top')
-                )
-                configs.append(config)
-            
-            # Process the documents
-            processor = PDFSignatureProcessor()
-            results = processor.process_documents(configs)
-            
-            # Convert results to JSON format for C# consumption
-            json_results = []
-            for result in results:
-                json_results.append({
-                    'inputPdfPath': result.input_pdf_path,
-                    'itemId': result.item_id,
-                    'outputPdfPath': result.output_pdf_path,
-                    'success': result.success,
-                    'errorMessage': result.error_message
-                })
-            
-            # Print JSON results to stdout for C# to read
-            print(json.dumps(json_results))
+            # Read the manifest lazily: configs are parsed as the processor asks for them
+            manifest = sys.stdin if args.config_file == "-" else open(args.config_file, 'r', encoding='utf-8')
+            with manifest:
+                configs = iter_manifest(manifest)
+                
+                # Process the documents
+                processor = PDFSignatureProcessor(**processor_options)
+                if args.profile:
+                    configs = list(configs)
+                    if len(configs) != 1:
+                        raise ValueError("--profile needs a config file with exactly one document")
+                    results = [processor.profile_document(configs[0], args.profile)]
+                else:
+                    results = processor.iter_process_documents(configs, max_workers=args.max_workers)
+                
+                if args.ndjson:
+                    # Stream one result line per document so the caller can start on it immediately
+                    for result in results:
+                        print(json.dumps(result_to_json(result)), flush=True)
+                else:
+                    # Write the JSON array for C# element by element, without holding every result
+                    sys.stdout.write("[")
+                    results_written = 0
+                    for result in results:
+                        sys.stdout.write((", " if results_written else "") + json.dumps(result_to_json(result)))
+                        results_written += 1
+                    print("]")
             
         except Exception as e:
             # Print error in JSON format
-            error_result = [{
+            error_result = {
                 'inputPdfPath': '',
                 'itemId': '',
                 'outputPdfPath': '',
                 'success': False,
                 'errorMessage': str(e)
-            }]
-            print(json.dumps(error_result))
+            }
+            if args.ndjson:
+                print(json.dumps(error_result))
+            elif results_written is not None:
+                # Close the array that was already started
+                print((", " if results_written else "") + json.dumps(error_result) + "]")
+            else:
+                print(json.dumps([error_result]))
             sys.exit(1)
     else:
         # Original example usage when run directly
@@ -0,0 +1,1205 @@
+#!/usr/bin/env python3
+
+# Tests for PDFSignatureProcessor using small PDFs generated on the fly
+
+import io
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from dataclasses import replace
+
+import fitz
+import pdfplumber
+import pytest
+from PIL import Image
+
+import pdf_signature_processor
+from pdf_signature_processor import PDFSignatureProcessor, SignatureConfig
+
+
+def make_pdf(path, pages):
+    """Write a PDF where each page is a list of (x, baseline_y, text) entries."""
+    doc = fitz.open()
+    for entries in pages:
+        page = doc.new_page()
+        for x, y, text in entries:
+            page.insert_text((x, y), text, fontsize=11)
+    doc.save(str(path))
+    doc.close()
+
+
+def make_signature(path, size=(120, 40), dpi=(72, 72)):
+    Image.new("RGB", size, "white").save(str(path), dpi=dpi)
+
+
+FORM_PAGE = [
+    (72, 100, "AUTHORIZED SIGNATURE"),
+    (72, 200, "By:"),
+    (72, 215, "Name:"),
+    (300, 300, "By: John Doe"),
+    (300, 315, "Name: John Doe"),
+]
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    make_pdf(tmp_path / "form.pdf", [FORM_PAGE, FORM_PAGE])
+    make_signature(tmp_path / "signature.png")
+    return tmp_path
+
+
+def make_config(workdir, **kwargs):
+    options = dict(
+        working_folder=str(workdir),
+        input_pdf_filename="form.pdf",
+        item_id="item",
+        signature_filename="signature.png",
+    )
+    options.update(kwargs)
+    return SignatureConfig(**options)
+
+
+def assert_same_locations(actual, expected, tolerance=1.0):
+    assert len(actual) == len(expected)
+    for (page_a, x_a, y_a), (page_e, x_e, y_e) in zip(sorted(actual), sorted(expected)):
+        assert page_a == page_e
+        assert x_a == pytest.approx(x_e, abs=tolerance)
+        assert y_a == pytest.approx(y_e, abs=tolerance)
+
+
+@pytest.mark.parametrize("keywords, skip_non_empty, position", [
+    (["AUTHORIZED SIGNATURE"], False, "right"),
+    (["By:"], False, "top"),
+    (["By:"], True, "bottom"),
+    (["By:\nName:"], False, "left"),
+    (["By:\nName:"], True, "top"),
+])
+def test_pymupdf_engine_matches_pdfplumber(workdir, keywords, skip_non_empty, position):
+    processor = PDFSignatureProcessor()
+    pdf_path = str(workdir / "form.pdf")
+    results = {}
+    for engine in ("pdfplumber", "pymupdf"):
+        config = make_config(workdir, keywords=keywords, skip_non_empty=skip_non_empty,
+                             signature_position=position, engine=engine)
+        results[engine] = processor._find_keyword_locations(pdf_path, keywords, config)
+
+    assert results["pdfplumber"]
+    assert_same_locations(results["pymupdf"], results["pdfplumber"])
+
+
+def test_pymupdf_engine_parses_document_once(workdir, monkeypatch):
+    def fail_open(*args, **kwargs):
+        raise AssertionError("pdfplumber should not be used by the pymupdf engine")
+
+    monkeypatch.setattr(pdfplumber, "open", fail_open)
+    config = make_config(workdir, keywords=["By:"], skip_non_empty=True, engine="pymupdf")
+
+    results = PDFSignatureProcessor().process_documents([config])
+
+    assert results[0].success, results[0].error_message
+    with fitz.open(results[0].output_pdf_path) as signed:
+        assert all(len(page.get_images()) == 1 for page in signed)
+
+
+def test_invalid_engine_fails_validation(workdir):
+    config = make_config(workdir, keywords=["By:"], engine="ocr")
+
+    results = PDFSignatureProcessor().process_documents([config])
+
+    assert not results[0].success
+
+
+def test_keyword_matcher_agrees_with_substring_search():
+    keywords = ["By:", "sign here", "AUTHORIZED SIGNATURE", "sign", "here", "By:\nName:"]
+    words = [{"text": t, "x0": 10.0 * i, "x1": 10.0 * i + 8, "top": 0.0, "bottom": 10.0}
+             for i, t in enumerate("Please SIGN HERE or sign: hereafter By:John by: authorized signatures".split())]
+    index = pdf_signature_processor._PageWordIndex(words)
+    text = " ".join(w["text"] for w in words)
+
+    matches = pdf_signature_processor._KeywordMatcher(keywords).find_matches(text, lambda: index)
+
+    expected = []
+    for keyword in keywords:
+        if "\n" in keyword or keyword.lower() not in text.lower():
+            continue
+        tokens = keyword.lower().split()
+        for i in range(len(words)):
+            if all(i + j < len(words) and token in index.lowered[i + j] for j, token in enumerate(tokens)):
+                expected.append((keyword, i))
+    assert matches == expected
+
+
+def test_parallel_results_keep_input_order(workdir):
+    configs = [make_config(workdir, item_id=f"item{i}", keywords=["By:"], engine="pymupdf",
+                           output_path=str(workdir / f"out{i}.pdf")) for i in range(5)]
+    configs.insert(2, make_config(workdir, item_id="missing", input_pdf_filename="missing.pdf"))
+
+    results = PDFSignatureProcessor().process_documents(configs, max_workers=3)
+
+    assert [r.item_id for r in results] == [c.item_id for c in configs]
+    assert [r.success for r in results] == [True, True, False, True, True, True]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs forked workers")
+def test_parallel_worker_crash_fails_only_that_document(workdir, monkeypatch):
+    original = PDFSignatureProcessor._add_signature_to_pdf
+
+    def crash_on_item(self, config, *args):
+        if config.item_id == "crash":
+            os._exit(1)
+        return original(self, config, *args)
+
+    # Worker processes are forked, so they inherit the patched method
+    monkeypatch.setattr(PDFSignatureProcessor, "_add_signature_to_pdf", crash_on_item)
+    configs = [make_config(workdir, item_id=item_id, keywords=["By:"], output_path=str(workdir / f"{item_id}.pdf"))
+               for item_id in ("a", "crash", "b", "c")]
+
+    results = PDFSignatureProcessor().process_documents(configs, max_workers=2)
+
+    assert [r.item_id for r in results] == ["a", "crash", "b", "c"]
+    assert [r.success for r in results] == [True, False, True, True]
+    assert "crashed" in results[1].error_message
+
+
+def test_serve_answers_each_request_line(workdir):
+    config = {"workingFolder": str(workdir), "inputPdfFilename": "form.pdf", "itemId": "a",
+              "signatureFilename": "signature.png", "keywords": ["By:"]}
+    requests = "\n".join([
+        json.dumps({"id": "r1", "configs": [config]}),
+        "",
+        "not json",
+        json.dumps([dict(config, itemId="b")]),
+    ]) + "\n"
+    output = io.StringIO()
+
+    pdf_signature_processor.serve(PDFSignatureProcessor(), io.StringIO(requests), output)
+
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["id"] for r in responses] == ["r1", None, None]
+    assert responses[0]["results"][0]["success"] and responses[0]["results"][0]["itemId"] == "a"
+    assert responses[1]["results"] == [] and responses[1]["errorMessage"]
+    assert responses[2]["results"][0]["itemId"] == "b"
+
+
+def test_serve_keeps_one_worker_pool_for_all_requests(workdir, monkeypatch):
+    import concurrent.futures
+
+    pools = []
+
+    class CountingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", CountingPool)
+    configs = [{"workingFolder": str(workdir), "inputPdfFilename": "form.pdf", "itemId": f"item{i}",
+                "signatureFilename": "signature.png", "keywords": ["By:"], "outputPath": str(workdir / f"out{i}.pdf")}
+               for i in range(2)]
+    requests = "".join(json.dumps({"id": f"r{n}", "configs": configs}) + "\n" for n in range(3))
+    output = io.StringIO()
+    processor = PDFSignatureProcessor()
+
+    pdf_signature_processor.serve(processor, io.StringIO(requests), output, max_workers=2)
+
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["id"] for r in responses] == ["r0", "r1", "r2"]
+    assert all(result["success"] for r in responses for result in r["results"])
+    assert len(pools) == 1
+    assert processor._kept_pool is None
+
+
+def test_signature_image_embedded_once_per_document(workdir):
+    config = make_config(workdir, keywords=["By:", "AUTHORIZED SIGNATURE"], engine="pymupdf")
+
+    result = PDFSignatureProcessor().process_documents([config])[0]
+
+    assert result.success, result.error_message
+    with fitz.open(result.output_pdf_path) as signed:
+        placements = [image for page in signed for image in page.get_images()]
+        # Image and its soft mask (if any) are stored once, shared by every placement
+        assert len({image[0] for image in placements}) == 1
+        assert sum(len(page.get_image_rects(placements[0][0])) for page in signed) == 6
+
+
+def test_signature_asset_cache_reloads_changed_file(workdir):
+    path = str(workdir / "signature.png")
+    first = pdf_signature_processor.signature_asset_cache.get(path)
+    assert pdf_signature_processor.signature_asset_cache.get(path) is first
+
+    make_signature(workdir / "signature.png", size=(300, 100), dpi=(150, 150))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    second = pdf_signature_processor.signature_asset_cache.get(path)
+
+    assert second.pixel_size == (300, 100)
+    assert second.point_size == pytest.approx((144, 48), rel=1e-3)
+
+
+def test_iter_process_documents_is_lazy(workdir):
+    consumed = []
+
+    def configs():
+        for i in range(3):
+            consumed.append(i)
+            yield make_config(workdir, item_id=f"item{i}", keywords=["By:"], output_path=str(workdir / f"out{i}.pdf"))
+
+    results = PDFSignatureProcessor().iter_process_documents(configs())
+
+    assert next(results).item_id == "item0"
+    assert consumed == [0]
+    assert [r.item_id for r in results] == ["item1", "item2"]
+
+
+def test_explicit_coordinates_path_skips_pdfplumber_and_logging_setup(workdir):
+    script = f"""
+import logging, sys
+import pdf_signature_processor as p
+assert not logging.getLogger().handlers, "logging configured at import"
+config = p.SignatureConfig(working_folder={str(workdir)!r}, input_pdf_filename="form.pdf", item_id="a",
+                           signature_filename="signature.png", x_coord=50, y_coord=50)
+assert p.PDFSignatureProcessor().process_documents([config])[0].success
+assert "pdfplumber" not in sys.modules and "pdfminer" not in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(pdf_signature_processor.__file__))
+
+
+def test_incremental_save_appends_to_copy_of_original(workdir):
+    original = (workdir / "form.pdf").read_bytes()
+    config = make_config(workdir, keywords=["By:"], engine="pymupdf", save_mode="incremental")
+
+    result = PDFSignatureProcessor().process_documents([config])[0]
+
+    assert result.success, result.error_message
+    signed = (workdir / "signed_form.pdf").read_bytes()
+    assert signed.startswith(original) and len(signed) > len(original)
+    assert (workdir / "form.pdf").read_bytes() == original
+    with fitz.open(result.output_pdf_path) as doc:
+        assert all(doc_page.get_images() for doc_page in doc)
+
+
+@pytest.mark.parametrize("save_mode", ["full", "incremental", "compact"])
+def test_save_modes_can_sign_in_place(workdir, save_mode):
+    config = make_config(workdir, keywords=["By:"], save_mode=save_mode,
+                         output_path=str(workdir / "form.pdf"))
+
+    result = PDFSignatureProcessor().process_documents([config])[0]
+
+    assert result.success, result.error_message
+    with fitz.open(str(workdir / "form.pdf")) as doc:
+        assert all(doc_page.get_images() for doc_page in doc)
+    assert [p.name for p in workdir.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_compact_save_is_smaller_than_full(workdir):
+    sizes = {}
+    for save_mode in ("full", "compact"):
+        output_path = workdir / f"{save_mode}.pdf"
+        config = make_config(workdir, keywords=["By:"], save_mode=save_mode, output_path=str(output_path))
+        assert PDFSignatureProcessor().process_documents([config])[0].success
+        sizes[save_mode] = output_path.stat().st_size
+
+    assert sizes["compact"] < sizes["full"]
+
+
+def test_resolve_search_pages():
+    resolve = pdf_signature_processor._resolve_search_pages
+    assert resolve(None, 3) == [0, 1, 2]
+    assert resolve(["-2:"], 5) == [3, 4]
+    assert resolve([0, -1, "1:3", "7", -9], 5) == [0, 1, 2, 4]
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pymupdf"])
+def test_search_hints_limit_pages_and_region(workdir, engine):
+    make_pdf(workdir / "long.pdf", [FORM_PAGE] * 4)
+    processor = PDFSignatureProcessor()
+    pdf_path = str(workdir / "long.pdf")
+
+    def locate(**hints):
+        config = make_config(workdir, input_pdf_filename="long.pdf", keywords=["By:", "AUTHORIZED SIGNATURE"],
+                             engine=engine, **hints)
+        return processor._find_keyword_locations(pdf_path, config.keywords, config)
+
+    assert {page for page, _, _ in locate(search_pages=["-2:"])} == {2, 3}
+    # The top 20% of the page only holds "AUTHORIZED SIGNATURE"
+    assert len(locate(search_pages=[0], search_region=(0, 0, 1, 0.2))) == 1
+    assert len(locate(max_matches_per_keyword=1)) == 2
+
+
+def test_first_match_only_stops_extracting_pages(workdir, monkeypatch):
+    make_pdf(workdir / "long.pdf", [FORM_PAGE] * 5)
+    extracted = []
+    original = PDFSignatureProcessor._extract_pymupdf_page
+
+    def record(self, page, clip=None):
+        extracted.append(page.number)
+        return original(self, page, clip)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_extract_pymupdf_page", record)
+    config = make_config(workdir, input_pdf_filename="long.pdf", keywords=["By:"], engine="pymupdf",
+                         search_pages=["-3:"], max_matches_per_keyword=1)
+
+    locations = PDFSignatureProcessor()._find_keyword_locations(str(workdir / "long.pdf"), ["By:"], config)
+
+    assert [page for page, _, _ in locations] == [2]
+    assert extracted == [2]
+
+
+def test_layout_cache_skips_search_for_repeat_template(workdir, monkeypatch):
+    make_pdf(workdir / "copy.pdf", [FORM_PAGE, FORM_PAGE])
+    make_pdf(workdir / "changed.pdf", [FORM_PAGE[:-1] + [(300, 315, "Name: Jane Roe")], FORM_PAGE])
+    processor = PDFSignatureProcessor(layout_cache_path=str(workdir / "layouts.sqlite"))
+    searched = []
+    original = PDFSignatureProcessor._search_keyword_locations
+
+    def record(self, pdf_path, *args):
+        searched.append(os.path.basename(pdf_path))
+        return original(self, pdf_path, *args)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_search_keyword_locations", record)
+    configs = [make_config(workdir, item_id=name, input_pdf_filename=f"{name}.pdf", keywords=["By:"],
+                           output_path=str(workdir / f"{name}-signed.pdf"))
+               for name in ("form", "copy", "changed")]
+
+    results = processor.process_documents(configs)
+
+    assert [r.success for r in results] == [True, True, True]
+    assert [r.layout_cache for r in results] == ["miss", "hit", "miss"]
+    assert searched == ["form.pdf", "changed.pdf"]
+    signed = [fitz.open(r.output_pdf_path) for r in results[:2]]
+    assert [img["bbox"] for img in signed[0][0].get_image_info()] == \
+           [img["bbox"] for img in signed[1][0].get_image_info()]
+    # Different placement options never share an entry
+    assert processor.process_documents([make_config(workdir, item_id="left", keywords=["By:"],
+                                                    signature_position="left",
+                                                    output_path=str(workdir / "left.pdf"))])[0].layout_cache == "miss"
+
+
+def test_layout_cache_status_covers_every_placement(workdir):
+    processor = PDFSignatureProcessor(layout_cache_path=str(workdir / "layouts.sqlite"))
+    signer = pdf_signature_processor.SignaturePlacement("signature.png", keywords=["By:"])
+    witness = pdf_signature_processor.SignaturePlacement("signature.png", keywords=["Name:"])
+    configs = [make_config(workdir, item_id=item_id, placements=placements, output_path=str(workdir / f"{item_id}.pdf"))
+               for item_id, placements in (("first", [signer]), ("both", [signer, witness]), ("again", [signer, witness]))]
+
+    results = processor.process_documents(configs)
+
+    assert [r.layout_cache for r in results] == ["miss", "partial", "hit"]
+
+
+@pytest.mark.parametrize("inherited", [False, True])
+def test_layout_cache_sees_text_inside_form_xobjects(workdir, inherited):
+    # show_pdf_page draws the source page as a Form XObject, so both pages have the
+    # same content stream ("/fzFrm0 Do") and differ only in their resources
+    for name, y in (("high", 200), ("low", 600)):
+        make_pdf(workdir / f"{name}-source.pdf", [[(72, y, "By:")]])
+        wrapper = fitz.open()
+        with fitz.open(str(workdir / f"{name}-source.pdf")) as source:
+            page = wrapper.new_page(width=source[0].rect.width, height=source[0].rect.height)
+            page.show_pdf_page(page.rect, source, 0)
+        if inherited:
+            # Resources held by the page tree root and inherited by the page
+            parent = int(wrapper.xref_get_key(page.xref, "Parent")[1].split()[0])
+            wrapper.xref_set_key(parent, "Resources", wrapper.xref_get_key(page.xref, "Resources")[1])
+            wrapper.xref_set_key(page.xref, "Resources", "null")
+        wrapper.save(str(workdir / f"{name}.pdf"))
+        wrapper.close()
+    processor = PDFSignatureProcessor(layout_cache_path=str(workdir / "layouts.sqlite"))
+    configs = [make_config(workdir, item_id=name, input_pdf_filename=f"{name}.pdf", keywords=["By:"], engine="pymupdf",
+                           output_path=str(workdir / f"{name}-signed.pdf"))
+               for name in ("high", "low")]
+
+    results = processor.process_documents(configs)
+
+    assert [r.layout_cache for r in results] == ["miss", "miss"]
+    tops = [fitz.open(r.output_pdf_path)[0].get_image_info()[0]["bbox"][1] for r in results]
+    assert tops[1] - tops[0] == pytest.approx(400, abs=1)
+
+
+def test_benchmark_corpus_is_reproducible_and_signable(tmp_path):
+    import benchmark_signature
+
+    first = benchmark_signature.generate_corpus(str(tmp_path / "a"), seed=3, profiles=["letter", "contract"])
+    second = benchmark_signature.generate_corpus(str(tmp_path / "b"), seed=3, profiles=["letter", "contract"])
+
+    assert [{k: v for k, v in e.items() if k != "config"} for e in first] == \
+           [{k: v for k, v in e.items() if k != "config"} for e in second]
+    for entry in first:
+        text_a = [page.get_text() for page in fitz.open(str(tmp_path / "a" / f"{entry['profile']}.pdf"))]
+        text_b = [page.get_text() for page in fitz.open(str(tmp_path / "b" / f"{entry['profile']}.pdf"))]
+        assert text_a == text_b
+
+    latency = benchmark_signature.bench_latency(1, "pymupdf", seed=3, profiles=["contract"])
+    stages = latency["contract"]["median_seconds"]
+    assert set(stages) == {"total", *benchmark_signature.STAGES}
+    assert stages["find_keyword_locations"] > 0 and stages["save"] > 0
+
+
+def test_metrics_record_stages_and_counts(workdir, caplog):
+    config = make_config(workdir, keywords=["By:", "By:\nName:"], skip_non_empty=True)
+
+    assert PDFSignatureProcessor().process_documents([config])[0].metrics is None
+    with caplog.at_level("INFO", logger="pdf_signature_processor"):
+        result = PDFSignatureProcessor(collect_metrics=True).process_documents([config])[0]
+
+    metrics = result.metrics
+    assert set(metrics.stage_seconds) == {"validate", "open", "prepare_signature", "find_keywords",
+                                          "insert", "save", "total"}
+    assert metrics.stage_seconds["total"] >= metrics.stage_seconds["find_keywords"] > 0
+    assert metrics.pages_scanned == 2
+    # FORM_PAGE has 10 words on each page
+    assert metrics.words_extracted == 20
+    # Per page: By: twice and one By:/Name: block per keyword, the filled ones skipped
+    assert (metrics.matches_found, metrics.matches_skipped) == (8, 4)
+    assert metrics.placements == 2
+    assert metrics.output_bytes == os.path.getsize(result.output_pdf_path)
+    assert pdf_signature_processor.result_to_json(result)["metrics"]["placements"] == 2
+    # Per-line and per-match details are only logged at DEBUG
+    assert not any("Checking line" in r.getMessage() or "Placed signature" in r.getMessage()
+                   for r in caplog.records)
+
+
+def test_profile_document_writes_stats(workdir):
+    import pstats
+
+    stats_path = str(workdir / "signature.prof")
+    result = PDFSignatureProcessor().profile_document(make_config(workdir, keywords=["By:"]), stats_path)
+
+    assert result.success
+    functions = {name for _, _, name in pstats.Stats(stats_path).stats}
+    assert "_find_keyword_locations" in functions or "_locate_keywords" in functions
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pymupdf"])
+def test_low_memory_mode_releases_pages_and_keeps_results(workdir, monkeypatch, engine):
+    make_pdf(workdir / "long.pdf", [FORM_PAGE] * 6)
+    closed = []
+    original_close = pdfplumber.page.Page.close
+
+    def record_close(page):
+        closed.append(page.page_number)
+        original_close(page)
+
+    monkeypatch.setattr(pdfplumber.page.Page, "close", record_close)
+    config = make_config(workdir, input_pdf_filename="long.pdf", keywords=["By:"], engine=engine, skip_non_empty=True)
+    pdf_path = str(workdir / "long.pdf")
+
+    expected = PDFSignatureProcessor()._find_keyword_locations(pdf_path, config.keywords, config)
+    actual = PDFSignatureProcessor(low_memory=True)._find_keyword_locations(pdf_path, config.keywords, config)
+
+    assert actual == expected and len(actual) == 6
+    if engine == "pdfplumber":
+        assert sorted(set(closed)) == [1, 2, 3, 4, 5, 6]
+
+
+def test_memory_limit_fails_the_document(workdir):
+    processor = PDFSignatureProcessor(memory_limit_mb=1)
+
+    result = processor.process_documents([make_config(workdir, keywords=["By:"], x_coord=72, y_coord=72)])[0]
+
+    # The explicit coordinates are not used as a fallback when the search was aborted
+    assert not result.success
+    assert "Memory limit of 1 MB exceeded after page 1" in result.error_message
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pymupdf"])
+def test_sign_bytes_matches_file_based_signing(workdir, engine):
+    options = dict(keywords=["By:"], skip_non_empty=True, signature_position="right", engine=engine)
+    processor = PDFSignatureProcessor()
+    signed_path = processor.process_documents([make_config(workdir, **options)])[0].output_pdf_path
+    pdf_bytes = (workdir / "form.pdf").read_bytes()
+    signature_bytes = (workdir / "signature.png").read_bytes()
+
+    signed = processor.sign_bytes(memoryview(pdf_bytes), signature_bytes, **options)
+    streamed = io.BytesIO()
+    written = processor.sign_stream(io.BytesIO(pdf_bytes), streamed, io.BytesIO(signature_bytes), **options)
+
+    assert written == len(streamed.getvalue()) and streamed.getvalue()[:5] == b"%PDF-"
+    expected = [[img["bbox"] for img in page.get_image_info()] for page in fitz.open(signed_path)]
+    for data in (signed, streamed.getvalue()):
+        document = fitz.open(stream=data, filetype="pdf")
+        assert [[img["bbox"] for img in page.get_image_info()] for page in document] == expected
+
+
+def test_sign_bytes_falls_back_to_png_without_a_file(workdir, monkeypatch):
+    original = fitz.Page.insert_image
+    inserted = []
+
+    def reject_original_bytes(page, rect, **kwargs):
+        assert "filename" not in kwargs
+        if kwargs.get("stream") == signature_bytes:
+            raise RuntimeError("unsupported image")
+        if "stream" in kwargs:
+            inserted.append(kwargs["stream"][:8])
+        return original(page, rect, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "insert_image", reject_original_bytes)
+    signature_bytes = (workdir / "signature.png").read_bytes()
+
+    signed = PDFSignatureProcessor().sign_bytes((workdir / "form.pdf").read_bytes(), signature_bytes,
+                                                keywords=["AUTHORIZED SIGNATURE"], signature_position="right")
+
+    # Re-encoded once, then reused by xref for the second page
+    assert inserted == [b"\x89PNG\r\n\x1a\n"]
+    assert sum(len(page.get_image_info()) for page in fitz.open(stream=signed, filetype="pdf")) == 2
+
+
+def test_sign_bytes_raises_on_invalid_options(workdir):
+    with pytest.raises(ValueError, match="Invalid locator engine"):
+        PDFSignatureProcessor().sign_bytes((workdir / "form.pdf").read_bytes(),
+                                           (workdir / "signature.png").read_bytes(), engine="ocr")
+
+
+def test_placements_sign_several_signers_in_one_save(workdir, monkeypatch):
+    make_pdf(workdir / "loan.pdf", [[(72, 200, "Lender:"), (300, 200, "Borrower:")],
+                                    [(72, 700, "Initials:"), (300, 700, "Initials:")]])
+    make_signature(workdir / "initials.png", size=(40, 20))
+    saves = []
+    original_save = PDFSignatureProcessor._save_document
+
+    def record_save(self, pdf_document, output_path, save_mode):
+        saves.append(output_path)
+        original_save(self, pdf_document, output_path, save_mode)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_save_document", record_save)
+    config = pdf_signature_processor.config_from_json({
+        "workingFolder": str(workdir), "inputPdfFilename": "loan.pdf", "itemId": "loan",
+        "placements": [
+            {"name": "lender", "signatureFilename": "signature.png", "keywords": ["Lender:"]},
+            {"name": "borrower", "signatureFilename": "signature.png", "keywords": ["Borrower:"],
+             "signaturePosition": "right"},
+            {"name": "initials", "signatureFilename": "initials.png", "keywords": ["Initials:"]},
+            {"name": "witness", "signatureFilename": "signature.png", "keywords": ["Witness:"]},
+        ],
+    })
+
+    result = PDFSignatureProcessor().process_documents([config])[0]
+
+    assert result.success and saves == [result.output_pdf_path]
+    assert [(p.name, len(p.locations)) for p in result.placements] == \
+           [("lender", 1), ("borrower", 1), ("initials", 2), ("witness", 0)]
+    document = fitz.open(result.output_pdf_path)
+    # Both signers on page 1 share the one embedded signature image
+    assert {img[0] for img in document[0].get_images()} != {img[0] for img in document[1].get_images()}
+    assert len({img[0] for img in document[0].get_images()}) == 1
+    assert len(document[0].get_image_info()) == 2
+    initials = document[1].get_image_info()
+    assert all(info["width"] == 40 for info in initials) and len(initials) == 2
+    assert pdf_signature_processor.result_to_json(result)["placements"][2]["locations"][0][0] == 1
+
+
+def test_placements_with_missing_image_fail_before_signing(workdir):
+    config = make_config(workdir, placements=[
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["By:"]),
+        pdf_signature_processor.SignaturePlacement("missing.png", keywords=["Name:"]),
+    ])
+
+    result = PDFSignatureProcessor().process_documents([config])[0]
+
+    assert not result.success
+    assert not (workdir / "signed_form.pdf").exists()
+
+
+@pytest.mark.parametrize("layout", ["array", "lines"])
+def test_iter_manifest_reads_configs_lazily(layout):
+    items = [{"workingFolder": "w", "inputPdfFilename": f"doc{i}.pdf", "itemId": f"item {i} [x], {{y}}",
+              "keywords": ["By:"]} for i in range(50)]
+    if layout == "array":
+        text = " [\n" + ",\n  ".join(json.dumps(item) for item in items) + "\n]\n"
+    else:
+        text = "\n" + "\n\n".join(json.dumps(item) for item in items) + "\n"
+    stream = io.StringIO(text)
+
+    configs = pdf_signature_processor.iter_manifest(stream, chunk_size=7)
+    first = next(configs)
+
+    assert first.item_id == "item 0 [x], {y}"
+    assert stream.tell() < len(text) / 10
+    assert [c.item_id for c in configs] == [item["itemId"] for item in items[1:]]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("[{\"itemId\": \"a\"} {\"itemId\": \"b\"}]", "expected ','"),
+    ("[{\"itemId\": \"a\"},", "Invalid JSON in manifest array"),
+    ("{\"itemId\": \"a\"}\n{oops}\n", "manifest line 2"),
+])
+def test_iter_manifest_rejects_malformed_input(text, message):
+    with pytest.raises(ValueError, match=message):
+        list(pdf_signature_processor.iter_manifest(io.StringIO(text), chunk_size=4))
+
+
+def test_cli_streams_json_lines_manifest(workdir):
+    manifest = workdir / "manifest.jsonl"
+    manifest.write_text("\n".join(json.dumps({
+        "workingFolder": str(workdir), "inputPdfFilename": "form.pdf", "itemId": f"item{i}",
+        "signatureFilename": "signature.png", "keywords": ["By:"], "outputPath": str(workdir / f"out{i}.pdf"),
+    }) for i in range(3)) + "\n")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_signature_processor.py")
+
+    completed = subprocess.run([sys.executable, script, "-"], input=manifest.read_text(),
+                               capture_output=True, text=True, check=True)
+
+    results = json.loads(completed.stdout)
+    assert [(r["itemId"], r["success"]) for r in results] == [("item0", True), ("item1", True), ("item2", True)]
+
+
+def test_aprocess_documents_keeps_order_and_bounds_concurrency(workdir, monkeypatch):
+    import asyncio
+
+    running, peak = [0], [0]
+    original = PDFSignatureProcessor.asign
+
+    async def tracked(self, config, *args, **kwargs):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        try:
+            return await original(self, config, *args, **kwargs)
+        finally:
+            running[0] -= 1
+
+    monkeypatch.setattr(PDFSignatureProcessor, "asign", tracked)
+    # Long enough that the documents take many turns of the event loop
+    make_pdf(workdir / "long.pdf", [FORM_PAGE] * 40)
+    configs = [make_config(workdir, item_id=f"item{i}", input_pdf_filename="long.pdf", keywords=["By:"],
+                           engine="pymupdf", output_path=str(workdir / f"out{i}.pdf")) for i in range(6)]
+    processor = PDFSignatureProcessor()
+
+    async def run():
+        ticks = 0
+        task = asyncio.ensure_future(processor.aprocess_documents(configs, max_concurrency=2))
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return task.result(), ticks
+
+    try:
+        results, ticks = asyncio.run(run())
+    finally:
+        processor.close()
+
+    assert [r.item_id for r in results] == [c.item_id for c in configs]
+    assert all(r.success for r in results)
+    assert peak[0] == 2
+    # The event loop kept running while documents were processed
+    assert ticks > 5
+
+
+def test_asign_runs_in_worker_processes_by_default(workdir):
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    processor = PDFSignatureProcessor()
+    try:
+        result = asyncio.run(processor.asign(make_config(workdir, keywords=["By:"])))
+        assert isinstance(processor._async_executor, ProcessPoolExecutor)
+    finally:
+        processor.close()
+
+    assert result.success, result.error_message
+    assert processor._async_executor is None
+    with fitz.open(result.output_pdf_path) as signed:
+        assert all(page.get_images() for page in signed)
+
+
+def test_asign_runs_one_document_at_a_time_in_threads(workdir, monkeypatch):
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    running, peak, lock = [0], [0], threading.Lock()
+    original = PDFSignatureProcessor._process_document
+
+    def tracked(self, config):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        try:
+            return original(self, config)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_process_document", tracked)
+    configs = [make_config(workdir, item_id=f"item{i}", keywords=["By:"], output_path=str(workdir / f"out{i}.pdf"))
+               for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = asyncio.run(PDFSignatureProcessor().aprocess_documents(configs, max_concurrency=4, executor=pool))
+
+    assert all(r.success for r in results)
+    # PyMuPDF is not thread-safe: documents never overlap in threads
+    assert peak[0] == 1
+
+
+def test_asign_reports_timeout(workdir, monkeypatch):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_process_document", lambda self, config: time.sleep(0.5))
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        result = asyncio.run(PDFSignatureProcessor().asign(make_config(workdir), executor=pool, timeout=0.05))
+
+    assert not result.success and result.error_code == "timeout"
+    assert result.error_message.startswith("Timed out after 0.05s") and "may write its output" in result.error_message
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs forked workers")
+def test_asign_timeout_stops_the_document(workdir, monkeypatch):
+    import asyncio
+
+    original = PDFSignatureProcessor._add_signature_to_pdf
+
+    def slow(self, config, *args):
+        if config.item_id == "slow":
+            time.sleep(1.0)
+        return original(self, config, *args)
+
+    # The supervised worker is forked, so it inherits the patched method
+    monkeypatch.setattr(PDFSignatureProcessor, "_add_signature_to_pdf", slow)
+    processor = PDFSignatureProcessor()
+
+    async def run():
+        return await asyncio.gather(
+            processor.asign(make_config(workdir, item_id="slow", keywords=["By:"]), timeout=0.3),
+            processor.asign(make_config(workdir, item_id="fast", keywords=["By:"],
+                                        output_path=str(workdir / "fast.pdf")), timeout=30))
+
+    try:
+        slow_result, fast_result = asyncio.run(run())
+        time.sleep(1.2)
+        assert not (workdir / "signed_form.pdf").exists()
+        # The killed worker is replaced on the next document
+        again = asyncio.run(processor.asign(make_config(workdir, item_id="again", keywords=["By:"]), timeout=30))
+    finally:
+        processor.close()
+
+    assert (slow_result.success, slow_result.error_code, slow_result.error_message) == \
+           (False, "timeout", "Timed out after 0.3s")
+    assert fast_result.success and again.success
+
+
+def test_dry_run_reports_planned_signatures_without_writing(workdir):
+    config = make_config(workdir, keywords=["By:"], skip_non_empty=True)
+
+    planned_result = PDFSignatureProcessor(dry_run=True).process_documents([config])[0]
+
+    assert planned_result.success and planned_result.output_pdf_path == ""
+    assert not (workdir / "signed_form.pdf").exists()
+    assert [(s.page_number, pytest.approx(s.width, rel=1e-3), pytest.approx(s.height, rel=1e-3))
+            for s in planned_result.planned_signatures] == [(0, 120, 40), (1, 120, 40)]
+    assert [(m.page_number, m.keyword, m.content) for m in planned_result.skipped_matches] == \
+           [(0, "By:", "John Doe"), (1, "By:", "John Doe")]
+
+    signed = PDFSignatureProcessor().process_documents([config])[0]
+    inserted = [(page.number, page.get_image_info()[0]["bbox"]) for page in fitz.open(signed.output_pdf_path)]
+    assert [(s.page_number, pytest.approx((s.x, s.y, s.x + s.width, s.y + s.height)))
+            for s in planned_result.planned_signatures] == inserted
+    assert pdf_signature_processor.result_to_json(planned_result)["skippedMatches"][0]["content"] == "John Doe"
+
+
+def test_skip_unchanged_reuses_outputs_until_an_input_changes(workdir, monkeypatch):
+    signed = []
+    original = PDFSignatureProcessor._add_signature_to_pdf
+
+    def record(self, config, *args):
+        signed.append(config.item_id)
+        return original(self, config, *args)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_add_signature_to_pdf", record)
+    processor = PDFSignatureProcessor(skip_unchanged=True)
+    make_pdf(workdir / "inplace.pdf", [FORM_PAGE])
+    configs = [make_config(workdir, item_id="copy", keywords=["By:"]),
+               make_config(workdir, item_id="inplace", input_pdf_filename="inplace.pdf", keywords=["By:"],
+                           output_path=str(workdir / "inplace.pdf"))]
+
+    def run():
+        results = processor.process_documents(configs)
+        assert all(r.success for r in results)
+        return [r.cached for r in results]
+
+    assert run() == [False, False]
+    assert run() == [True, True]
+    assert signed == ["copy", "inplace"]
+
+    # Touching a file without changing it re-hashes it but still counts as unchanged
+    os.utime(workdir / "form.pdf", ns=(1, 1))
+    assert run() == [True, True]
+
+    # A new signature image, a changed option or a missing output means signing again
+    make_signature(workdir / "signature.png", size=(150, 50))
+    assert run() == [False, False]
+    configs[0].signature_position = "right"
+    assert run() == [False, True]
+    os.remove(workdir / "signed_form.pdf")
+    assert run() == [False, True]
+    assert signed == ["copy", "inplace", "copy", "inplace", "copy", "copy"]
+
+
+def test_plan_batch_groups_configs_by_input_document(workdir):
+    make_pdf(workdir / "other.pdf", [FORM_PAGE])
+    configs = [make_config(workdir, item_id="a", output_path=str(workdir / "a.pdf")),
+               make_config(workdir, item_id="b", input_pdf_filename="other.pdf"),
+               make_config(workdir, item_id="c", output_path=str(workdir / "c.pdf")),
+               # Signs other.pdf in place, so the next config reads what it wrote
+               make_config(workdir, item_id="d", input_pdf_filename="other.pdf", output_path=str(workdir / "other.pdf")),
+               make_config(workdir, item_id="e", input_pdf_filename="other.pdf")]
+
+    groups = PDFSignatureProcessor().plan_batch(configs)
+
+    assert [group.positions for group in groups] == [[0, 2], [1, 3], [4]]
+    assert groups[0].signature_paths == [os.path.join(str(workdir), "signature.png")]
+
+    # The third config rewrites signed_form.pdf after the second one read it, so it cannot
+    # join the first group; likewise for a later writer of an output another group wrote
+    chained = [make_config(workdir, item_id="sign"),
+               make_config(workdir, item_id="countersign", input_pdf_filename="signed_form.pdf",
+                           output_path=str(workdir / "final.pdf")),
+               make_config(workdir, item_id="resign"),
+               make_config(workdir, item_id="x", input_pdf_filename="other.pdf", output_path=str(workdir / "x.pdf")),
+               make_config(workdir, item_id="y", input_pdf_filename="third.pdf", output_path=str(workdir / "y.pdf")),
+               make_config(workdir, item_id="x2", input_pdf_filename="other.pdf", output_path=str(workdir / "y.pdf")),
+               make_config(workdir, item_id="x3", input_pdf_filename="other.pdf", output_path=str(workdir / "x3.pdf"))]
+
+    groups = PDFSignatureProcessor().plan_batch(chained)
+
+    assert [group.positions for group in groups] == [[0], [1], [2], [3], [4], [5, 6]]
+
+
+def test_configs_sharing_a_document_parse_it_once(workdir, monkeypatch):
+    opened = []
+    original_open = pdfplumber.open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return original_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber, "open", counting_open)
+    make_pdf(workdir / "other.pdf", [FORM_PAGE])
+    configs = [make_config(workdir, item_id="by", keywords=["By:"], output_path=str(workdir / "by.pdf")),
+               make_config(workdir, item_id="other", input_pdf_filename="other.pdf", keywords=["By:"]),
+               make_config(workdir, item_id="title", keywords=["AUTHORIZED SIGNATURE"], signature_position="right",
+                           output_path=str(workdir / "title.pdf"))]
+
+    results = PDFSignatureProcessor().process_documents(configs)
+
+    assert [r.item_id for r in results] == ["by", "other", "title"]
+    assert all(r.success for r in results)
+    assert sorted(opened) == ["form.pdf", "other.pdf"]
+
+    # Same placements as signing the document on its own
+    alone = PDFSignatureProcessor().process_documents([replace(configs[2], output_path=str(workdir / "alone.pdf"))])[0]
+    rects = [[image["bbox"] for image in page.get_image_info()]
+             for path in (results[2].output_pdf_path, alone.output_pdf_path) for page in fitz.open(path)]
+    assert rects[:2] == rects[2:] and rects[0]
+
+
+@pytest.mark.parametrize("mode", ["batch", "low_memory", "dry_run", "profile"])
+def test_placements_of_a_document_parse_it_once(workdir, monkeypatch, mode):
+    opened = []
+    original_open = pdfplumber.open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return original_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber, "open", counting_open)
+    config = make_config(workdir, placements=[
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["By:"]),
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["Name:"]),
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["AUTHORIZED SIGNATURE"],
+                                                   signature_position="right"),
+    ])
+    processor = PDFSignatureProcessor(low_memory=mode == "low_memory", dry_run=mode == "dry_run")
+
+    if mode == "profile":
+        result = processor.profile_document(config, str(workdir / "signature.prof"))
+    else:
+        result = processor.process_documents([config])[0]
+
+    assert result.success
+    assert opened == ["form.pdf"]
+    if mode == "dry_run":
+        assert len(result.planned_signatures) == 10
+    else:
+        assert [len(placement.locations) for placement in result.placements] == [4, 4, 2]
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pymupdf"])
+def test_each_page_is_parsed_once_for_all_keywords_and_placements(workdir, monkeypatch, engine):
+    calls = []
+    if engine == "pdfplumber":
+        for name in ("extract_text", "extract_words"):
+            original = getattr(pdfplumber.page.Page, name)
+
+            def counting(page, *args, original=original, name=name, **kwargs):
+                calls.append((name, page.page_number - 1))
+                return original(page, *args, **kwargs)
+
+            monkeypatch.setattr(pdfplumber.page.Page, name, counting)
+    else:
+        original_get_text = fitz.Page.get_text
+
+        def counting_get_text(page, *args, **kwargs):
+            calls.append(("get_text", page.number))
+            return original_get_text(page, *args, **kwargs)
+
+        monkeypatch.setattr(fitz.Page, "get_text", counting_get_text)
+    config = make_config(workdir, engine=engine, placements=[
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["By:", "Name:"]),
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["AUTHORIZED SIGNATURE"],
+                                                   signature_position="right"),
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["Name:"], skip_non_empty=True),
+    ])
+
+    result = PDFSignatureProcessor().process_documents([config])[0]
+
+    assert result.success, result.error_message
+    assert [len(placement.locations) for placement in result.placements] == [8, 2, 2]
+    assert sorted(calls) == sorted({(name, page) for name, _ in calls for page in (0, 1)})
+    assert len(calls) == len(set(calls))
+
+
+def test_parallel_batch_dispatches_largest_documents_first(workdir, monkeypatch):
+    make_pdf(workdir / "long.pdf", [FORM_PAGE] * 12)
+    dispatched = []
+    original = PDFSignatureProcessor._iter_process_groups_parallel
+
+    def record(self, groups, *args):
+        for group in groups:
+            dispatched.append([config.item_id for config in group])
+            yield from original(self, [group], *args)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_iter_process_groups_parallel", record)
+    configs = [make_config(workdir, item_id=f"short{i}", keywords=["By:"], output_path=str(workdir / f"s{i}.pdf"))
+               for i in range(2)]
+    configs.append(make_config(workdir, item_id="long", input_pdf_filename="long.pdf", keywords=["By:"]))
+    stats = pdf_signature_processor.BatchStats()
+
+    results = PDFSignatureProcessor().process_documents(configs, max_workers=2, stats=stats)
+
+    # The two short configs share form.pdf, so they run as one task
+    assert dispatched == [["long"], ["short0", "short1"]]
+    assert [r.item_id for r in results] == ["short0", "short1", "long"] and all(r.success for r in results)
+    assert (stats.documents, stats.tasks, stats.largest_task_pages) == (3, 2, 12)
+    assert stats.probe_seconds > 0 and stats.makespan_seconds > 0
+
+
+def test_parallel_batch_waits_for_documents_written_by_the_batch(workdir, monkeypatch):
+    dispatched = []
+    original = PDFSignatureProcessor._iter_process_groups_parallel
+
+    def record(self, groups, *args):
+        groups = list(groups)
+        dispatched.append([[config.item_id for config in group] for group in groups])
+        yield from original(self, groups, *args)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_iter_process_groups_parallel", record)
+    configs = [make_config(workdir, item_id="sign", keywords=["By:"], output_path=str(workdir / "mid.pdf")),
+               make_config(workdir, item_id="countersign", input_pdf_filename="mid.pdf", keywords=["Name:"],
+                           output_path=str(workdir / "final.pdf")),
+               make_config(workdir, item_id="copy", keywords=["By:"], output_path=str(workdir / "copy.pdf")),
+               # Signs form.pdf in place, so it must not run beside the configs reading form.pdf
+               make_config(workdir, item_id="in_place", keywords=["Name:"], output_path=str(workdir / "form.pdf"))]
+    stats = pdf_signature_processor.BatchStats()
+
+    results = PDFSignatureProcessor().process_documents(configs, max_workers=2, stats=stats)
+
+    assert all(r.success for r in results), [r.error_message for r in results]
+    assert dispatched == [[["sign", "copy", "in_place"]], [["countersign"]]]
+    assert stats.tasks == 2 and stats.largest_task_pages == 6
+    with fitz.open(str(workdir / "final.pdf")) as final, fitz.open(str(workdir / "copy.pdf")) as copy:
+        assert [len(page.get_image_info()) for page in final] == [4, 4]
+        assert [len(page.get_image_info()) for page in copy] == [2, 2]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs forked workers")
+def test_document_timeout_stops_only_the_overrunning_document(workdir, monkeypatch):
+    original = PDFSignatureProcessor._add_signature_to_pdf
+
+    def hang_on_item(self, config, *args):
+        if config.item_id == "slow":
+            time.sleep(60)
+        return original(self, config, *args)
+
+    # The supervised workers are forked, so they inherit the patched method
+    monkeypatch.setattr(PDFSignatureProcessor, "_add_signature_to_pdf", hang_on_item)
+    configs = [make_config(workdir, item_id=item_id, keywords=["By:"], output_path=str(workdir / f"{item_id}.pdf"))
+               for item_id in ("a", "slow", "b")]
+    processor = PDFSignatureProcessor(document_timeout=2)
+
+    started = time.monotonic()
+    results = processor.process_documents(configs)
+
+    assert time.monotonic() - started < 30
+    assert [(r.item_id, r.success, r.error_code) for r in results] == \
+           [("a", True, None), ("slow", False, "timeout"), ("b", True, None)]
+    assert pdf_signature_processor.result_to_json(results[1])["errorCode"] == "timeout"
+    assert [r.error_code for r in processor.iter_process_documents(configs, max_workers=2)] == [None, "timeout", None]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs forked workers")
+@pytest.mark.parametrize("save_mode, in_place", [("full", False), ("incremental", False), ("incremental", True)])
+def test_worker_killed_while_saving_leaves_no_partial_output(workdir, monkeypatch, save_mode, in_place):
+    def stall(document, *args, **kwargs):
+        # Write part of the file, then overrun the document's time budget
+        path = args[0] if args else document.name
+        with open(path, "ab") as f:
+            f.write(b"%PDF-1.7 partial")
+        time.sleep(60)
+
+    # The supervised worker is forked, so it inherits the patched methods
+    monkeypatch.setattr(fitz.Document, "save", stall)
+    monkeypatch.setattr(fitz.Document, "saveIncr", stall)
+    original = (workdir / "form.pdf").read_bytes()
+    output = workdir / ("form.pdf" if in_place else "signed_form.pdf")
+    config = make_config(workdir, keywords=["By:"], save_mode=save_mode, output_path=str(output))
+
+    result = PDFSignatureProcessor(document_timeout=1).process_documents([config])[0]
+
+    assert (result.success, result.error_code) == (False, "timeout")
+    assert (workdir / "form.pdf").read_bytes() == original
+    assert in_place or not output.exists()
+    assert not list(workdir.glob("*.tmp"))
+
+
+def test_job_queue_leases_journals_and_resumes(workdir):
+    queue_path = str(workdir / "jobs.db")
+    configs = [make_config(workdir, item_id=f"item{i}", keywords=["By:"], output_path=str(workdir / f"out{i}.pdf"))
+               for i in range(3)]
+    queue = pdf_signature_processor.JobQueue(queue_path, lease_seconds=0.2)
+    assert queue.enqueue(configs) == 3
+    assert queue.enqueue(configs) == 0
+
+    # A worker claims two jobs and dies: its leases expire and the jobs go to the next worker
+    claimed = queue.claim("crashed", limit=2)
+    assert [config for _, config in claimed] == configs[:2]
+    assert queue.counts() == {"pending": 1, "claimed": 2, "done": 0}
+    time.sleep(0.3)
+
+    resumed = pdf_signature_processor.JobQueue(queue_path, lease_seconds=60)
+    assert pdf_signature_processor.drain_queue(PDFSignatureProcessor(), resumed, worker_id="second") == 3
+    assert not queue.complete(claimed[0][0], "crashed", PDFSignatureProcessor()._failed_result(configs[0], "late"))
+
+    results = list(resumed.results())
+    assert [(r["itemId"], r["success"]) for r in results] == [("item0", True), ("item1", True), ("item2", True)]
+    assert resumed.counts() == {"pending": 0, "claimed": 0, "done": 3}
+
+
+def test_job_queue_gives_up_on_jobs_whose_lease_keeps_expiring(workdir):
+    queue = pdf_signature_processor.JobQueue(str(workdir / "jobs.db"), lease_seconds=0.01, max_attempts=2)
+    queue.enqueue([make_config(workdir, item_id="poison")])
+
+    for worker_id in ("first", "second"):
+        assert len(queue.claim(worker_id)) == 1
+        time.sleep(0.05)
+
+    assert queue.claim("third") == []
+    [result] = queue.results()
+    assert (result["itemId"], result["success"], result["errorCode"]) == ("poison", False, "worker_crashed")
+
+
+def test_job_queue_keeps_the_lease_of_a_document_longer_than_it(workdir, monkeypatch):
+    queue_path = str(workdir / "jobs.db")
+    queue = pdf_signature_processor.JobQueue(queue_path, lease_seconds=0.2)
+    queue.enqueue([make_config(workdir, item_id="long", keywords=["By:"], output_path=str(workdir / "out.pdf"))])
+    stolen = []
+    place_signatures = PDFSignatureProcessor._place_signatures
+
+    def slow_place(self, *args, **kwargs):
+        # Another worker polls for expired leases while the document runs for three lease periods
+        thief = pdf_signature_processor.JobQueue(queue_path)
+        deadline = time.time() + 0.6
+        while time.time() < deadline:
+            stolen.extend(thief.claim("thief"))
+            time.sleep(0.02)
+        thief.close()
+        return place_signatures(self, *args, **kwargs)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_place_signatures", slow_place)
+    assert pdf_signature_processor.drain_queue(PDFSignatureProcessor(), queue, worker_id="worker") == 1
+    assert stolen == []
+    [result] = queue.results()
+    assert (result["itemId"], result["success"]) == ("long", True)
+
+
+def test_job_queue_worker_that_lost_its_lease_writes_nothing(workdir, monkeypatch):
+    queue_path = str(workdir / "jobs.db")
+    queue = pdf_signature_processor.JobQueue(queue_path, lease_seconds=0.1)
+    queue.enqueue([make_config(workdir, item_id="lost", keywords=["By:"], output_path=str(workdir / "out.pdf"))])
+    place_signatures = PDFSignatureProcessor._place_signatures
+
+    def stall(self, *args, **kwargs):
+        # The heartbeat cannot reach the queue, so another worker takes the job over and finishes it
+        time.sleep(0.2)
+        thief = pdf_signature_processor.JobQueue(queue_path)
+        [(job_id, config)] = thief.claim("thief")
+        assert thief.complete(job_id, "thief", PDFSignatureProcessor()._failed_result(config, "taken over"))
+        thief.close()
+        return place_signatures(self, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_signature_processor.JobQueue, "extend", lambda *args: 0)
+    monkeypatch.setattr(PDFSignatureProcessor, "_place_signatures", stall)
+    assert pdf_signature_processor.drain_queue(PDFSignatureProcessor(), queue, worker_id="worker") == 0
+    assert not (workdir / "out.pdf").exists()
+    assert [path.name for path in workdir.iterdir() if path.name.startswith("out.pdf")] == []
+    [result] = queue.results()
+    assert (result["itemId"], result["errorMessage"]) == ("lost", "taken over")
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pymupdf"])
+def test_sharded_search_matches_single_pass(workdir, engine):
+    filled_page = [(72, 200, "By: Jane Roe"), (72, 215, "Name: Jane Roe")]
+    make_pdf(workdir / "long.pdf", [FORM_PAGE, filled_page, [], FORM_PAGE, filled_page, FORM_PAGE, FORM_PAGE])
+
+    def plan(max_matches=None, **options):
+        config = make_config(workdir, input_pdf_filename="long.pdf", keywords=["By:", "AUTHORIZED SIGNATURE"],
+                             skip_non_empty=True, engine=engine, max_matches_per_keyword=max_matches)
+        result = PDFSignatureProcessor(dry_run=True, **options).process_documents([config])[0]
+        assert result.success, result.error_message
+        return ([(s.page_number, s.x, s.y) for s in result.planned_signatures],
+                [(m.page_number, m.keyword, m.content) for m in result.skipped_matches])
+
+    for max_matches in (None, 2):
+        single_pass = plan(max_matches)
+        assert plan(max_matches, shard_min_pages=4, shard_workers=2) == single_pass
+        assert plan(max_matches, shard_min_pages=100, shard_workers=2) == single_pass
+    assert len(plan(2)[0]) == 2 and len(plan()[0]) == 4
+
+    # Documents signed from memory have no path for shard workers, so they are searched in one pass
+    pdf, signature = (workdir / "long.pdf").read_bytes(), (workdir / "signature.png").read_bytes()
+    signed = [PDFSignatureProcessor(**options).sign_bytes(pdf, signature, keywords=["By:"], skip_non_empty=True,
+                                                          engine=engine)
+              for options in ({}, {"shard_min_pages": 4, "shard_workers": 2})]
+    rects = [[[info["bbox"] for info in page.get_image_info()] for page in fitz.open(stream=data, filetype="pdf")]
+             for data in signed]
+    assert rects[0] == rects[1] and sum(map(len, rects[1])) == 4
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pymupdf"])
+def test_sharded_document_is_searched_once_for_all_placements(workdir, monkeypatch, engine):
+    make_pdf(workdir / "long.pdf", [FORM_PAGE] * 6)
+    config = make_config(workdir, input_pdf_filename="long.pdf", engine=engine, placements=[
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["By:"]),
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["AUTHORIZED SIGNATURE"],
+                                                   signature_position="right"),
+        pdf_signature_processor.SignaturePlacement("signature.png", keywords=["Name:"]),
+    ])
+    single_pass = PDFSignatureProcessor().process_documents([config])[0]
+    sharded_searches = []
+    original = PDFSignatureProcessor._iter_sharded_page_matches
+
+    def record(self, pdf_path, keywords, *args):
+        sharded_searches.append(keywords)
+        return original(self, pdf_path, keywords, *args)
+
+    monkeypatch.setattr(PDFSignatureProcessor, "_iter_sharded_page_matches", record)
+    sharded = PDFSignatureProcessor(shard_min_pages=4, shard_workers=2).process_documents([config])[0]
+
+    assert sharded.success, sharded.error_message
+    assert sharded_searches == [["By:"]]
+    assert ([placement.locations for placement in sharded.placements]
+            == [placement.locations for placement in single_pass.placements])
+    assert [len(placement.locations) for placement in sharded.placements] == [12, 6, 12]